@@ -0,0 +1,294 @@
+import ast
+from functools import lru_cache
+
+import numpy as np
+
+from expression import ExpressionError, compile_expression
+
+# Analysis of graph expressions: symbolic derivatives, roots, extrema and
+# intersections.
+#
+# Derivatives are built on the checked AST of a compiled expression and
+# compiled again, so f'(x) is an ordinary vectorized expression. Roots are
+# bracketed by sign changes over one dense sample of the function and then
+# refined all at once: every iteration evaluates f and f' for all brackets
+# in a single NumPy call, taking a Newton step where it stays inside the
+# bracket and bisecting where it does not.
+
+ANALYSIS_POINTS = 100_001  # samples over the visible range
+MAX_ITERATIONS = 60
+TOLERANCE = 1e-15  # relative, on x
+
+
+# Derivatives
+# The builders fold constants and drop zero terms, so the derivative of
+# anything that does not depend on the variable comes out as a literal 0.
+def _number(value):
+    if value < 0:
+        return ast.UnaryOp(op=ast.USub(), operand=ast.Constant(-value))
+    return ast.Constant(value)
+
+
+def _value(node):
+    # The numeric value of a literal (possibly negated), else None
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant):
+        return -node.operand.value
+    return None
+
+
+def _binary(op, left, right):
+    return ast.BinOp(left=left, op=op, right=right)
+
+
+def _add(a, b):
+    va, vb = _value(a), _value(b)
+    if va is not None and vb is not None:
+        return _number(va + vb)
+    if va == 0:
+        return b
+    if vb == 0:
+        return a
+    return _binary(ast.Add(), a, b)
+
+
+def _sub(a, b):
+    va, vb = _value(a), _value(b)
+    if va is not None and vb is not None:
+        return _number(va - vb)
+    if vb == 0:
+        return a
+    if va == 0:
+        return _neg(b)
+    return _binary(ast.Sub(), a, b)
+
+
+def _mul(a, b):
+    va, vb = _value(a), _value(b)
+    if va is not None and vb is not None:
+        return _number(va * vb)
+    if va == 0 or vb == 0:
+        return _number(0)
+    if va == 1:
+        return b
+    if vb == 1:
+        return a
+    if va == -1:
+        return _neg(b)
+    if vb == -1:
+        return _neg(a)
+    return _binary(ast.Mult(), a, b)
+
+
+def _div(a, b):
+    if _value(a) == 0:
+        return _number(0)
+    if _value(b) == 1:
+        return a
+    return _binary(ast.Div(), a, b)
+
+
+def _pow(a, b):
+    vb = _value(b)
+    if vb == 0:
+        return _number(1)
+    if vb == 1:
+        return a
+    return _binary(ast.Pow(), a, b)
+
+
+def _neg(a):
+    va = _value(a)
+    if va is not None:
+        return _number(-va)
+    if isinstance(a, ast.UnaryOp) and isinstance(a.op, ast.USub):
+        return a.operand
+    return ast.UnaryOp(op=ast.USub(), operand=a)
+
+
+def _call(name, arg):
+    return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=[arg], keywords=[])
+
+
+# d/du f(u) for each whitelisted function, as a function of the argument node
+CHAIN_RULES = {
+    "sin": lambda u: _call("cos", u),
+    "cos": lambda u: _neg(_call("sin", u)),
+    "tan": lambda u: _div(_number(1), _pow(_call("cos", u), _number(2))),
+    "asin": lambda u: _div(_number(1), _call("sqrt", _sub(_number(1), _pow(u, _number(2))))),
+    "acos": lambda u: _neg(_div(_number(1), _call("sqrt", _sub(_number(1), _pow(u, _number(2)))))),
+    "atan": lambda u: _div(_number(1), _add(_number(1), _pow(u, _number(2)))),
+    "sinh": lambda u: _call("cosh", u),
+    "cosh": lambda u: _call("sinh", u),
+    "tanh": lambda u: _div(_number(1), _pow(_call("cosh", u), _number(2))),
+    "exp": lambda u: _call("exp", u),
+    "log": lambda u: _div(_number(1), u),
+    "log10": lambda u: _div(_number(1), _mul(u, _call("log", _number(10)))),
+    "log2": lambda u: _div(_number(1), _mul(u, _call("log", _number(2)))),
+    "sqrt": lambda u: _div(_number(1), _mul(_number(2), _call("sqrt", u))),
+    "abs": lambda u: _div(u, _call("abs", u)),
+    "floor": lambda u: _number(0),
+    "ceil": lambda u: _number(0),
+    "radians": lambda u: _div(ast.Name(id="pi", ctx=ast.Load()), _number(180)),
+    "degrees": lambda u: _div(_number(180), ast.Name(id="pi", ctx=ast.Load())),
+}
+for _alias, _name in (("arcsin", "asin"), ("arccos", "acos"), ("arctan", "atan"), ("ln", "log"), ("fabs", "abs")):
+    CHAIN_RULES[_alias] = CHAIN_RULES[_name]
+
+
+def differentiate(node, variable="x"):
+    # d(node)/d(variable) as a new AST; other names are treated as constants
+    if isinstance(node, ast.Expression):
+        return ast.Expression(body=differentiate(node.body, variable))
+    if isinstance(node, ast.Constant):
+        return _number(0)
+    if isinstance(node, ast.Name):
+        return _number(1 if node.id == variable else 0)
+    if isinstance(node, ast.UnaryOp):
+        du = differentiate(node.operand, variable)
+        return _neg(du) if isinstance(node.op, ast.USub) else du
+    if isinstance(node, ast.Call):
+        u = node.args[0]
+        return _mul(CHAIN_RULES[node.func.id](u), differentiate(u, variable))
+    if isinstance(node, ast.BinOp):
+        u, v = node.left, node.right
+        du, dv = differentiate(u, variable), differentiate(v, variable)
+        op = node.op
+        if isinstance(op, ast.Add):
+            return _add(du, dv)
+        if isinstance(op, ast.Sub):
+            return _sub(du, dv)
+        if isinstance(op, ast.Mult):
+            return _add(_mul(du, v), _mul(u, dv))
+        if isinstance(op, ast.Div):
+            if _value(dv) == 0:
+                return _div(du, v)
+            return _div(_sub(_mul(du, v), _mul(u, dv)), _pow(v, _number(2)))
+        if isinstance(op, ast.Pow):
+            if _value(dv) == 0:
+                # u^n -> n u^(n-1) u'
+                return _mul(_mul(v, _pow(u, _sub(v, _number(1)))), du)
+            if _value(du) == 0:
+                # a^v -> a^v ln(a) v'
+                return _mul(_mul(node, _call("log", u)), dv)
+            return _mul(node, _add(_mul(dv, _call("log", u)), _div(_mul(v, du), u)))
+        if isinstance(op, ast.Mod):
+            # Piecewise u - v*floor(u/v)
+            return _sub(du, _mul(dv, _call("floor", _div(u, v))))
+        if isinstance(op, ast.FloorDiv):
+            return _number(0)
+    raise ExpressionError(f"Cannot differentiate {ast.unparse(node)}")
+
+
+@lru_cache(maxsize=128)
+def derivative_text(text, variable="x"):
+    # "x^3 + sin(x)" -> "3 * x ** 2 + cos(x)"
+    tree = compile_expression(text, None).tree
+    return ast.unparse(differentiate(tree, variable))
+
+
+def derivative(text, variables=("x",)):
+    # f'(x) compiled like any other expression (and cached by compile_expression)
+    return compile_expression(derivative_text(text), variables)
+
+
+# Roots
+def _brackets(x, y):
+    # Indices i with a sign change between y[i] and y[i+1], and exact zeros
+    with np.errstate(invalid="ignore"):
+        change = np.flatnonzero((y[:-1] * y[1:] < 0) & np.isfinite(y[:-1]) & np.isfinite(y[1:]))
+    zeros = np.flatnonzero(y == 0)
+    return change, zeros
+
+
+def _refine(func, dfunc, a, b, fa):
+    # Safeguarded Newton on every bracket [a, b] at once; f(a) and f(b) differ in sign
+    x = (a + b) / 2
+    for _ in range(MAX_ITERATIONS):
+        fx = func(x)
+        same = np.sign(fx) == np.sign(fa)
+        a = np.where(same, x, a)
+        fa = np.where(same, fx, fa)
+        b = np.where(same, b, x)
+        with np.errstate(all="ignore"):
+            step = x - fx / dfunc(x)
+        inside = np.isfinite(step) & (step >= a) & (step <= b)
+        new = np.where(fx == 0, x, np.where(inside, step, (a + b) / 2))
+        done = np.abs(new - x) <= TOLERANCE * (1 + np.abs(x))
+        x = new
+        if done.all():
+            break
+    return x
+
+
+def find_roots(func, dfunc, x, y=None):
+    # x of every root of func on the sample grid x (y = func(x) if already known)
+    if y is None:
+        y = func(x)
+    change, zeros = _brackets(x, y)
+    roots = x[zeros]
+    if change.size:
+        y0, y1 = y[change], y[change + 1]
+        refined = _refine(func, dfunc, x[change], x[change + 1], y0)
+        # A sign change across a pole (tan at pi/2) converges to where |f| blows up
+        with np.errstate(all="ignore"):
+            real = np.abs(func(refined)) <= np.maximum(np.abs(y0), np.abs(y1))
+        roots = np.concatenate((roots, refined[real]))
+    return np.sort(roots)
+
+
+def find_extrema(func, dfunc, ddfunc, x, y=None):
+    # (x, y, is_maximum) arrays for the local extrema: the roots of f' where it changes sign
+    if y is None:
+        y = func(x)
+    dy = dfunc(x)
+    change, _ = _brackets(x, dy)
+    # Sample points where f' is exactly 0, or undefined at a corner such as
+    # abs(x) at 0, only count if f' changes sign across them
+    inner = np.flatnonzero((dy[1:-1] == 0) | ~np.isfinite(dy[1:-1])) + 1
+    with np.errstate(invalid="ignore"):
+        inner = inner[(dy[inner - 1] * dy[inner + 1] < 0) & np.isfinite(y[inner])]
+    xs = [x[inner]]
+    maximum = [dy[inner - 1] > 0]
+    if change.size:
+        d0, d1 = dy[change], dy[change + 1]
+        refined = _refine(dfunc, ddfunc, x[change], x[change + 1], d0)
+        # Sign changes of f' at a pole of f (1/x^2 at 0) are not extrema
+        with np.errstate(all="ignore"):
+            fr = func(refined)
+            real = np.isfinite(fr) & (np.abs(fr) <= 4 * np.maximum(np.abs(y[change]), np.abs(y[change + 1]))
+                                      + np.abs(y[change + 1] - y[change]) + TOLERANCE)
+        xs.append(refined[real])
+        maximum.append(d0[real] > 0)
+    xs = np.concatenate(xs)
+    maximum = np.concatenate(maximum)
+    order = np.argsort(xs)
+    xs, maximum = xs[order], maximum[order]
+    return xs, func(xs), maximum
+
+
+def analyze(exprs, xmin, xmax, points=ANALYSIS_POINTS):
+    # Roots and extrema of every expression and the intersections of every pair:
+    #   {"roots": [(expr, x, y)], "extrema": [(expr, x, y, "max"/"min")],
+    #    "intersections": [(expr1, expr2, x, y)]}
+    x = np.linspace(xmin, xmax, points)
+    result = {"roots": [], "extrema": [], "intersections": []}
+    samples = []
+    for expr in exprs:
+        func = compile_expression(expr)
+        dfunc = derivative(expr)
+        ddfunc = derivative(derivative_text(expr))
+        y = func(x)
+        samples.append((expr, func, dfunc, y))
+        for r in find_roots(func, dfunc, x, y):
+            result["roots"].append((expr, float(r), 0.0))
+        for ex, ey, is_max in zip(*find_extrema(func, dfunc, ddfunc, x, y)):
+            result["extrema"].append((expr, float(ex), float(ey), "max" if is_max else "min"))
+    for i, (expr1, func1, dfunc1, y1) in enumerate(samples):
+        for expr2, func2, dfunc2, y2 in samples[i + 1:]:
+            diff = compile_expression(f"({expr1}) - ({expr2})")
+            ddiff = derivative(f"({expr1}) - ({expr2})")
+            for r in find_roots(diff, ddiff, x, y1 - y2):
+                result["intersections"].append((expr1, expr2, float(r), float(func1(np.array([r]))[0])))
+    return result
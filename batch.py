@@ -0,0 +1,163 @@
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+
+from engine import WORD_SIZES, CalculatorEngine, CalculatorError, parse_line
+from precision import DEFAULT_DIGITS, MODES
+
+# Command-line batch mode. Reads expressions one line at a time and writes
+# each result as soon as it is computed, so memory stays flat no matter how
+# large the input is. Only the headless engine is imported here: no tkinter,
+# no matplotlib.
+
+FORMATS = ("text", "csv", "jsonl")
+
+
+def guess_format(path):
+    if path and path.endswith(".csv"):
+        return "csv"
+    if path and (path.endswith(".jsonl") or path.endswith(".ndjson")):
+        return "jsonl"
+    return "text"
+
+
+def format_result(engine, result):
+    return result if isinstance(result, str) else engine.format_value(result)
+
+
+def run_text(engine, infile, outfile, stats):
+    for line in infile:
+        if not line.strip():
+            continue
+        try:
+            result = format_result(engine, engine.evaluate(parse_line(line)))
+        except Exception as e:
+            stats["errors"] += 1
+            result = f"Error: {error_message(e)}"
+        stats["count"] += 1
+        outfile.write(result + "\n")
+
+
+def run_csv(engine, infile, outfile, stats):
+    # Columns: op, a, b, base, value, from, to, category (unused ones may be left out)
+    reader = csv.DictReader(infile)
+    writer = None
+    for row in reader:
+        if writer is None:
+            # Fields past the end of the header (DictReader's None key) are dropped
+            writer = csv.DictWriter(outfile, fieldnames=list(reader.fieldnames) + ["result", "error"],
+                                    extrasaction="ignore")
+            writer.writeheader()
+        try:
+            row["result"] = format_result(engine, engine.evaluate(row))
+            row["error"] = ""
+        except Exception as e:
+            stats["errors"] += 1
+            row["result"] = ""
+            row["error"] = error_message(e)
+        stats["count"] += 1
+        writer.writerow(row)
+
+
+def run_jsonl(engine, infile, outfile, stats):
+    for line in infile:
+        if not line.strip():
+            continue
+        try:
+            record = load_record(line)
+        except ValueError as e:
+            record = {"input": line.strip(), "error": str(e)}
+        else:
+            record = evaluate_record(engine, record)
+        if "error" in record:
+            stats["errors"] += 1
+        stats["count"] += 1
+        outfile.write(json.dumps(record, allow_nan=False) + "\n")
+
+
+def load_record(text):
+    # Strict JSON: NaN and Infinity are not valid JSON and could not be written back
+    return json.loads(text, parse_constant=_reject_constant)
+
+
+def _reject_constant(name):
+    raise ValueError(f"{name} is not allowed")
+
+
+def evaluate_record(engine, record):
+    # JSON object in, the same object with "result" or "error" added out
+    if not isinstance(record, dict):
+        return {"input": record, "error": "Expected a JSON object"}
+    try:
+        # {"line": ...} uses the plain-text syntax of text mode
+        if isinstance(record.get("line"), str):
+            record.update(parse_line(record["line"]))
+        # Numbers may come in as JSON numbers or strings
+        result = engine.evaluate({k: v if isinstance(v, str) else str(v) for k, v in record.items()})
+        # Decimal and Fraction results are written as strings so no digits are
+        # lost, complex numbers and matrices in their display form. JSON has no
+        # infinity or NaN, so those are written as strings too
+        if isinstance(result, float) and not math.isfinite(result):
+            result = engine.format_value(result)
+        record["result"] = result if isinstance(result, (int, float, str)) else engine.format_value(result)
+    except Exception as e:
+        record["error"] = error_message(e)
+    return record
+
+
+def error_message(error):
+    # A CalculatorError is meant for the user. Anything else is a bug, but it
+    # is reported against its own record rather than ending the whole run
+    if isinstance(error, CalculatorError):
+        return str(error)
+    return f"{type(error).__name__}: {error}"
+
+
+RUNNERS = {"text": run_text, "csv": run_csv, "jsonl": run_jsonl}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a stream of calculator expressions.")
+    parser.add_argument("input", nargs="?", default="-", help="input file (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    parser.add_argument("-f", "--format", choices=FORMATS, help="input/output format (default: from file extension)")
+    parser.add_argument("--rad", action="store_true", help="use radians for trig functions")
+    parser.add_argument("--bits", type=int, choices=WORD_SIZES, default=32, help="programmer word size (default: 32)")
+    parser.add_argument("--unsigned", action="store_true", help="unsigned programmer arithmetic")
+    parser.add_argument("--precision", choices=MODES, default="float", help="number model (default: float)")
+    parser.add_argument("--digits", type=int, default=DEFAULT_DIGITS,
+                        help=f"significant digits for --precision decimal (default: {DEFAULT_DIGITS})")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print throughput")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or guess_format(args.input)
+    engine = CalculatorEngine(deg=not args.rad, word_size=args.bits, signed=not args.unsigned,
+                              precision=args.precision, digits=args.digits)
+    stats = {"count": 0, "errors": 0}
+
+    infile = sys.stdin if args.input == "-" else open(args.input, newline="" if fmt == "csv" else None)
+    outfile = sys.stdout if args.output == "-" else open(args.output, "w", newline="" if fmt == "csv" else None)
+    start = time.perf_counter()
+    try:
+        RUNNERS[fmt](engine, infile, outfile, stats)
+    finally:
+        outfile.flush()
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    elapsed = time.perf_counter() - start
+
+    if not args.quiet:
+        rate = stats["count"] / elapsed if elapsed > 0 else 0.0
+        cache = engine.cache_stats()
+        print(f"{stats['count']} expressions ({stats['errors']} errors) in {elapsed:.3f}s "
+              f"- {rate:,.0f} expr/s, function cache {cache['hit_rate']:.0%} hits", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,445 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from engine import BASES, CalculatorEngine
+from expression import compile_expression
+
+# Headless benchmarks for the calculator's hot paths. Every benchmark runs one
+# batch of operations and returns how many it did; the harness repeats it and
+# keeps the best time per operation. Results are printed as JSON and can be
+# compared against a stored baseline:
+#
+#   python benchmark.py                      run everything
+#   python benchmark.py -k programmer        only names containing "programmer"
+#   python benchmark.py --save               store the results as the baseline
+#   python benchmark.py --compare            exit 1 if anything got slower
+#
+# The GUI benchmarks need a display and are skipped without one.
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+REPEATS = 5
+MIN_TIME = 0.05  # seconds per repeat
+THRESHOLD = 0.25  # slower than baseline by more than this fraction is a regression
+SAMPLE_COUNTS = [100, 1000, 10000, 100000]
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def time_benchmark(func, repeats=REPEATS, min_time=MIN_TIME):
+    # Best of `repeats`, each repeat running the batch until min_time has passed
+    best = None
+    total_ops = 0
+    for _ in range(repeats):
+        ops = 0
+        start = time.perf_counter()
+        while True:
+            ops += func()
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        total_ops += ops
+        per_op = elapsed / ops
+        best = per_op if best is None else min(best, per_op)
+    return {"ns_per_op": best * 1e9, "ops": total_ops}
+
+
+# Scientific
+SCIENTIFIC_CHAIN = [('+', "1.25"), ('*', "3.5"), ('-', "0.75"), ('/', "2"), ('**', "1.5")]
+UNARY_CHAIN = ["sqrt", "log", "exp", "ln", "square", "reciprocal"]
+TRIG_CHAIN = ["sin", "cos", "tan"]
+
+
+def _calculate_chain(engine):
+    value = "2.5"
+    for op, operand in SCIENTIFIC_CHAIN:
+        value = str(engine.calculate(value, op, operand))
+    return len(SCIENTIFIC_CHAIN)
+
+
+def _unary_chain(engine, inputs):
+    for value in inputs:
+        for name in UNARY_CHAIN:
+            engine.apply_unary(name, value)
+        for name in TRIG_CHAIN:
+            engine.apply_trig(name, value)
+    return len(inputs) * (len(UNARY_CHAIN) + len(TRIG_CHAIN))
+
+
+for _mode in ("float", "decimal", "fraction"):
+    def _calculate(engine=CalculatorEngine(precision=_mode)):
+        return _calculate_chain(engine)
+
+    def _unary(engine=CalculatorEngine(precision=_mode, cache_size=0)):
+        # Cache disabled: every call is computed
+        return _unary_chain(engine, ["0.5", "1.5", "2.5", "7"])
+
+    def _unary_cached(engine=CalculatorEngine(precision=_mode)):
+        return _unary_chain(engine, ["0.5", "1.5", "2.5", "7"])
+
+    benchmark(f"scientific.calculate.{_mode}")(_calculate)
+    benchmark(f"scientific.apply_unary.{_mode}")(_unary)
+    benchmark(f"scientific.apply_unary.{_mode}.cached")(_unary_cached)
+
+
+@benchmark("scientific.evaluate_expression")
+def _evaluate_expression(engine=CalculatorEngine()):
+    for text in ("2*(3+4)^2", "sin(30)+cos(60)", "r = 5", "pi*r^2", "sqrt(ans)/3"):
+        engine.evaluate_expression(text)
+    return 5
+
+
+@benchmark("scientific.calculate.complex")
+def _calculate_complex(engine=CalculatorEngine(precision="complex")):
+    return _calculate_chain(engine)
+
+
+MATRIX_SIZE = 200
+
+
+@benchmark("scientific.complex.linalg")
+def _complex_linalg(engine=CalculatorEngine(precision="complex")):
+    # One LAPACK/BLAS call each on a 200x200 matrix
+    if "A" not in engine.variables:
+        import numpy as np
+        rng = np.random.default_rng(0)
+        engine.variables["A"] = rng.random((MATRIX_SIZE, MATRIX_SIZE)) + MATRIX_SIZE * np.eye(MATRIX_SIZE)
+        engine.variables["b"] = rng.random(MATRIX_SIZE)
+    for text in ("det(A)", "inv(A)", "solve(A, b)", "A @ A", "A * A + 1i"):
+        engine.evaluate_expression(text)
+    return 5
+
+
+# Programmer
+# (a, b, shift count) in each base
+PROG_OPERANDS = {
+    "DEC": ("1234", "567", "3"),
+    "HEX": ("4D2", "237", "3"),
+    "OCT": ("2322", "1067", "3"),
+    "BIN": ("10011010010", "1000110111", "11"),
+}
+PROG_OPERATORS = ['+', '-', '*', '/', '%', '&', '|', '^', '<<', '>>', '~']
+
+for _base in BASES:
+    def _prog(engine=CalculatorEngine(), base=_base):
+        a, b, shift = PROG_OPERANDS[base]
+        for op in PROG_OPERATORS:
+            engine.format_int(engine.prog_calculate(a, op, shift if op in ('<<', '>>') else b, base), base)
+        return len(PROG_OPERATORS)
+
+    benchmark(f"programmer.prog_calculate.{_base}")(_prog)
+
+
+# Bulk programmer operations: AND, shift and formatting over a million words,
+# counted per value
+BITWISE_VALUES = 1_000_000
+
+for _base in BASES:
+    def _bitwise(base=_base):
+        import numpy as np
+        from bitwise import apply, format_chars
+        words = np.arange(BITWISE_VALUES, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        format_chars(apply('>>', apply('&', words, 0xFFFFFFFF, 32), 3, 32), base, 32, signed=True)
+        return BITWISE_VALUES
+
+    benchmark(f"programmer.bitwise.{_base}")(_bitwise)
+
+
+# Converter
+@benchmark("converter.convert_units")
+def _convert_units(engine=CalculatorEngine()):
+    engine.convert_units("12.5", "Length", "Meter", "Foot")
+    engine.convert_units("3", "Mass", "Kilogram", "Pound")
+    engine.convert_units("100", "Speed", "Kilometer per hour", "Mile per hour")
+    engine.convert_units("1", "Data Size", "Gigabyte", "Megabyte")
+    return 4
+
+
+@benchmark("converter.convert_temperature")
+def _convert_temperature(engine=CalculatorEngine()):
+    engine.convert_temperature("Celsius", "Fahrenheit", "37")
+    engine.convert_temperature("Fahrenheit", "Kelvin", "98.6")
+    engine.convert_temperature("Kelvin", "Celsius", "300")
+    return 3
+
+
+# Graphing: the same work plot_function does, without the canvas
+GRAPH_EXPRESSION = "sin(x)*exp(-x/10) + x^2/50"
+
+for _n in SAMPLE_COUNTS:
+    def _graph_evaluate(n=_n):
+        import numpy as np
+        compile_expression(GRAPH_EXPRESSION)(np.linspace(-10, 10, n))
+        return 1
+
+    benchmark(f"graph.evaluate.{_n}")(_graph_evaluate)
+
+
+@benchmark("graph.adaptive_sample")
+def _graph_sample():
+    from sampling import adaptive_sample
+    adaptive_sample(compile_expression("tan(x)"), -10, 10, time_budget=1.0)
+    return 1
+
+
+@benchmark("graph.tile_sample.pan")
+def _graph_pan():
+    # A fresh sampler each time, then ten small pans that mostly reuse tiles
+    from sampling import TileSampler
+    sampler = TileSampler()
+    func = compile_expression(GRAPH_EXPRESSION)
+    for step in range(10):
+        sampler.sample(GRAPH_EXPRESSION, func, -10 + step, 10 + step)
+    return 10
+
+
+@benchmark("graph.tile_sample.disk")
+def _graph_disk():
+    # A new session's first view, with every tile already in the disk cache
+    import tempfile
+    from diskcache import DiskCache
+    from sampling import TileSampler
+    if "cache" not in _disk:
+        _disk["cache"] = DiskCache(tempfile.mkdtemp(prefix="mpk-bench-"))
+        TileSampler(disk=_disk["cache"]).sample(GRAPH_EXPRESSION, compile_expression(GRAPH_EXPRESSION), -10, 10)
+    sampler = TileSampler(disk=_disk["cache"])
+    sampler.sample(GRAPH_EXPRESSION, compile_expression(GRAPH_EXPRESSION), -10, 10)
+    return 1
+
+
+_disk = {}
+
+
+def _remove_disk_cache():
+    import shutil
+    if _disk:
+        shutil.rmtree(os.path.dirname(_disk.pop("cache").path), ignore_errors=True)
+
+
+@benchmark("graph.analyze")
+def _graph_analyze():
+    # Roots, extrema and the intersection of two curves over the default range
+    from analysis import analyze
+    analyze(["sin(x)*exp(-x/10)", "x^2/50 - 0.5"], -10, 10)
+    return 1
+
+
+# Statistics: values per second through the moments and the t-digest, and
+# through the text reader
+STATS_VALUES = 1_000_000
+STATS_TEXT_VALUES = 100_000
+_stats_input = {}
+
+
+def _stats_data():
+    if not _stats_input:
+        import numpy as np
+        values = np.random.default_rng(0).lognormal(0, 1, STATS_VALUES)
+        _stats_input["values"] = values
+        _stats_input["text"] = "\n".join(map(repr, values[:STATS_TEXT_VALUES].tolist())).encode()
+    return _stats_input
+
+
+@benchmark("stats.update")
+def _stats_update():
+    from stats import Statistics
+    Statistics().update(_stats_data()["values"])
+    return STATS_VALUES
+
+
+@benchmark("stats.read_text")
+def _stats_read_text():
+    import io
+    from stats import read_text
+    for _ in read_text(io.BytesIO(_stats_data()["text"])):
+        pass
+    return STATS_TEXT_VALUES
+
+
+# Large workloads: spread over a process pool on multi-core machines
+@benchmark("parallel.evaluate.2000000")
+def _parallel_evaluate():
+    import numpy as np
+    from parallel import evaluate
+    evaluate(GRAPH_EXPRESSION, np.linspace(-10, 10, 2_000_000))
+    return 1
+
+
+@benchmark("parallel.sweep.20x100000")
+def _parallel_sweep():
+    import numpy as np
+    from parallel import sweep
+    sweep("a*sin(x) + x/a", np.linspace(-10, 10, 100_000), range(1, 21))
+    return 1
+
+
+# Service: the HTTP round trip, pipelined over one loopback connection
+SERVER_PIPELINE = 100
+SERVER_REQUEST = b'{"line": "sin 30"}'
+_service = {}
+
+
+async def _server_round_trip(reader, writer):
+    request = (b"POST /evaluate HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s"
+               % (len(SERVER_REQUEST), SERVER_REQUEST))
+    writer.write(request * SERVER_PIPELINE)
+    for _ in range(SERVER_PIPELINE):
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+        await reader.readexactly(length)
+
+
+@benchmark(f"server.evaluate.pipelined{SERVER_PIPELINE}")
+def _server_pipelined():
+    # Client and server share one event loop, kept for every repeat
+    import asyncio
+    if not _service:
+        from server import CalculatorServer
+        loop = asyncio.new_event_loop()
+        listener = loop.run_until_complete(CalculatorServer().start("127.0.0.1", 0))
+        port = listener.sockets[0].getsockname()[1]
+        _service.update(loop=loop, listener=listener,
+                        connection=loop.run_until_complete(asyncio.open_connection("127.0.0.1", port)))
+    _service["loop"].run_until_complete(_server_round_trip(*_service["connection"]))
+    return SERVER_PIPELINE
+
+
+def _close_service():
+    import asyncio
+    if not _service:
+        return
+    loop = _service["loop"]
+    _service["connection"][1].close()
+    _service["listener"].close()
+    # Let the server side see the closed connection and finish
+    loop.run_until_complete(asyncio.gather(*asyncio.all_tasks(loop)))
+    loop.close()
+    _service.clear()
+
+
+def gui_benchmarks():
+    # Real widgets on a withdrawn root; only available with a display
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return {}
+    root.withdraw()
+    from calculator import Calculator
+    app = Calculator(root)
+    app.ensure_tab(app.graph_frame)
+
+    # Always sample: tiles from the disk cache would skip the work being measured
+    app.graph_sampler.disk = None
+
+    def plot():
+        app.graph_sampler.cache.clear()
+        app.plot_function()
+        root.update()
+        return 1
+
+    def scientific():
+        app.clear()
+        for digit in "12345":
+            app.add_digit(digit)
+        app.set_operator('*')
+        app.add_digit("7")
+        app.equals()
+        app.apply_unary("sqrt")
+        app.apply_trig("sin")
+        return 4
+
+    return {"gui.plot_function": plot, "gui.scientific_buttons": scientific, "_root": root}
+
+
+def run(pattern=None, gui=True, repeats=REPEATS, min_time=MIN_TIME):
+    benchmarks = dict(BENCHMARKS)
+    root = None
+    if gui:
+        extra = gui_benchmarks()
+        root = extra.pop("_root", None)
+        benchmarks.update(extra)
+    results = {}
+    try:
+        for name, func in benchmarks.items():
+            if pattern and pattern not in name:
+                continue
+            results[name] = time_benchmark(func, repeats, min_time)
+    finally:
+        _close_service()
+        _remove_disk_cache()
+        if root is not None:
+            root.destroy()
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    # {name: ratio} for every benchmark in both runs; ratio > 1 means slower
+    ratios = {}
+    for name, result in results["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if old:
+            ratios[name] = result["ns_per_op"] / old["ns_per_op"]
+    regressions = {name: ratio for name, ratio in ratios.items() if ratio > 1 + threshold}
+    return ratios, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the calculator's hot paths.")
+    parser.add_argument("-k", "--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("-o", "--output", default="-", help="write JSON results here (default: stdout)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file (default: %(default)s)")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compare with the baseline, exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"allowed slowdown as a fraction (default: {THRESHOLD})")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help=f"repeats per benchmark (default: {REPEATS})")
+    parser.add_argument("--no-gui", action="store_true", help="skip the benchmarks that need a display")
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, gui=not args.no_gui, repeats=args.repeats)
+    text = json.dumps(results, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            f.write(text + "\n")
+
+    status = 0
+    if args.compare:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print(f"No baseline at {args.baseline}; run with --save first", file=sys.stderr)
+            return 2
+        ratios, regressions = compare(results, baseline, args.threshold)
+        for name, ratio in ratios.items():
+            flag = "  REGRESSION" if name in regressions else ""
+            print(f"{name:45s} {ratio:6.2f}x{flag}", file=sys.stderr)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}", file=sys.stderr)
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
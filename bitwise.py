@@ -0,0 +1,283 @@
+import os
+import numpy as np
+
+from engine import BASES, CalculatorEngine, DivisionByZero, InvalidInput
+
+# Bulk programmer operations on arrays of up to 64-bit words. Values are kept
+# as uint64 holding the raw bits of the word, exactly like the int the
+# Programmer tab wraps to the word size; signedness only matters for DEC
+# output, division, remainder and right shifts. Formatting builds the digit
+# characters for a whole array with shifts and a lookup table, so no
+# per-element hex()/bin()/str() call is made.
+#
+# Input files are memory-mapped: raw little-endian 64-bit words (.bin), or
+# text with one hex value per token ("1F", "0x1f", separated by whitespace
+# or commas). Both are processed a chunk at a time.
+
+CHUNK_SIZE = 1 << 16  # values
+TEXT_CHUNK = 1 << 22  # bytes of a text dump parsed at once
+BINARY_SUFFIXES = (".bin", ".u64", ".dat")
+OPERATORS = ['+', '-', '*', '/', '%', '&', '|', '^', '<<', '>>', '~', "popcount"]
+ALIASES = {"MOD": '%', "AND": '&', "OR": '|', "XOR": '^', "NOT": '~', "SHL": '<<', "SHR": '>>', "POPCNT": "popcount"}
+
+DIGITS = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+DIGIT_BITS = {"HEX": 4, "OCT": 3, "BIN": 1}
+SPACE, MINUS, NEWLINE, ZERO = ord(" "), ord("-"), ord("\n"), ord("0")
+# The digits of every byte value, for bases whose digits do not straddle
+# bytes, packed into one integer per byte so a lookup is a single take
+BYTE_CHARS = {
+    "HEX": np.array([list(b"%02X" % i) for i in range(256)], dtype=np.uint8).view(np.uint16).ravel(),
+    "BIN": np.array([list(format(i, "08b").encode()) for i in range(256)], dtype=np.uint8).view(np.uint64).ravel(),
+}
+DECIMAL_PAIRS = np.array([list(b"%02d" % i) for i in range(100)], dtype=np.uint8).view(np.uint16).ravel()
+
+# Text dump bytes: 0-15 hex digit, SEPARATOR whitespace or comma, X for the "x" of "0x"
+SEPARATOR, X, INVALID = 16, 17, 255
+HEX_CODES = np.full(256, INVALID, dtype=np.uint8)
+for _i, _c in enumerate(b"0123456789abcdef"):
+    HEX_CODES[_c] = HEX_CODES[ord(chr(_c).upper())] = _i
+for _c in b" \t\r\n,":
+    HEX_CODES[_c] = SEPARATOR
+HEX_CODES[ord("x")] = HEX_CODES[ord("X")] = X
+
+# Set bits per byte value, for NumPy versions without bitwise_count
+POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def check_bits(bits):
+    if bits > 64:
+        raise InvalidInput("Bulk operations support word sizes up to 64 bits")
+    return np.uint64((1 << bits) - 1)
+
+
+def to_words(values, bits=64):
+    # Any integer array (signed values included) as raw uint64 bits of the word
+    mask = check_bits(bits)
+    values = np.asarray(values)
+    if values.dtype != np.uint64:
+        values = values.astype(np.int64).view(np.uint64) if values.dtype.kind == "i" else values.astype(np.uint64)
+    return values & mask
+
+
+def to_signed(words, bits=64):
+    # Sign-extend to int64
+    if bits == 64:
+        return words.view(np.int64)
+    sign = np.uint64(1 << (bits - 1))
+    return ((words ^ sign) - sign).view(np.int64)
+
+
+def apply(op, a, b=None, bits=64, signed=False):
+    # a <op> b element-wise (b may be a scalar), wrapped to the word size like prog_calculate
+    mask = check_bits(bits)
+    a = to_words(a, bits)
+    if op == '~':
+        return ~a & mask
+    if op == "popcount":
+        return popcount(a).astype(np.uint64)
+    if b is None:
+        raise InvalidInput(f"{op} needs a second operand")
+    b = to_words(b, bits)
+    with np.errstate(over="ignore"):
+        if op == '+':
+            result = a + b
+        elif op == '-':
+            result = a - b
+        elif op == '*':
+            result = a * b
+        elif op in ('/', '%'):
+            if not np.all(b):
+                raise DivisionByZero("Division by zero!")
+            if signed:
+                # Floor division and remainder, like Python ints
+                sa, sb = to_signed(a, bits), to_signed(b, bits)
+                result = (sa // sb if op == '/' else sa % sb).view(np.uint64)
+            else:
+                result = a // b if op == '/' else a % b
+        elif op == '&':
+            result = a & b
+        elif op == '|':
+            result = a | b
+        elif op == '^':
+            result = a ^ b
+        elif op in ('<<', '>>'):
+            if signed and np.any(to_signed(b, bits) < 0):
+                raise InvalidInput("Negative shift count")
+            # Shifting past the word clears it (or fills it with the sign bit)
+            count = np.minimum(b, np.uint64(bits))
+            if op == '<<':
+                result = np.where(count >= 64, np.uint64(0), a << np.minimum(count, np.uint64(63)))
+            elif signed:
+                result = (to_signed(a, bits) >> np.minimum(count, np.uint64(63)).astype(np.int64)).view(np.uint64)
+            else:
+                result = np.where(count >= 64, np.uint64(0), a >> np.minimum(count, np.uint64(63)))
+        else:
+            raise InvalidInput(f"Unknown operator: {op}")
+    return result & mask
+
+
+def popcount(words):
+    words = np.asarray(words, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    counts = POPCOUNT_TABLE[words.reshape(-1, 1).view(np.uint8)]
+    return counts.sum(axis=1, dtype=np.uint8).reshape(words.shape)
+
+
+def format_chars(words, base="HEX", bits=64, signed=False, pad=False):
+    # (n, width) uint8 array of right-aligned digits; HEX/OCT/BIN are
+    # zero-padded to the word width when pad is set
+    words = to_words(words, bits)
+    if base == "DEC":
+        return _decimal_chars(words, bits, signed)
+    if base not in DIGIT_BITS:
+        raise InvalidInput(f"Unknown base: {base}")
+    step = DIGIT_BITS[base]
+    width = -(-bits // step)
+    if base in BYTE_CHARS:
+        # Big-endian bytes looked up whole: two hex digits or eight bits per byte
+        nbytes = -(-bits // 8)
+        data = np.ascontiguousarray(words.astype(">u8").view(np.uint8).reshape(-1, 8)[:, 8 - nbytes:])
+        chars = np.take(BYTE_CHARS[base], data).view(np.uint8).reshape(len(words), -1)[:, -width:]
+    else:
+        shifts = np.arange(width - 1, -1, -1, dtype=np.uint64) * np.uint64(step)
+        chars = DIGITS[((words[:, None] >> shifts) & np.uint64((1 << step) - 1)).astype(np.uint8)]
+    if not pad:
+        _blank_leading_zeros(chars)
+    return chars
+
+
+def _decimal_chars(words, bits, signed):
+    mask = check_bits(bits)
+    width = len(str(int(mask)))
+    negative = np.zeros(words.shape, dtype=bool)
+    if signed:
+        negative = to_signed(words, bits) < 0
+        with np.errstate(over="ignore"):
+            words = np.where(negative, (np.uint64(0) - words) & mask, words)
+        width += 1
+    # Two digits per division, from the right
+    pairs = -(-width // 2)
+    chars = np.empty((len(words), pairs), dtype=np.uint16)
+    rest = words.copy()
+    hundred = np.uint64(100)
+    for column in range(pairs - 1, -1, -1):
+        rest, chars[:, column] = np.divmod(rest, hundred)
+    chars = np.take(DECIMAL_PAIRS, chars).view(np.uint8).reshape(len(words), -1)[:, -width:]
+    first = _blank_leading_zeros(chars)
+    if signed:
+        rows = np.flatnonzero(negative)
+        chars[rows, first[rows] - 1] = MINUS
+    return chars
+
+
+def _blank_leading_zeros(chars):
+    # Leading zeros become spaces (a lone 0 stays); returns each row's first digit column
+    nonzero = chars != ZERO
+    nonzero[:, -1] = True
+    first = nonzero.argmax(axis=1)
+    chars[np.arange(chars.shape[1]) < first[:, None]] = SPACE
+    return first
+
+
+def format_array(words, base="HEX", bits=64, signed=False, pad=False):
+    # Fixed-width byte strings (dtype S<width>), one per value
+    chars = np.ascontiguousarray(format_chars(words, base, bits, signed, pad))
+    return chars.view(f"S{chars.shape[1]}").ravel()
+
+
+def parse_hex(text):
+    # uint64 values of the hex tokens in a bytes-like chunk
+    codes = HEX_CODES[np.frombuffer(text, dtype=np.uint8)]
+    separator = codes == SEPARATOR
+    # An "x" only belongs after a "0" that starts a token, and before a digit
+    xs = np.flatnonzero(codes == X)
+    prefix = (xs > 0) & (codes[xs - 1] == 0)
+    prefix[prefix] &= (xs[prefix] < 2) | separator[np.maximum(xs[prefix] - 2, 0)]
+    prefix[prefix] &= codes[np.minimum(xs[prefix] + 1, len(codes) - 1)] < 16
+    digit = codes < 16
+    bad = np.flatnonzero(~(digit | separator | (codes == X)))
+    digit[xs[prefix] - 1] = False
+    if bad.size or not prefix.all():
+        at = bad[0] if bad.size else xs[~prefix][0]
+        raise InvalidInput(f"Not a hex digit at byte {at}: {bytes(text[at:at + 1])!r}")
+
+    index = np.flatnonzero(digit)
+    if not index.size:
+        return np.empty(0, dtype=np.uint64)
+    # Runs of consecutive digit bytes are the tokens
+    starts = np.flatnonzero(np.r_[True, np.diff(index) != 1])
+    ends = np.r_[starts[1:], len(index)]
+    if np.any(ends - starts > 16):
+        raise InvalidInput("Hex value longer than 64 bits")
+    token = np.repeat(np.arange(len(starts)), ends - starts)
+    place = (ends[token] - 1 - np.arange(len(index))).astype(np.uint64) * np.uint64(4)
+    nibbles = codes[index].astype(np.uint64) << place
+    return np.bitwise_or.reduceat(nibbles, starts)
+
+
+def parse_operation(text):
+    # "& FF", "<< 4", "~", "popcount" or "" -> (op, operand text or None)
+    parts = text.split(None, 1)
+    if not parts:
+        return None, None
+    op = parts[0]
+    op = ALIASES.get(op.upper(), op.lower() if op.upper() == "POPCOUNT" else op)
+    operand = parts[1].strip() if len(parts) > 1 else None
+    if op not in OPERATORS:
+        raise InvalidInput(f"Unknown operator: {parts[0]}")
+    if (operand is None) != (op in ('~', "popcount")):
+        raise InvalidInput(f"{op} takes no operand" if operand else f"{op} needs an operand")
+    return op, operand
+
+
+def load_words(path, chunk_bytes=TEXT_CHUNK):
+    # Chunks of uint64 values from a raw word file or a text hex dump
+    if os.path.getsize(path) == 0:
+        return
+    if path.lower().endswith(BINARY_SUFFIXES):
+        data = np.memmap(path, dtype="<u8", mode="r")
+        for start in range(0, len(data), CHUNK_SIZE):
+            yield np.asarray(data[start:start + CHUNK_SIZE], dtype=np.uint64)
+        return
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    start = 0
+    while start < len(data):
+        stop = min(len(data), start + chunk_bytes)
+        if stop < len(data):
+            # Cut after the last separator so no token is split
+            tail = np.flatnonzero(HEX_CODES[data[start:stop]] == SEPARATOR)
+            if tail.size:
+                stop = start + tail[-1] + 1
+        yield parse_hex(data[start:stop])
+        start = stop
+
+
+def process_file(src, dst, op=None, operand=None, base="HEX", bits=64, signed=False, engine=None):
+    # Applies `op operand` (operand in `base`) to every value of src and writes
+    # the results to dst, one per line in `base`. Returns (count, total popcount
+    # of the input values).
+    engine = engine or CalculatorEngine(word_size=bits, signed=signed)
+    if op is not None and op not in OPERATORS:
+        raise InvalidInput(f"Unknown operator: {op}")
+    if base not in BASES:
+        raise InvalidInput(f"Unknown base: {base}")
+    mask = check_bits(bits)
+    b = None
+    if operand is not None:
+        b = np.uint64(engine.parse_int(operand, base) & int(mask))
+    count = ones = 0
+    with open(dst, "wb") as outfile:
+        for words in load_words(src):
+            words = words & mask
+            ones += int(popcount(words).sum(dtype=np.uint64))
+            if op is not None:
+                words = apply(op, words, b, bits, signed)
+            chars = format_chars(words, base, bits, signed and op != "popcount")
+            lines = np.empty((len(words), chars.shape[1] + 1), dtype=np.uint8)
+            lines[:, :-1] = chars
+            lines[:, -1] = NEWLINE
+            # Spaces only pad the right-aligned digits; dropping them leaves one bare value per line
+            lines[lines != SPACE].tofile(outfile)
+            count += len(words)
+    return count, ones
@@ -0,0 +1,76 @@
+import csv
+import itertools
+import os
+import numpy as np
+
+from engine import CalculatorEngine
+
+# Bulk unit conversion. Every conversion is an affine transform
+# (value * scale + offset), so a whole chunk is converted with one
+# vectorized multiply-add. Files are processed a chunk at a time, which keeps
+# memory flat even for inputs larger than RAM.
+
+CHUNK_SIZE = 1 << 16
+
+
+def convert_array(values, category, from_unit, to_unit, engine=None, out=None):
+    engine = engine or CalculatorEngine()
+    scale, offset = engine.conversion(category, from_unit, to_unit)
+    values = np.asarray(values, dtype=float)
+    out = np.multiply(values, scale, out=out)
+    if offset:
+        out += offset
+    return out
+
+
+def convert_csv(src, dst, column, category, from_unit, to_unit, engine=None, chunk_size=CHUNK_SIZE):
+    # Appends a "<column> (<to_unit>)" column; empty cells become nan
+    engine = engine or CalculatorEngine()
+    scale, offset = engine.conversion(category, from_unit, to_unit)
+    count = 0
+    with open(src, newline="") as infile, open(dst, "w", newline="") as outfile:
+        reader = csv.reader(infile)
+        writer = csv.writer(outfile)
+        header = next(reader, None)
+        if header is None:
+            return 0
+        if column not in header:
+            raise ValueError(f"Column not found: {column}")
+        index = header.index(column)
+        writer.writerow(header + [f"{column} ({to_unit})"])
+        while True:
+            rows = list(itertools.islice(reader, chunk_size))
+            if not rows:
+                break
+            try:
+                values = np.array([row[index] or "nan" for row in rows], dtype=float)
+            except (ValueError, IndexError):
+                raise ValueError(f"Non-numeric value in column {column} near row {count + 2}") from None
+            values *= scale
+            values += offset
+            writer.writerows(row + [value] for row, value in zip(rows, values.astype(str)))
+            count += len(rows)
+    return count
+
+
+def convert_binary(src, dst, category, from_unit, to_unit, engine=None, dtype="<f8", chunk_size=CHUNK_SIZE):
+    # Raw arrays of little-endian float64 by default; the input is memory-mapped
+    # and only one chunk-sized output buffer is ever allocated
+    engine = engine or CalculatorEngine()
+    dtype = np.dtype(dtype)
+    data = np.memmap(src, dtype=dtype, mode="r") if os.path.getsize(src) else np.empty(0, dtype)
+    buffer = np.empty(min(chunk_size, len(data)), dtype=dtype)
+    with open(dst, "wb") as outfile:
+        for start in range(0, len(data), chunk_size):
+            chunk = data[start:start + chunk_size]
+            out = buffer[:len(chunk)]
+            convert_array(chunk, category, from_unit, to_unit, engine, out=out)
+            out.tofile(outfile)
+    return len(data)
+
+
+def convert_file(src, dst, category, from_unit, to_unit, column=None, engine=None):
+    if src.lower().endswith(".csv"):
+        return convert_csv(src, dst, column, category, from_unit, to_unit, engine)
+    return convert_binary(src, dst, category, from_unit, to_unit, engine)
+
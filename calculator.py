@@ -1,10 +1,41 @@
+import time
+STARTUP = time.perf_counter()  # startup time is measured from the first import
+import sys
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import filedialog, messagebox, simpledialog, ttk
 import math
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
+from expression import compile_expression
+from engine import BASES, BYTE_BITS, WORD_SIZES, CalculatorEngine, CalculatorError, DivisionByZero, UnitError
+from precision import DEFAULT_DIGITS, MODES
+from instrumentation import Profiler
+from worker import BackgroundRunner
+
+# NumPy and matplotlib (graphing, bulk conversion) are imported the first time
+# they are needed, so opening the Scientific tab never pays for them.
+
+# Methods timed while profiling is on (Ctrl+Shift+D or --profile)
+PROFILED_GUI = ["update_display", "update_prog_display", "update_bit_display", "calculate",
+                "evaluate_expression", "apply_unary", "apply_trig", "apply_inverse_trig",
+                "prog_calculate", "convert_units", "plot_function", "sample_graph", "compute_curves",
+                "update_graph", "render_table"]
+# Points per curve when plotting a parameter family
+SWEEP_POINTS = 2000
+
+# Analysis markers: (result kind, marker, colour)
+ANALYSIS_MARKERS = (("roots", "o", "black"), ("max", "^", "red"), ("min", "v", "blue"),
+                    ("intersections", "s", "purple"))
+
+# Keystrokes in the converter and history search are coalesced for this long
+DEBOUNCE_MS = 150
+
+# Entries listed in the History tab per search
+HISTORY_LIMIT = 500
+
+# Rows moved per mouse-wheel step in the Table tab
+TABLE_WHEEL_ROWS = 3
+
+PROFILED_ENGINE = ["calculate", "apply_unary", "apply_trig", "apply_inverse_trig", "evaluate_expression",
+                   "prog_calculate", "convert_units"]
 
 class Calculator:
     def __init__(self, root):
@@ -13,46 +44,111 @@ class Calculator:
         self.root.geometry("500x600")
         self.root.resizable(True, True)
         
-        self.unit_factors = {
-            "Length": {"Meter": 1.0, "Centimeter": 0.01, "Kilometer": 1000.0, "Inch": 0.0254, "Foot": 0.3048},
-            "Mass": {"Kilogram": 1.0, "Gram": 0.001, "Pound": 0.453592, "Ounce": 0.0283495},
-            "Volume": {"Liter": 1.0, "Milliliter": 0.001, "Gallon": 3.78541, "Pint": 0.473176}
-        }
+        # All arithmetic goes through the headless engine; this class only drives widgets
+        self.engine = CalculatorEngine()
+        # Sampling and conversions run on worker threads; results come back via root.after
+        self.worker = BackgroundRunner(root)
+        # Worker key -> (engine settings, snapshot of self.engine) (see job_engine)
+        self.job_engines = {}
         
         self.current = "0"
         self.previous = ""
         self.operator = ""
         self.result = 0
+        self.result_text = None  # how self.result is shown (see show_result)
         self.deg = True
         self.base = "DEC"  # Current number base: DEC, BIN, OCT, HEX
+        self.prog_value = 0  # Programmer value as an int, wrapped to the word size
+        self.prog_previous = None
+        self.prog_operator = ""
+        self.prog_result = 0
+        self.prog_entering = False
+        self.bit_value = 0
+        self.bit_cells = []
         
         # Notebook for tabs
         self.notebook = ttk.Notebook(root)
         self.calc_frame = tk.Frame(self.notebook)
         self.conv_frame = tk.Frame(self.notebook)
         self.graph_frame = tk.Frame(self.notebook)
+        self.table_frame = tk.Frame(self.notebook)
+        self.stats_frame = tk.Frame(self.notebook)
         self.prog_frame = tk.Frame(self.notebook)  # New programmer frame
+        self.history_frame = tk.Frame(self.notebook)
         self.notebook.add(self.calc_frame, text="Scientific")
         self.notebook.add(self.conv_frame, text="Converter")
         self.notebook.add(self.graph_frame, text="Graphing")
+        self.notebook.add(self.table_frame, text="Table")
+        self.notebook.add(self.stats_frame, text="Statistics")
         self.notebook.add(self.prog_frame, text="Programmer")  # Add programmer tab
+        self.notebook.add(self.history_frame, text="History")
         self.notebook.pack(expand=1, fill="both", padx=3, pady=3)
         
+        # Only the Scientific tab is built up front; the others are built the
+        # first time they are selected
+        self.tab_builders = {
+            str(self.conv_frame): (self.build_converter, self.conv_frame),
+            str(self.graph_frame): (self.build_graph, self.graph_frame),
+            str(self.table_frame): (self.build_table, self.table_frame),
+            str(self.stats_frame): (self.build_stats, self.stats_frame),
+            str(self.prog_frame): (self.build_programmer, self.prog_frame),
+            str(self.history_frame): (self.build_history, self.history_frame),
+        }
         self.build_calculator(self.calc_frame)
-        self.build_converter(self.conv_frame)
-        self.build_graph(self.graph_frame)
-        self.build_programmer(self.prog_frame)  # Build programmer interface
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        
+        # Opened on the first result, so startup never touches the disk
+        self.history = None
+        self.history_disabled = False
+        self.history_entries = []
+        
+        self.startup_time = None
+        self.root.after_idle(self.record_startup_time)
+        
+        # Hidden diagnostics tab, shown while profiling is on
+        self.profiler = Profiler()
+        self.diag_frame = None
+        self.diag_after = None
+        self.root.bind("<Control-Shift-D>", self.toggle_profiling)
+    
+    def on_tab_changed(self, event=None):
+        self.ensure_tab(self.notebook.select())
+    
+    def ensure_tab(self, name):
+        builder = self.tab_builders.pop(str(name), None)
+        if builder is not None:
+            build, frame = builder
+            build(frame)
+    
+    def record_startup_time(self):
+        # Seconds from the first import until the window is idle and visible
+        self.startup_time = time.perf_counter() - STARTUP
     
     def build_calculator(self, parent):
         # Display
         self.display = tk.Entry(parent, font=("Arial", 40), justify="right", bg="white", bd=1, relief="solid")
         self.display.grid(row=0, column=0, columnspan=6, padx=3, pady=3, sticky="ew")
+        # Typed expressions such as "2*(3+4)^2" or "r = 5" are evaluated on Enter.
+        # Looked up on each call, so the profiler's timing shim is picked up
+        self.display.bind("<Return>", lambda event: self.evaluate_expression(event))
+        self.display.bind("<KP_Enter>", lambda event: self.evaluate_expression(event))
         
         # DEG/RAD button
         self.dr_button = tk.Button(parent, text="DEG", font=("Arial", 10), bg="lightblue", fg="black", 
                                    height=1, width=3, command=self.toggle_deg_rad)
         self.dr_button.grid(row=1, column=5, padx=1, pady=1, sticky="nsew")
         
+        # Precision mode: float64, decimal with N digits, or exact fractions
+        self.precision_labels = {"float": "FLT", "decimal": "DEC", "fraction": "FRC", "complex": "CPX"}
+        self.precision_button = tk.Button(parent, text="FLT", font=("Arial", 10), bg="lightblue", fg="black",
+                                          height=1, width=3, command=self.cycle_precision)
+        self.precision_button.grid(row=2, column=5, padx=1, pady=1, sticky="nsew")
+        self.digits_var = tk.StringVar(value=str(DEFAULT_DIGITS))
+        self.digits_spin = tk.Spinbox(parent, from_=10, to=1000, increment=10, width=4,
+                                      textvariable=self.digits_var, command=self.on_digits_change)
+        self.digits_spin.grid(row=3, column=5, padx=1, pady=1, sticky="ew")
+        self.digits_spin.bind("<Return>", self.on_digits_change)
+        
         # Buttons configuration
         self.buttons = [
             ('C', 1, 0), ('+/-', 1, 1), ('%', 1, 2), ('/', 1, 3), ('*', 1, 4),
@@ -88,6 +184,21 @@ class Calculator:
                           value=base, font=("Arial", 9), 
                           command=self.on_base_change).pack(side="left", padx=5)
         
+        # Word size and signedness
+        tk.Label(base_frame, text="Bits:", font=("Arial", 10)).pack(side="left", padx=(10, 0))
+        self.word_var = tk.StringVar(value=str(self.engine.word_size))
+        word_combo = ttk.Combobox(base_frame, textvariable=self.word_var, values=[str(b) for b in WORD_SIZES],
+                                  state="readonly", width=4)
+        word_combo.pack(side="left", padx=2)
+        word_combo.bind("<<ComboboxSelected>>", self.on_word_size_change)
+        self.signed_var = tk.BooleanVar(value=self.engine.signed)
+        tk.Checkbutton(base_frame, text="Signed", variable=self.signed_var, font=("Arial", 9),
+                       command=self.on_word_size_change).pack(side="left", padx=5)
+        # Bulk operations on a file of values
+        self.import_btn = tk.Button(base_frame, text="Import...", font=("Arial", 8), command=self.import_values,
+                                    bg="lightblue", width=8)
+        self.import_btn.pack(side="right", padx=2)
+        
         # Programmer display
         self.prog_display = tk.Entry(parent, font=("Arial", 20), justify="right", 
                                    bg="white", bd=1, relief="solid")
@@ -95,7 +206,7 @@ class Calculator:
         
         # Bit display
         self.bit_display = tk.Label(parent, text="", font=("Arial", 20), 
-                                  bg="lightgray", relief="sunken", anchor="w")
+                                  bg="lightgray", relief="sunken", anchor="w", justify="left")
         self.bit_display.grid(row=2, column=0, columnspan=6, padx=3, pady=2, sticky="ew")
         
         # Programmer buttons
@@ -144,7 +255,7 @@ class Calculator:
                 bg = "#9b59b6"
                 fg = "white"
             elif text == '=':
-                cmd = self.prog_calculate
+                cmd = lambda: self.prog_calculate()  # looked up per call (profiler)
                 bg = "#e67e22"
                 fg = "white"
             elif text in ['(', ')']:
@@ -166,7 +277,7 @@ class Calculator:
         # Category row
         tk.Label(parent, text="Category:", font=("Arial", 9)).grid(row=0, column=0, sticky="w", padx=3, pady=1)
         self.category_var = tk.StringVar(value="Length")
-        cat_values = list(self.unit_factors.keys()) + ["Temperature"]
+        cat_values = self.engine.categories()
         self.cat_combo = ttk.Combobox(parent, textvariable=self.category_var, values=cat_values, state="readonly", width=10)
         self.cat_combo.grid(row=0, column=1, sticky="ew", padx=3, pady=1)
         self.cat_combo.bind("<<ComboboxSelected>>", self.update_units)
@@ -202,6 +313,10 @@ class Calculator:
         self.swap_btn = tk.Button(parent, text="↔ Swap", font=("Arial", 8), command=self.swap_units, bg="lightblue", width=6)
         self.swap_btn.grid(row=2, column=0, columnspan=2, pady=3)
         
+        # Bulk conversion of a CSV column or a raw float64 file
+        self.bulk_btn = tk.Button(parent, text="Bulk...", font=("Arial", 8), command=self.bulk_convert, bg="lightblue", width=6)
+        self.bulk_btn.grid(row=3, column=0, columnspan=2, pady=3)
+        
         # Configure grid weights for responsiveness
         parent.grid_rowconfigure(1, weight=1)
         parent.columnconfigure(0, weight=1)
@@ -229,19 +344,333 @@ class Calculator:
         self.xmax_entry = tk.Entry(range_frame, font=("Arial", 8), width=4)
         self.xmax_entry.insert(0, "10")
         self.xmax_entry.pack(side="left", padx=1)
+        # Values for "a" plot a family of curves, e.g. "a*sin(x)" with "1:3:5"
+        tk.Label(range_frame, text="a:", font=("Arial", 8)).pack(side="left", padx=(6, 0))
+        self.param_entry = tk.Entry(range_frame, font=("Arial", 8), width=8)
+        self.param_entry.pack(side="left", padx=1)
         
-        # Plot button
-        self.plot_btn = tk.Button(parent, text="Plot", font=("Arial", 9), command=self.plot_function, bg="lightblue", height=1)
-        self.plot_btn.grid(row=2, column=0, columnspan=4, pady=2, sticky="ew")
+        # Plot button, derivative and analysis
+        button_frame = tk.Frame(parent)
+        button_frame.grid(row=2, column=0, columnspan=4, pady=2, sticky="ew")
+        self.plot_btn = tk.Button(button_frame, text="Plot", font=("Arial", 9), command=lambda: self.plot_function(), bg="lightblue", height=1)
+        self.plot_btn.pack(side="left", fill="x", expand=True)
+        tk.Button(button_frame, text="d/dx", font=("Arial", 9), command=self.plot_derivative,
+                  bg="lightblue", height=1).pack(side="left", padx=2)
+        # Roots, extrema and intersections are marked while this is on
+        self.analyze_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(button_frame, text="Analyze", variable=self.analyze_var, font=("Arial", 8),
+                       command=self.on_analyze_toggle).pack(side="left")
         
-        # Canvas frame
+        # Canvas frame; the figure inside is created on the first plot and then reused
         self.canvas_frame = tk.Frame(parent)
+        self.graph_canvas = None
+        self.graph_lines = []
+        self.graph_layout = None
+        self.graph_background = None
+        self.graph_exprs = []
+        self.graph_params = []
+        from sampling import TileSampler
+        self.graph_sampler = TileSampler(disk=self.plot_cache())
+        self.graph_drag = None
+        self.graph_markers = {}
+        self.graph_histogram = None
         self.canvas_frame.grid(row=3, column=0, columnspan=4, sticky="nsew", padx=3, pady=3)
+        self.analysis_label = tk.Label(parent, text="", font=("Arial", 8), anchor="w", justify="left")
+        self.analysis_label.grid(row=4, column=0, columnspan=4, sticky="ew", padx=3)
         
         # Configure for responsiveness
         parent.grid_rowconfigure(3, weight=1)
         parent.columnconfigure(0, weight=1)
     
+    def build_table(self, parent):
+        # f(x) over X, or f(x, y) over the X by Y grid when Y is filled in
+        func_frame = tk.Frame(parent)
+        func_frame.pack(fill="x", padx=3, pady=1)
+        tk.Label(func_frame, text="f(x, y)=", font=("Arial", 9)).pack(side="left")
+        self.table_func_entry = tk.Entry(func_frame, font=("Arial", 9))
+        self.table_func_entry.insert(0, "x**2")
+        self.table_func_entry.pack(side="left", fill="x", expand=True, padx=2)
+        self.table_func_entry.bind("<Return>", lambda event: self.evaluate_table())
+        
+        self.table_axis_entries = {}
+        for axis, defaults in (("X", ("-10", "10", "0.1")), ("Y", ("", "", ""))):
+            axis_frame = tk.Frame(parent)
+            axis_frame.pack(fill="x", padx=3, pady=1)
+            tk.Label(axis_frame, text=f"{axis}:", font=("Arial", 8)).pack(side="left")
+            entries = []
+            for label, default in zip(("", "to", "step"), defaults):
+                if label:
+                    tk.Label(axis_frame, text=label, font=("Arial", 8)).pack(side="left")
+                entry = tk.Entry(axis_frame, font=("Arial", 8), width=7)
+                entry.insert(0, default)
+                entry.pack(side="left", padx=1)
+                entries.append(entry)
+            self.table_axis_entries[axis] = entries
+        
+        button_frame = tk.Frame(parent)
+        button_frame.pack(fill="x", padx=3, pady=2)
+        tk.Button(button_frame, text="Evaluate", font=("Arial", 9), command=self.evaluate_table,
+                  bg="lightblue").pack(side="left")
+        self.table_export_btn = tk.Button(button_frame, text="Export...", font=("Arial", 9),
+                                          command=self.export_table, bg="lightblue", state="disabled")
+        self.table_export_btn.pack(side="left", padx=3)
+        self.table_status = tk.Label(button_frame, text="", font=("Arial", 8), anchor="w")
+        self.table_status.pack(side="left", fill="x", expand=True)
+        
+        # Virtual list: the listbox only ever holds the rows on screen, and the
+        # scrollbar is driven by hand from the table length
+        self.table_header = tk.Label(parent, text="", font=("Courier", 10), anchor="w")
+        self.table_header.pack(fill="x", padx=3)
+        list_frame = tk.Frame(parent)
+        list_frame.pack(fill="both", expand=True, padx=3, pady=3)
+        self.table_scrollbar = tk.Scrollbar(list_frame, command=self.on_table_scroll)
+        self.table_scrollbar.pack(side="right", fill="y")
+        self.table_list = tk.Listbox(list_frame, font=("Courier", 10), activestyle="none")
+        self.table_list.pack(side="left", fill="both", expand=True)
+        self.table_list.bind("<Configure>", self.on_table_resize)
+        self.table_list.bind("<MouseWheel>", self.on_table_wheel)
+        self.table_list.bind("<Button-4>", self.on_table_wheel)
+        self.table_list.bind("<Button-5>", self.on_table_wheel)
+        from tkinter import font as tkfont
+        self.table_line = tkfont.Font(font=("Courier", 10)).metrics("linespace") + 1
+        
+        self.table = None
+        self.table_offset = 0
+        self.table_visible = 20
+        self.table_exported = 0
+    
+    def evaluate_table(self):
+        # Only compiles and sizes the table; rows are computed as they are shown
+        from table import Axis, Table
+        try:
+            xaxis = Axis(*(e.get() for e in self.table_axis_entries["X"]))
+            y_text = [e.get().strip() for e in self.table_axis_entries["Y"]]
+            yaxis = Axis(*y_text) if any(y_text) else None
+            self.table = Table(self.table_func_entry.get().strip(), xaxis, yaxis)
+        except ValueError as e:
+            messagebox.showerror("Table Error", str(e))
+            return
+        self.table_offset = 0
+        self.table_header.config(text="".join(f"{name:>24s}" for name in self.table.columns))
+        self.table_status.config(text=f"{len(self.table):,} rows")
+        self.table_export_btn.config(state="normal")
+        self.render_table()
+    
+    def render_table(self):
+        if self.table is None:
+            return
+        total = len(self.table)
+        self.table_offset = max(0, min(self.table_offset, total - self.table_visible))
+        rows = self.table.rows(self.table_offset, self.table_offset + self.table_visible)
+        self.table_list.delete(0, tk.END)
+        if len(rows):
+            self.table_list.insert(tk.END, *("".join(f"{v:24.15g}" for v in row) for row in rows.tolist()))
+        if total:
+            self.table_scrollbar.set(self.table_offset / total, (self.table_offset + len(rows)) / total)
+    
+    def on_table_scroll(self, action, amount, unit=None):
+        # Scrollbar protocol: ("moveto", fraction) or ("scroll", n, "units"/"pages")
+        if self.table is None:
+            return
+        if action == "moveto":
+            self.table_offset = int(float(amount) * len(self.table))
+        elif unit == "pages":
+            self.table_offset += int(amount) * self.table_visible
+        else:
+            self.table_offset += int(amount)
+        self.render_table()
+    
+    def on_table_wheel(self, event):
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            self.table_offset -= TABLE_WHEEL_ROWS
+        else:
+            self.table_offset += TABLE_WHEEL_ROWS
+        self.render_table()
+        return "break"
+    
+    def on_table_resize(self, event):
+        visible = max(1, event.height // self.table_line)
+        if visible != self.table_visible:
+            self.table_visible = visible
+            self.render_table()
+    
+    def export_table(self):
+        if self.table is None:
+            return
+        path = filedialog.asksaveasfilename(title="Export table", defaultextension=".csv",
+                                            filetypes=[("CSV files", "*.csv"), ("NumPy array", "*.npy"),
+                                                       ("Parquet", "*.parquet")])
+        if not path:
+            return
+        from table import export_format
+        try:
+            export_format(path)
+        except ValueError as e:
+            messagebox.showerror("Export", str(e))
+            return
+        # The worker thread only updates a counter; the label is refreshed from here
+        self.table_exported = 0
+        self.table_export_btn.config(state="disabled")
+        self.worker.submit("export", self.table.export, path, None, self.set_table_exported,
+                           on_done=lambda count: self.table_export_done(count, path),
+                           on_error=self.table_export_failed)
+        self.show_export_progress(len(self.table))
+    
+    def set_table_exported(self, count):
+        self.table_exported = count
+    
+    def show_export_progress(self, total):
+        if not self.worker.busy("export"):
+            return
+        self.table_status.config(text=f"Exporting... {self.table_exported / total:.0%}")
+        self.root.after(200, self.show_export_progress, total)
+    
+    def table_export_done(self, count, path):
+        self.table_export_btn.config(state="normal")
+        self.table_status.config(text=f"Exported {count:,} rows to {path}")
+    
+    def table_export_failed(self, error):
+        self.table_export_btn.config(state="normal")
+        self.table_status.config(text="Export failed")
+        messagebox.showerror("Export", str(error))
+    
+    def build_stats(self, parent):
+        # Summary of pasted or loaded numbers; the input is read a chunk at a
+        # time on the worker, so its size does not matter
+        source_frame = tk.Frame(parent)
+        source_frame.pack(fill="x", padx=3, pady=2)
+        self.stats_paste_btn = tk.Button(source_frame, text="Paste", font=("Arial", 9),
+                                         command=self.stats_from_clipboard, bg="lightblue")
+        self.stats_paste_btn.pack(side="left")
+        self.stats_open_btn = tk.Button(source_frame, text="Open...", font=("Arial", 9),
+                                        command=self.stats_from_file, bg="lightblue")
+        self.stats_open_btn.pack(side="left", padx=3)
+        # Blank uses every number; otherwise a column number or header name
+        tk.Label(source_frame, text="Column:", font=("Arial", 8)).pack(side="left")
+        self.stats_column_entry = tk.Entry(source_frame, font=("Arial", 8), width=8)
+        self.stats_column_entry.pack(side="left", padx=1)
+        
+        plot_frame = tk.Frame(parent)
+        plot_frame.pack(fill="x", padx=3, pady=2)
+        tk.Label(plot_frame, text="Bins:", font=("Arial", 8)).pack(side="left")
+        self.stats_bins_entry = tk.Entry(plot_frame, font=("Arial", 8), width=5)
+        self.stats_bins_entry.insert(0, "50")
+        self.stats_bins_entry.pack(side="left", padx=1)
+        self.stats_plot_btn = tk.Button(plot_frame, text="Histogram", font=("Arial", 9), command=self.plot_histogram,
+                                        bg="lightblue", state="disabled")
+        self.stats_plot_btn.pack(side="left", padx=3)
+        self.stats_status = tk.Label(plot_frame, text="", font=("Arial", 8), anchor="w")
+        self.stats_status.pack(side="left", fill="x", expand=True)
+        
+        self.stats_label = tk.Label(parent, text="Paste or open a column of numbers", font=("Courier", 10),
+                                    anchor="nw", justify="left")
+        self.stats_label.pack(fill="both", expand=True, padx=3, pady=3)
+        self.stats = None
+        self.stats_read = 0
+    
+    def stats_from_clipboard(self):
+        try:
+            text = self.root.clipboard_get()
+        except tk.TclError:
+            text = ""
+        if not text.strip():
+            messagebox.showerror("Statistics", "The clipboard is empty")
+            return
+        from stats import text_values
+        self.collect_stats(text_values, text, "the clipboard")
+    
+    def stats_from_file(self):
+        path = filedialog.askopenfilename(title="Numbers", filetypes=[("Text or CSV", "*.txt *.csv *.dat"),
+                                                                      ("NumPy array", "*.npy"), ("All files", "*.*")])
+        if not path:
+            return
+        from stats import load_values
+        self.collect_stats(load_values, path, path)
+    
+    def collect_stats(self, reader, source, name):
+        from stats import collect
+        column = self.stats_column_entry.get().strip() or None
+        # As with exports, the worker only updates a counter
+        self.stats_read = 0
+        self.stats_paste_btn.config(state="disabled")
+        self.stats_open_btn.config(state="disabled")
+        self.worker.submit("stats", collect, reader(source, column), self.set_stats_read,
+                           on_done=lambda stats: self.show_stats(stats, name), on_error=self.stats_failed)
+        self.show_stats_progress()
+    
+    def set_stats_read(self, count):
+        self.stats_read = count
+    
+    def show_stats_progress(self):
+        if not self.worker.busy("stats"):
+            return
+        self.stats_status.config(text=f"Reading... {self.stats_read:,} values")
+        self.root.after(200, self.show_stats_progress)
+    
+    def show_stats(self, stats, name):
+        from stats import format_summary
+        self.stats_paste_btn.config(state="normal")
+        self.stats_open_btn.config(state="normal")
+        if not stats.count:
+            self.stats_status.config(text="")
+            messagebox.showerror("Statistics", f"No numbers in {name}")
+            return
+        self.stats = stats
+        self.stats_label.config(text=format_summary(stats.summary()))
+        self.stats_status.config(text=f"{stats.count:,} values from {name}")
+        self.stats_plot_btn.config(state="normal")
+    
+    def stats_failed(self, error):
+        self.stats_paste_btn.config(state="normal")
+        self.stats_open_btn.config(state="normal")
+        self.stats_status.config(text="")
+        if not isinstance(error, (OSError, ValueError)):
+            raise error
+        messagebox.showerror("Statistics", str(error))
+    
+    def plot_histogram(self):
+        # Drawn on the graph canvas in place of any functions; the next plot
+        # replaces it
+        if self.stats is None:
+            return
+        try:
+            bins = int(self.stats_bins_entry.get())
+            if bins < 1:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Statistics", "Bins must be a positive whole number")
+            return
+        counts, edges = self.stats.histogram(bins)
+        self.notebook.select(self.graph_frame)
+        self.ensure_tab(self.graph_frame)
+        self.ensure_graph_canvas()
+        self.worker.cancel("graph")
+        self.worker.cancel("analysis")
+        self.graph_exprs = []
+        self.graph_params = []
+        while self.graph_lines:
+            self.graph_lines.pop().remove()
+        for marker in self.graph_markers.values():
+            marker.set_data([], [])
+        self.analysis_label.config(text="")
+        self.remove_histogram()
+        
+        ax = self.graph_ax
+        self.graph_histogram = ax.stairs(counts, edges, fill=True, alpha=0.6)
+        ax.set_xlim(edges[0], edges[-1])
+        ax.set_ylim(0, counts.max() * 1.05 or 1)
+        ax.set_title(f"Histogram of {self.stats.count:,} values", fontsize=10)
+        if ax.get_legend() is not None:
+            ax.get_legend().remove()
+        self.set_graph_range(edges[0], edges[-1])
+        self.graph_canvas.draw_idle()
+    
+    def remove_histogram(self):
+        if self.graph_histogram is not None:
+            self.graph_histogram.remove()
+            self.graph_histogram = None
+            self.graph_layout = None
+    
     def create_buttons(self, parent):
         for btn_data in self.buttons:
             text = btn_data[0]
@@ -272,39 +701,38 @@ class Calculator:
                 bg = "#3498db"
                 fg = "white"
             elif text == '=':
-                cmd = self.calculate
+                cmd = self.equals
                 bg = "#e67e22"
                 fg = "white"
             elif text in ['sin', 'cos', 'tan', 'asin', 'acos', 'atan']:
-                func = getattr(math, text)
                 if text.startswith('a'):
-                    cmd = lambda f=func: self.apply_inverse_trig(f)
+                    cmd = lambda f=text: self.apply_inverse_trig(f)
                 else:
-                    cmd = lambda f=func: self.apply_trig(f)
+                    cmd = lambda f=text: self.apply_trig(f)
                 bg = "#95a5a6"
                 fg = "white"
             elif text == 'log':
-                cmd = lambda: self.apply_unary(math.log10)
+                cmd = lambda: self.apply_unary('log')
                 bg = "#95a5a6"
                 fg = "white"
             elif text == 'ln':
-                cmd = lambda: self.apply_unary(math.log)
+                cmd = lambda: self.apply_unary('ln')
                 bg = "#95a5a6"
                 fg = "white"
             elif text == 'e^x':
-                cmd = lambda: self.apply_unary(math.exp)
+                cmd = lambda: self.apply_unary('exp')
                 bg = "#95a5a6"
                 fg = "white"
             elif text == '√':
-                cmd = lambda: self.apply_unary(math.sqrt)
+                cmd = lambda: self.apply_unary('sqrt')
                 bg = "#95a5a6"
                 fg = "white"
             elif text == 'x²':
-                cmd = lambda: self.apply_unary(lambda x: x * x)
+                cmd = lambda: self.apply_unary('square')
                 bg = "#95a5a6"
                 fg = "white"
             elif text == '1/x':
-                cmd = lambda: self.apply_unary(lambda x: 1 / x if x != 0 else 0)
+                cmd = lambda: self.apply_unary('reciprocal')
                 bg = "#95a5a6"
                 fg = "white"
             elif text == 'π':
@@ -328,6 +756,16 @@ class Calculator:
         display_text = self.current if self.current != "0" else "0"
         self.display.insert(0, display_text)
     
+    def show_result(self, value):
+        # Large arrays are shown abbreviated, so the value itself is kept and
+        # chained on for as long as the display still shows it
+        self.result = value
+        self.current = self.result_text = self.engine.format_value(value)
+        return self.current
+    
+    def operand(self, text):
+        return self.result if text == self.result_text else text
+    
     def add_digit(self, num):
         if num == '.' and '.' in self.current:
             return
@@ -350,44 +788,65 @@ class Calculator:
         if self.previous == "" or self.operator == "" or self.current == "":
             return
         
-        prev = float(self.previous)
-        curr = float(self.current)
-        
         try:
-            if self.operator == '+':
-                self.result = prev + curr
-            elif self.operator == '-':
-                self.result = prev - curr
-            elif self.operator == '*':
-                self.result = prev * curr
-            elif self.operator == '/':
-                if curr == 0:
-                    raise ZeroDivisionError
-                self.result = prev / curr
-            elif self.operator == '**':
-                self.result = prev ** curr
-            
-            self.current = str(self.result)
+            result = self.engine.calculate(self.operand(self.previous), self.operator, self.operand(self.current))
+            previous, current = self.previous, self.current
+            text = self.show_result(result)
+            self.record_history(self.scientific_mode(), previous, self.operator, current, text)
             self.previous = ""
             self.operator = ""
-        except ZeroDivisionError:
+        except DivisionByZero:
             messagebox.showerror("Error", "Division by zero!")
             self.clear()
-        except ValueError:
+        except CalculatorError:
             messagebox.showerror("Error", "Invalid calculation")
             self.clear()
         
         self.update_display()
     
+    def equals(self):
+        # A pending button operation wins; otherwise evaluate whatever was typed
+        if self.operator:
+            self.calculate()
+        elif self.display.get().strip() != self.current:
+            self.evaluate_expression()
+    
+    def evaluate_expression(self, event=None):
+        text = self.display.get().strip()
+        if not text:
+            return
+        try:
+            self.show_result(self.engine.evaluate_expression(text))
+            self.record_history(self.scientific_mode(), text, result=self.current)
+            self.previous = ""
+            self.operator = ""
+        except DivisionByZero:
+            messagebox.showerror("Error", "Division by zero!")
+            self.clear()
+        except CalculatorError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.update_display()
+    
     def clear(self):
         self.current = "0"
         self.previous = ""
         self.operator = ""
         self.result = 0
+        self.result_text = None
         self.update_display()
     
     def toggle_sign(self):
-        if self.current != "0":
+        if self.current == "0":
+            return
+        if self.current == self.result_text:
+            # Negate the kept value; the text may be abbreviated
+            try:
+                self.show_result(self.engine.calculate('0', '-', self.result))
+                self.update_display()
+            except CalculatorError:
+                pass
+        else:
             if self.current.startswith('-'):
                 self.current = self.current[1:]
             else:
@@ -396,247 +855,218 @@ class Calculator:
     
     def percent(self):
         try:
-            val = float(self.current)
-            self.current = str(val / 100)
+            self.show_result(self.engine.calculate(self.operand(self.current), '/', '100'))
             self.update_display()
-        except ValueError:
+        except CalculatorError:
             pass
     
-    def apply_unary(self, func):
+    def apply_unary(self, name):
         try:
-            val = float(self.current)
-            if val <= 0 and 'log' in func.__name__:
-                raise ValueError("Log of non-positive number")
-            res = func(val)
-            self.current = str(res)
-        except ValueError:
-            messagebox.showerror("Error", "Invalid input")
-            self.clear()
-        except ZeroDivisionError:
+            operand = self.current
+            result = self.engine.apply_unary(name, self.operand(operand))
+            self.record_history(self.scientific_mode(), operand, name, result=self.show_result(result))
+        except DivisionByZero:
             messagebox.showerror("Error", "Division by zero!")
             self.clear()
+        except CalculatorError:
+            messagebox.showerror("Error", "Invalid input")
+            self.clear()
         self.update_display()
     
-    def apply_trig(self, func):
+    def apply_trig(self, name):
         try:
-            val = float(self.current)
-            if self.deg:
-                val = math.radians(val)
-            res = func(val)
-            self.current = str(res)
-        except ValueError:
+            operand = self.current
+            result = self.engine.apply_trig(name, self.operand(operand))
+            self.record_history(self.scientific_mode(), operand, name, result=self.show_result(result))
+        except CalculatorError:
             messagebox.showerror("Error", "Invalid input for trig function")
             self.clear()
         self.update_display()
     
-    def apply_inverse_trig(self, func):
+    def apply_inverse_trig(self, name):
         try:
-            val = float(self.current)
-            res = func(val)
-            if self.deg:
-                res = math.degrees(res)
-            self.current = str(res)
-        except ValueError:
+            operand = self.current
+            result = self.engine.apply_inverse_trig(name, self.operand(operand))
+            self.record_history(self.scientific_mode(), operand, name, result=self.show_result(result))
+        except CalculatorError:
             messagebox.showerror("Error", "Invalid input for inverse trig function")
             self.clear()
         self.update_display()
     
     def set_pi(self):
-        self.current = str(math.pi)
+        self.current = str(self.engine.constant("pi"))
         self.update_display()
     
     def toggle_deg_rad(self):
         self.deg = not self.deg
+        self.engine.deg = self.deg
         self.dr_button.config(text="DEG" if self.deg else "RAD")
     
+    def cycle_precision(self):
+        mode = MODES[(MODES.index(self.engine.precision) + 1) % len(MODES)]
+        self.set_precision(mode)
+    
+    def on_digits_change(self, event=None):
+        if self.engine.precision != "float":
+            self.set_precision(self.engine.precision)
+    
+    def set_precision(self, mode):
+        try:
+            digits = int(self.digits_var.get())
+            self.engine.set_precision(mode, digits)
+        except (ValueError, CalculatorError):
+            messagebox.showerror("Error", "Digits must be a positive whole number")
+            self.digits_var.set(str(self.engine.digits))
+            return
+        self.precision_button.config(text=self.precision_labels[mode])
+    
     # Programmer calculator methods
+    # The value is kept as an int wrapped to the word size; the display text
+    # is derived from it, so switching base never re-parses anything.
     def on_base_change(self):
         self.base = self.base_var.get()
         self.update_prog_display()
     
+    def on_word_size_change(self, event=None):
+        self.engine.set_word_size(int(self.word_var.get()), self.signed_var.get())
+        self.prog_value = self.engine.wrap(self.prog_value)
+        if self.prog_previous is not None:
+            self.prog_previous = self.engine.wrap(self.prog_previous)
+        self.update_prog_display()
+    
     def update_prog_display(self):
         self.prog_display.delete(0, tk.END)
-        if hasattr(self, 'prog_current'):
-            display_text = self.prog_current if self.prog_current != "0" else "0"
-            self.prog_display.insert(0, display_text)
-            self.update_bit_display()
-        else:
-            self.prog_display.insert(0, "0")
+        self.prog_display.insert(0, self.engine.format_int(self.prog_value, self.base))
+        self.update_bit_display()
     
     def update_bit_display(self):
-        if hasattr(self, 'prog_current') and self.prog_current != "0":
-            try:
-                if self.base == "DEC":
-                    value = int(self.prog_current)
-                elif self.base == "HEX":
-                    value = int(self.prog_current, 16)
-                elif self.base == "OCT":
-                    value = int(self.prog_current, 8)
-                elif self.base == "BIN":
-                    value = int(self.prog_current, 2)
-                
-                # Show 32-bit representation
-                if value < 0:
-                    bits = bin(value & 0xFFFFFFFF)[2:].zfill(32)
-                else:
-                    bits = bin(value)[2:].zfill(32)
-                
-                # Format with spaces for readability
-                formatted_bits = ' '.join([bits[i:i+8] for i in range(0, 32, 8)])
-                self.bit_display.config(text=f"32-bit: {formatted_bits}")
-            except:
-                self.bit_display.config(text="")
+        bits = self.prog_value & self.engine.mask
+        nbytes = self.engine.word_size // 8
+        if len(self.bit_cells) != nbytes:
+            self.bit_cells = self.engine.bit_bytes(bits)
         else:
-            self.bit_display.config(text="")
+            # Re-render only the bytes that changed since the last update
+            changed = bits ^ self.bit_value
+            while changed:
+                i = (changed.bit_length() - 1) // 8
+                self.bit_cells[nbytes - 1 - i] = BYTE_BITS[(bits >> (8 * i)) & 0xFF]
+                changed &= ~(0xFF << (8 * i))
+        self.bit_value = bits
+        
+        # Four bytes per line
+        lines = [' '.join(self.bit_cells[i:i + 4]) for i in range(0, nbytes, 4)]
+        text = f"{self.engine.word_size}-bit: " + "\n".join(lines)
+        if text != self.bit_display.cget("text"):
+            self.bit_display.config(text=text, font=("Arial", 20 if nbytes <= 4 else 12))
     
     def prog_add_digit(self, digit):
-        if not hasattr(self, 'prog_current'):
-            self.prog_current = "0"
-            self.prog_previous = ""
-            self.prog_operator = ""
-            self.prog_result = 0
-        
-        current_base = self.base
-        
-        # Validate digit for current base
-        if current_base == "BIN" and digit not in '01':
-            return
-        elif current_base == "OCT" and digit not in '01234567':
-            return
-        elif current_base == "DEC" and digit not in '0123456789':
+        # Validate digit for current base ('.', '(' and ')' are not digits here)
+        try:
+            d = int(digit, 16)
+        except ValueError:
             return
-        elif current_base == "HEX" and digit not in '0123456789ABCDEF':
+        if d >= BASES[self.base]:
             return
         
-        if self.prog_current == "0" and digit != '.':
-            self.prog_current = digit
+        if not self.prog_entering:
+            self.prog_value = 0
+            self.prog_entering = True
+        if self.base == "DEC":
+            value = self.prog_value * 10 + (d if self.prog_value >= 0 else -d)
+            if value != self.engine.wrap(value):
+                return  # would not fit in the word
         else:
-            self.prog_current += digit
+            value = (self.prog_value & self.engine.mask) * BASES[self.base] + d
+            if value > self.engine.mask:
+                return
+            value = self.engine.wrap(value)
+        self.prog_value = value
         self.update_prog_display()
     
     def prog_set_operator(self, op):
-        if not hasattr(self, 'prog_current'):
-            self.prog_current = "0"
-            self.prog_previous = ""
-            self.prog_operator = ""
-            self.prog_result = 0
-        
-        if self.prog_current == "":
-            return
-        if self.prog_previous != "":
+        if self.prog_operator and self.prog_entering:
             self.prog_calculate()
-        self.prog_previous = self.prog_current
+        self.prog_previous = self.prog_value
         self.prog_operator = op
-        self.prog_current = ""
+        self.prog_entering = False
         self.update_prog_display()
     
     def prog_set_bitwise_operator(self, op):
-        if not hasattr(self, 'prog_current'):
-            self.prog_current = "0"
-            self.prog_previous = ""
-            self.prog_operator = ""
-            self.prog_result = 0
-        
-        if self.prog_current == "":
+        if op == '~':
+            # NOT needs only one operand, so apply it straight away
+            self.prog_value = self.engine.prog_calculate(self.prog_value, '~', None)
+            self.prog_entering = False
+            self.update_prog_display()
             return
-        if self.prog_previous != "":
-            self.prog_calculate()
-        self.prog_previous = self.prog_current
-        self.prog_operator = op
-        self.prog_current = ""
-        self.update_prog_display()
+        self.prog_set_operator(op)
     
     def prog_calculate(self):
-        if not hasattr(self, 'prog_previous') or self.prog_previous == "" or self.prog_operator == "" or self.prog_current == "":
+        if self.prog_previous is None or not self.prog_operator:
             return
         
-        # Convert to decimal for calculation
         try:
-            if self.base == "DEC":
-                prev = int(self.prog_previous)
-                curr = int(self.prog_current)
-            elif self.base == "HEX":
-                prev = int(self.prog_previous, 16)
-                curr = int(self.prog_current, 16)
-            elif self.base == "OCT":
-                prev = int(self.prog_previous, 8)
-                curr = int(self.prog_current, 8)
-            elif self.base == "BIN":
-                prev = int(self.prog_previous, 2)
-                curr = int(self.prog_current, 2)
-        except ValueError:
-            messagebox.showerror("Error", "Invalid number for current base")
-            self.prog_clear()
-            return
-        
-        try:
-            if self.prog_operator == '+':
-                self.prog_result = prev + curr
-            elif self.prog_operator == '-':
-                self.prog_result = prev - curr
-            elif self.prog_operator == '*':
-                self.prog_result = prev * curr
-            elif self.prog_operator == '/':
-                if curr == 0:
-                    raise ZeroDivisionError
-                self.prog_result = prev // curr  # Integer division
-            elif self.prog_operator == '%':
-                if curr == 0:
-                    raise ZeroDivisionError
-                self.prog_result = prev % curr
-            elif self.prog_operator == '&' or self.prog_operator == 'AND':
-                self.prog_result = prev & curr
-            elif self.prog_operator == '|':
-                self.prog_result = prev | curr
-            elif self.prog_operator == '^' or self.prog_operator == 'XOR':
-                self.prog_result = prev ^ curr
-            elif self.prog_operator == '<<':
-                self.prog_result = prev << curr
-            elif self.prog_operator == '>>':
-                self.prog_result = prev >> curr
-            elif self.prog_operator == '~':
-                self.prog_result = ~prev
-                self.prog_current = str(self.prog_result)
-                self.prog_previous = ""
-                self.prog_operator = ""
-                self.update_prog_display()
-                return
-            
-            # Convert result back to current base
-            if self.base == "DEC":
-                self.prog_current = str(self.prog_result)
-            elif self.base == "HEX":
-                self.prog_current = hex(self.prog_result & 0xFFFFFFFF)[2:].upper()
-            elif self.base == "OCT":
-                self.prog_current = oct(self.prog_result & 0xFFFFFFFF)[2:]
-            elif self.base == "BIN":
-                self.prog_current = bin(self.prog_result & 0xFFFFFFFF)[2:]
-            
-            self.prog_previous = ""
+            self.prog_result = self.engine.prog_calculate(self.prog_previous, self.prog_operator, self.prog_value)
+            fmt = self.engine.format_int
+            self.record_history(f"programmer {self.base}", fmt(self.prog_previous, self.base), self.prog_operator,
+                                fmt(self.prog_value, self.base), fmt(self.prog_result, self.base))
+            self.prog_value = self.prog_result
+            self.prog_previous = None
             self.prog_operator = ""
-        except ZeroDivisionError:
-            messagebox.showerror("Error", "Division by zero!")
-            self.prog_clear()
-        except ValueError:
-            messagebox.showerror("Error", "Invalid calculation")
+            self.prog_entering = False
+        except CalculatorError as e:
+            messagebox.showerror("Error", str(e))
             self.prog_clear()
+            return
         
         self.update_prog_display()
     
     def prog_clear(self):
-        self.prog_current = "0"
-        self.prog_previous = ""
+        self.prog_value = 0
+        self.prog_previous = None
         self.prog_operator = ""
         self.prog_result = 0
+        self.prog_entering = False
         self.update_prog_display()
     
+    def import_values(self):
+        # Applies one operation to every value of a hex dump or raw uint64 file
+        src = filedialog.askopenfilename(title="Values to import",
+                                         filetypes=[("Hex dump", "*.txt *.hex"), ("Raw uint64", "*.bin *.u64 *.dat"),
+                                                    ("All files", "*.*")])
+        if not src:
+            return
+        text = simpledialog.askstring("Import", "Operation on each value (e.g. \"& FF\", \"<< 4\", \"~\", "
+                                      "\"popcount\"; blank to convert):", parent=self.root)
+        if text is None:
+            return
+        from bitwise import parse_operation, process_file
+        try:
+            op, operand = parse_operation(text)
+        except CalculatorError as e:
+            messagebox.showerror("Import", str(e))
+            return
+        dst = filedialog.asksaveasfilename(title=f"Save results ({self.base})", defaultextension=".txt")
+        if not dst:
+            return
+        self.import_btn.config(state="disabled", text="Working...")
+        self.worker.submit("import", process_file, src, dst, op, operand, self.base, self.engine.word_size,
+                           self.engine.signed, self.job_engine("import"),
+                           on_done=self.import_done, on_error=self.import_failed)
+    
+    def import_done(self, result):
+        count, ones = result
+        self.import_btn.config(state="normal", text="Import...")
+        messagebox.showinfo("Import", f"Wrote {count} values ({ones} bits set in the input)")
+    
+    def import_failed(self, error):
+        self.import_btn.config(state="normal", text="Import...")
+        if not isinstance(error, (CalculatorError, OSError, ValueError)):
+            raise error
+        messagebox.showerror("Import", str(error))
+    
     # Converter methods
     def update_units(self, event=None):
-        cat = self.category_var.get()
-        if cat == "Temperature":
-            units = ["Celsius", "Fahrenheit", "Kelvin"]
-        else:
-            units = list(self.unit_factors[cat].keys())
+        units = self.engine.units(self.category_var.get())
         
         self.from_combo['values'] = units
         self.to_combo['values'] = units
@@ -646,7 +1076,7 @@ class Calculator:
         self.convert_units()
     
     def on_value_change(self, event=None):
-        self.convert_units()
+        self.convert_units(delay=DEBOUNCE_MS)
     
     def on_unit_change(self, event=None):
         self.convert_units()
@@ -666,84 +1096,486 @@ class Calculator:
                 pass
         self.convert_units()
     
-    def convert_units(self):
+    def convert_units(self, delay=0):
+        # Widgets are read here; the conversion itself runs on the worker and
+        # only the result of the newest request is shown
         input_val = self.value_entry.get().strip()
         if not input_val:
+            self.worker.cancel("convert")
             self.result_label.config(text="")
             return
-        try:
-            value = float(input_val)
-            cat = self.category_var.get()
-            from_u = self.from_var.get()
-            to_u = self.to_var.get()
-            
-            if cat == "Temperature":
-                result = self.convert_temperature(from_u, to_u, value)
-            else:
-                factor_from = self.unit_factors[cat][from_u]
-                factor_to = self.unit_factors[cat][to_u]
-                result = value * (factor_from / factor_to)
-            
-            self.result_label.config(text=f"{result:.6g}")
-        except ValueError:
-            self.result_label.config(text="Error")
-        except KeyError:
+        self.worker.submit("convert", self.job_engine("convert").convert_units, input_val, self.category_var.get(),
+                           self.from_var.get(), self.to_var.get(),
+                           on_done=self.show_conversion, on_error=self.show_conversion_error, delay=delay)
+    
+    def job_engine(self, key):
+        # The engine a worker lane uses instead of self.engine. Building one sets
+        # up the number model (the decimal pi series, NumPy), so it is only
+        # rebuilt when a setting changes, not on every keystroke
+        engine = self.engine
+        settings = (engine.deg, engine.word_size, engine.signed, engine.precision, engine.digits)
+        cached = self.job_engines.get(key)
+        if cached is None or cached[0] != settings:
+            cached = self.job_engines[key] = (settings, engine.snapshot())
+        return cached[1]
+    
+    def show_conversion(self, result):
+        self.result_label.config(text=f"{result:.6g}")
+    
+    def show_conversion_error(self, error):
+        if isinstance(error, UnitError):
             self.result_label.config(text="Invalid unit")
+        elif isinstance(error, CalculatorError):
+            self.result_label.config(text="Error")
+        else:
+            raise error
+    
+    def bulk_convert(self):
+        src = filedialog.askopenfilename(title="Values to convert",
+                                         filetypes=[("CSV files", "*.csv"), ("Raw float64", "*.bin *.f64 *.dat"),
+                                                    ("All files", "*.*")])
+        if not src:
+            return
+        column = None
+        if src.lower().endswith(".csv"):
+            column = simpledialog.askstring("Bulk Convert", "Column to convert:", parent=self.root)
+            if not column:
+                return
+        dst = filedialog.asksaveasfilename(title="Save converted values",
+                                           defaultextension=".csv" if column else ".bin")
+        if not dst:
+            return
+        from bulk import convert_file
+        # Large files take a while; keep the window responsive meanwhile
+        self.bulk_btn.config(state="disabled", text="Working...")
+        self.worker.submit("bulk", convert_file, src, dst, self.category_var.get(), self.from_var.get(),
+                           self.to_var.get(), column, self.job_engine("bulk"),
+                           on_done=self.bulk_done, on_error=self.bulk_failed)
+    
+    def bulk_done(self, count):
+        self.bulk_btn.config(state="normal", text="Bulk...")
+        messagebox.showinfo("Bulk Convert", f"Converted {count} values")
+    
+    def bulk_failed(self, error):
+        self.bulk_btn.config(state="normal", text="Bulk...")
+        if not isinstance(error, (CalculatorError, OSError, ValueError)):
+            raise error
+        messagebox.showerror("Bulk Convert", str(error))
     
     def convert_temperature(self, from_unit, to_unit, value):
-        if from_unit == to_unit:
-            return value
-        if from_unit == "Celsius":
-            if to_unit == "Fahrenheit":
-                return value * 9 / 5 + 32
-            elif to_unit == "Kelvin":
-                return value + 273.15
-        elif from_unit == "Fahrenheit":
-            if to_unit == "Celsius":
-                return (value - 32) * 5 / 9
-            elif to_unit == "Kelvin":
-                return (value - 32) * 5 / 9 + 273.15
-        elif from_unit == "Kelvin":
-            if to_unit == "Celsius":
-                return value - 273.15
-            elif to_unit == "Fahrenheit":
-                return (value - 273.15) * 9 / 5 + 32
-        return value
+        return self.engine.convert_temperature(from_unit, to_unit, value)
     
     # Graph methods
+    def plot_cache(self):
+        # Sampled tiles kept on disk between sessions
+        try:
+            from diskcache import DiskCache
+            cache = DiskCache()
+        except OSError as e:
+            # An unwritable cache directory only means every session starts cold
+            print(f"Plot cache disabled: {e}", file=sys.stderr)
+            return None
+        return cache
+    
     def plot_function(self):
         try:
-            expr = self.func_entry.get().strip()
-            if not expr:
+            # Several functions can be overlaid: "sin(x); cos(x)"
+            exprs = [e.strip() for e in self.func_entry.get().split(";") if e.strip()]
+            if not exprs:
                 raise ValueError("Enter a function")
             xmin = float(self.xmin_entry.get())
             xmax = float(self.xmax_entry.get())
             if xmin >= xmax:
                 raise ValueError("X min must be less than X max")
             
-            x = np.linspace(xmin, xmax, 400)
-            safe_dict = {"__builtins__": {}, "x": x, "np": np, "math": math, "sin": math.sin, "cos": math.cos, "tan": math.tan, "log": math.log, "exp": math.exp, "pi": math.pi}
-            y = eval(expr, safe_dict)
-            
-            for widget in self.canvas_frame.winfo_children():
-                widget.destroy()
-            
-            fig = Figure(figsize=(4, 2.5))
-            ax = fig.add_subplot(111)
-            ax.plot(x, y, linewidth=1.5)
-            ax.grid(True, alpha=0.3)
-            ax.set_title(f"y = {expr}", fontsize=10)
-            ax.set_xlabel("x", fontsize=8)
-            ax.set_ylabel("y", fontsize=8)
-            
-            canvas = FigureCanvasTkAgg(fig, master=self.canvas_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            from parallel import parse_values
+            params = parse_values(self.param_entry.get())
+            for expr in exprs:
+                compile_expression(expr, ("x", "a") if params else ("x",))
+            self.graph_exprs = exprs
+            self.graph_params = params
+            self.sample_graph(xmin, xmax)
             
         except Exception as e:
             messagebox.showerror("Plot Error", str(e))
+    
+    def sample_graph(self, xmin, xmax, ylim=None):
+        # Sampling runs on the worker; while zooming or panning only the newest
+        # range is drawn. Drawing itself stays on the Tk thread.
+        self.worker.submit("graph", self.compute_curves, list(self.graph_exprs), xmin, xmax, self.graph_params,
+                           on_done=lambda curves: self.update_graph(curves, xmin, xmax, ylim),
+                           on_error=lambda e: messagebox.showerror("Plot Error", str(e)))
+    
+    def compute_curves(self, exprs, xmin, xmax, params=()):
+        curves = []
+        if params:
+            # A family f(x, a): one evaluation per value of a on a fixed grid;
+            # big sweeps are spread over a process pool
+            import numpy as np
+            from parallel import sweep
+            x = np.linspace(xmin, xmax, SWEEP_POINTS)
+            for expr in exprs:
+                for a, y in zip(params, sweep(expr, x, params)):
+                    curves.append((f"{expr} (a={a:g})", x, y))
+            return curves
+        # Only tiles missing from the sample cache are evaluated
+        for expr in exprs:
+            x, y = self.graph_sampler.sample(expr, compile_expression(expr), xmin, xmax)
+            curves.append((expr, x, y))
+        return curves
+    
+    def ensure_graph_canvas(self):
+        # One Figure, one Axes and one canvas for the whole session
+        if self.graph_canvas is not None:
+            return
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        self.graph_figure = Figure(figsize=(4, 2.5))
+        self.graph_ax = self.graph_figure.add_subplot(111)
+        self.graph_ax.grid(True, alpha=0.3)
+        self.graph_ax.set_xlabel("x", fontsize=8)
+        self.graph_ax.set_ylabel("y", fontsize=8)
+        self.graph_canvas = FigureCanvasTkAgg(self.graph_figure, master=self.canvas_frame)
+        self.graph_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.graph_canvas.mpl_connect("draw_event", self.on_graph_draw)
+        self.graph_canvas.mpl_connect("scroll_event", self.on_graph_scroll)
+        self.graph_canvas.mpl_connect("button_press_event", self.on_graph_press)
+        self.graph_canvas.mpl_connect("motion_notify_event", self.on_graph_motion)
+        self.graph_canvas.mpl_connect("button_release_event", self.on_graph_release)
+        if self.profiler.enabled:
+            self.profiler.instrument(self.graph_canvas, ["draw"], "matplotlib.")
+    
+    def update_graph(self, curves, xmin, xmax, ylim=None):
+        self.ensure_graph_canvas()
+        self.remove_histogram()
+        ax = self.graph_ax
+        
+        # Reuse existing lines and only add or drop the difference
+        while len(self.graph_lines) > len(curves):
+            self.graph_lines.pop().remove()
+        for i, (expr, x, y) in enumerate(curves):
+            if i < len(self.graph_lines):
+                self.graph_lines[i].set_data(x, y)
+                self.graph_lines[i].set_label(expr)
+            else:
+                line, = ax.plot(x, y, linewidth=1.5, label=expr, animated=True)
+                self.graph_lines.append(line)
+        
+        if ylim is None:
+            import numpy as np
+            from sampling import y_limits
+            ylim = y_limits(np.concatenate([y for _, _, y in curves]))
+        layout = ((xmin, xmax), ylim, tuple(expr for expr, _, _ in curves))
+        if layout == self.graph_layout and self.graph_background is not None:
+            # Same axes as last time: blit the new lines over the saved background
+            self.graph_canvas.restore_region(self.graph_background)
+            self.draw_graph_lines()
+            self.graph_canvas.blit(ax.bbox)
+            self.schedule_analysis(xmin, xmax)
+            return
+        
+        self.graph_layout = layout
+        ax.set_xlim(xmin, xmax)
+        ax.set_ylim(*ylim)
+        ax.set_title("y = " + "; ".join(self.graph_exprs), fontsize=10)
+        if len(curves) > 1:
+            ax.legend(fontsize=7, loc="best")
+        elif ax.get_legend() is not None:
+            ax.get_legend().remove()
+        self.graph_canvas.draw_idle()
+        self.schedule_analysis(xmin, xmax)
+    
+    def on_graph_draw(self, event):
+        # Full redraws (resize, new limits) skip the animated lines: save the
+        # clean background for blitting, then draw the lines on top
+        self.graph_background = self.graph_canvas.copy_from_bbox(self.graph_ax.bbox)
+        self.draw_graph_lines()
+    
+    def draw_graph_lines(self):
+        for line in self.graph_lines:
+            self.graph_ax.draw_artist(line)
+        for marker in self.graph_markers.values():
+            self.graph_ax.draw_artist(marker)
+    
+    def redraw_graph_lines(self):
+        # Lines and markers only, over the saved background
+        if self.graph_background is None:
+            self.graph_canvas.draw_idle()
+            return
+        self.graph_canvas.restore_region(self.graph_background)
+        self.draw_graph_lines()
+        self.graph_canvas.blit(self.graph_ax.bbox)
+    
+    # Analysis
+    # Runs on the worker after every redraw while "Analyze" is on; only the
+    # newest range is marked.
+    def plot_derivative(self):
+        # Adds the derivative of the last function; press again for higher ones
+        exprs = [e.strip() for e in self.func_entry.get().split(";") if e.strip()]
+        if not exprs:
+            return
+        from analysis import derivative_text
+        try:
+            derived = derivative_text(exprs[-1])
+        except ValueError as e:
+            messagebox.showerror("Plot Error", str(e))
+            return
+        self.func_entry.delete(0, tk.END)
+        self.func_entry.insert(0, "; ".join(exprs + [derived]))
+        self.plot_function()
+    
+    def on_analyze_toggle(self):
+        if self.graph_canvas is None:
+            return
+        if self.analyze_var.get():
+            self.schedule_analysis(*self.graph_ax.get_xlim())
+        else:
+            self.worker.cancel("analysis")
+            self.show_analysis(None)
+    
+    def schedule_analysis(self, xmin, xmax):
+        if not self.analyze_var.get() or not self.graph_exprs:
+            return
+        if self.graph_params:
+            self.analysis_label.config(text="Analysis works on functions of x only, not families")
+            return
+        from analysis import analyze
+        self.worker.submit("analysis", analyze, list(self.graph_exprs), xmin, xmax,
+                           on_done=self.show_analysis,
+                           on_error=lambda e: self.analysis_label.config(text=f"Analysis failed: {e}"),
+                           delay=DEBOUNCE_MS)
+    
+    def show_analysis(self, result):
+        # result from analysis.analyze, or None to clear the markers
+        if not self.graph_markers:
+            for kind, marker, color in ANALYSIS_MARKERS:
+                self.graph_markers[kind], = self.graph_ax.plot([], [], linestyle="none", marker=marker, color=color,
+                                                              markersize=5, animated=True, label="_" + kind)
+        points = {kind: [] for kind, _, _ in ANALYSIS_MARKERS}
+        if result is not None:
+            points["roots"] = [(x, y) for _, x, y in result["roots"]]
+            for _, x, y, kind in result["extrema"]:
+                points[kind].append((x, y))
+            points["intersections"] = [(x, y) for _, _, x, y in result["intersections"]]
+        for kind, marker in self.graph_markers.items():
+            marker.set_data([p[0] for p in points[kind]], [p[1] for p in points[kind]])
+        self.analysis_label.config(text="" if result is None else self.analysis_summary(result))
+        self.redraw_graph_lines()
+    
+    def analysis_summary(self, result):
+        # x of each point: (expr, x, y), (expr, x, y, kind) and (expr1, expr2, x, y)
+        parts = []
+        for kind, column in (("roots", 1), ("extrema", 1), ("intersections", 2)):
+            xs = [entry[column] for entry in result[kind]]
+            if xs:
+                shown = ", ".join(f"{x:.6g}" for x in xs[:6]) + (", ..." if len(xs) > 6 else "")
+                parts.append(f"{len(xs)} {kind}: {shown}")
+        return "\n".join(parts) or "No roots, extrema or intersections in view"
+    
+    # Mouse navigation: wheel zooms around the cursor, left-drag pans
+    def set_graph_range(self, xmin, xmax):
+        self.xmin_entry.delete(0, tk.END)
+        self.xmin_entry.insert(0, f"{xmin:.6g}")
+        self.xmax_entry.delete(0, tk.END)
+        self.xmax_entry.insert(0, f"{xmax:.6g}")
+    
+    def on_graph_scroll(self, event):
+        if event.inaxes is not self.graph_ax or not self.graph_exprs:
+            return
+        factor = 0.8 if event.button == "up" else 1.25
+        xmin, xmax = self.graph_ax.get_xlim()
+        xmin = event.xdata - (event.xdata - xmin) * factor
+        xmax = event.xdata + (xmax - event.xdata) * factor
+        self.set_graph_range(xmin, xmax)
+        self.sample_graph(xmin, xmax)
+    
+    def on_graph_press(self, event):
+        if event.inaxes is self.graph_ax and event.button == 1 and self.graph_exprs:
+            self.graph_drag = (event.x, self.graph_ax.get_xlim(), self.graph_ax.get_ylim())
+    
+    def on_graph_motion(self, event):
+        if self.graph_drag is None or event.x is None:
+            return
+        start_x, (xmin, xmax), ylim = self.graph_drag
+        shift = (event.x - start_x) * (xmax - xmin) / self.graph_ax.bbox.width
+        # The y-range stays put while dragging so the view does not jump around
+        self.set_graph_range(xmin - shift, xmax - shift)
+        self.sample_graph(xmin - shift, xmax - shift, ylim)
+    
+    def on_graph_release(self, event):
+        self.graph_drag = None
+    
+    # History
+    # Every result is queued for the store's writer thread; nothing on the
+    # key path waits for SQLite.
+    def scientific_mode(self):
+        mode = "DEG" if self.deg else "RAD"
+        if self.engine.precision != "float":
+            mode += " " + self.engine.precision
+        return f"scientific {mode}"
+    
+    def history_store(self):
+        if self.history is None and not self.history_disabled:
+            try:
+                from history import HistoryStore
+                self.history = HistoryStore()
+            except (ImportError, OSError) as e:
+                # No sqlite3 or an unwritable data directory: keep calculating without history
+                print(f"History disabled: {e}", file=sys.stderr)
+                self.history_disabled = True
+        return self.history
+    
+    def record_history(self, mode, a, op=None, b=None, result=""):
+        store = self.history_store()
+        if store is not None:
+            store.record(mode, a, op, b, result)
+    
+    def build_history(self, parent):
+        search_frame = tk.Frame(parent)
+        search_frame.pack(fill="x", padx=3, pady=3)
+        tk.Label(search_frame, text="Search:", font=("Arial", 9)).pack(side="left")
+        self.history_entry = tk.Entry(search_frame, font=("Arial", 10))
+        self.history_entry.pack(side="left", fill="x", expand=True, padx=3)
+        self.history_entry.bind("<KeyRelease>", lambda event: self.search_history(delay=DEBOUNCE_MS))
+        tk.Button(search_frame, text="Clear", font=("Arial", 8), command=self.clear_history,
+                  bg="lightblue").pack(side="left")
+        
+        list_frame = tk.Frame(parent)
+        list_frame.pack(fill="both", expand=True, padx=3, pady=3)
+        scrollbar = tk.Scrollbar(list_frame)
+        scrollbar.pack(side="right", fill="y")
+        self.history_list = tk.Listbox(list_frame, font=("Courier", 10), yscrollcommand=scrollbar.set)
+        self.history_list.pack(side="left", fill="both", expand=True)
+        scrollbar.config(command=self.history_list.yview)
+        # Double-click or Enter puts the result back into its calculator
+        self.history_list.bind("<Double-Button-1>", self.recall_history)
+        self.history_list.bind("<Return>", self.recall_history)
+        self.history_status = tk.Label(parent, text="", font=("Arial", 8), anchor="w")
+        self.history_status.pack(fill="x", padx=3)
+        
+        parent.bind("<Map>", lambda event: self.search_history())
+        self.search_history()
+    
+    def search_history(self, delay=0):
+        store = self.history_store()
+        if store is None:
+            self.history_status.config(text="History is not available")
+            return
+        text = self.history_entry.get()
+        self.worker.submit("history", store.search, text, HISTORY_LIMIT,
+                           on_done=self.show_history, delay=delay)
+    
+    def show_history(self, entries):
+        from history import format_entry
+        self.history_entries = entries
+        self.history_list.delete(0, tk.END)
+        if entries:
+            self.history_list.insert(tk.END, *(f"{e['mode']:>16s}  {format_entry(e)}" for e in entries))
+        more = "+" if len(entries) == HISTORY_LIMIT else ""
+        self.history_status.config(text=f"{len(entries)}{more} entries")
+    
+    def recall_history(self, event=None):
+        selection = self.history_list.curselection()
+        if not selection:
+            return
+        entry = self.history_entries[selection[0]]
+        kind, _, base = entry["mode"].partition(" ")
+        if kind == "programmer":
+            self.ensure_tab(self.prog_frame)
+            try:
+                self.prog_value = self.engine.parse_int(entry["result"], base)
+            except CalculatorError as e:
+                messagebox.showerror("History", str(e))
+                return
+            self.prog_entering = False
+            self.update_prog_display()
+            self.notebook.select(self.prog_frame)
+        else:
+            self.current = entry["result"]
+            self.previous = ""
+            self.operator = ""
+            self.update_display()
+            self.notebook.select(self.calc_frame)
+    
+    def clear_history(self):
+        store = self.history_store()
+        if store is None or not messagebox.askyesno("History", "Delete all history?"):
+            return
+        self.worker.submit("history", store.clear, on_done=lambda result: self.search_history())
+    
+    def close_history(self):
+        if self.history is not None:
+            self.history.close()
+    
+    # Diagnostics
+    def toggle_profiling(self, event=None):
+        if self.profiler.enabled:
+            self.disable_profiling()
+        else:
+            self.enable_profiling()
+    
+    def enable_profiling(self):
+        self.profiler.instrument(self, PROFILED_GUI, "gui.")
+        self.profiler.instrument(self.engine, PROFILED_ENGINE, "engine.")
+        if getattr(self, "graph_canvas", None) is not None:
+            self.profiler.instrument(self.graph_canvas, ["draw"], "matplotlib.")
+        if self.diag_frame is None:
+            self.diag_frame = tk.Frame(self.notebook)
+            self.build_diagnostics(self.diag_frame)
+        self.notebook.add(self.diag_frame, text="Diagnostics")
+        self.refresh_diagnostics()
+    
+    def disable_profiling(self):
+        self.profiler.restore()
+        if self.diag_frame is not None:
+            self.notebook.hide(self.diag_frame)
+    
+    def build_diagnostics(self, parent):
+        button_frame = tk.Frame(parent)
+        button_frame.pack(fill="x", padx=3, pady=3)
+        tk.Button(button_frame, text="Reset", font=("Arial", 9), command=self.reset_diagnostics).pack(side="left")
+        tk.Button(button_frame, text="Export JSON...", font=("Arial", 9),
+                  command=self.export_diagnostics).pack(side="left", padx=3)
+        self.diag_text = tk.Text(parent, font=("Courier", 9), wrap="none")
+        self.diag_text.pack(fill="both", expand=True, padx=3, pady=3)
+    
+    def refresh_diagnostics(self):
+        # Redrawn once a second while profiling is on
+        if self.diag_after is not None:
+            self.root.after_cancel(self.diag_after)
+            self.diag_after = None
+        if not self.profiler.enabled:
+            return
+        self.diag_text.delete("1.0", tk.END)
+        self.diag_text.insert("1.0", self.profiler.report())
+        self.diag_after = self.root.after(1000, self.refresh_diagnostics)
+    
+    def reset_diagnostics(self):
+        self.profiler.reset()
+        self.diag_text.delete("1.0", tk.END)
+        self.diag_text.insert("1.0", self.profiler.report())
+    
+    def export_diagnostics(self):
+        path = filedialog.asksaveasfilename(title="Export diagnostics", defaultextension=".json",
+                                            filetypes=[("JSON files", "*.json")])
+        if not path:
+            return
+        try:
+            self.profiler.export(path)
+        except OSError as e:
+            messagebox.showerror("Export", str(e))
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = Calculator(root)
-    root.mainloop()
\ No newline at end of file
+    if "--profile" in sys.argv[1:]:
+        app.enable_profiling()
+    if "--startup-time" in sys.argv[1:]:
+        # Print the startup time and quit, for tracking regressions
+        def report():
+            print(f"startup: {app.startup_time * 1000:.0f} ms", file=sys.stderr)
+            root.destroy()
+        root.after_idle(report)
+    root.mainloop()
+    app.worker.shutdown()
+    app.close_history()
\ No newline at end of file
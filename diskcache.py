@@ -0,0 +1,175 @@
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from paths import cache_dir
+
+# Cache of sampled plot data that survives between sessions, kept under the
+# user's cache directory. Only plain arrays are stored: nothing read back from
+# disk is ever unpickled or executed. Compiled expressions are not kept, since
+# parsing and checking one again costs microseconds.
+#
+# Every entry is one file named by a hash of its key. Arrays are plain .npy
+# files and are returned memory-mapped, so a hit costs an open and a header
+# read, not a copy. Files are written to a temporary name and renamed into
+# place, so a crash or a second instance never leaves a half-written entry
+# behind, and anything that fails to load is dropped and treated as a miss.
+#
+# The directory is named after a fingerprint of the evaluator: the Python and
+# NumPy versions and the source of the modules that produce the entries. Any
+# change to them starts a fresh directory, so stale samples are never read
+# back. Other versions may be in use at the same time (two checkouts, an
+# upgrade while the old one is still open), so their directories are only
+# deleted once nothing has opened them for STALE_AFTER.
+#
+# Total size is capped; the least recently used files (by mtime, which a hit
+# refreshes) are deleted first.
+
+CACHE_VERSION = 1  # bump when the file layout changes
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+STALE_AFTER = 7 * 24 * 3600  # seconds since another version's directory was last opened
+# expression.py: the same text may compute different values after a change
+FINGERPRINT_MODULES = ("expression.py", "sampling.py", "diskcache.py")
+PREFIX = "v"
+
+
+def evaluator_version():
+    digest = hashlib.sha256(f"{CACHE_VERSION} {sys.version} {np.__version__}".encode())
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in FINGERPRINT_MODULES:
+        with open(os.path.join(here, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class DiskCache:
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, version=None):
+        root = path or os.path.join(cache_dir(), "compiled")
+        self.version = version or evaluator_version()
+        self.path = os.path.join(root, PREFIX + self.version)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.path, exist_ok=True)
+        # Marks this version's directory as in use
+        os.utime(self.path)
+        self._remove_stale(root)
+        # File name -> size, oldest first
+        files = [(e.stat().st_mtime, e.name, e.stat().st_size) for e in os.scandir(self.path) if e.is_file()]
+        self.files = OrderedDict((name, size) for _, name, size in sorted(files))
+        self.size = sum(self.files.values())
+
+    def _remove_stale(self, root):
+        cutoff = time.time() - STALE_AFTER
+        for entry in os.scandir(root):
+            if not (entry.is_dir() and entry.name.startswith(PREFIX)) or entry.path == self.path:
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError:
+                pass  # removed by another instance meanwhile
+
+    def __len__(self):
+        return len(self.files)
+
+    @staticmethod
+    def _name(key, suffix):
+        return hashlib.sha256(repr(key).encode()).hexdigest()[:32] + suffix
+
+    # Arrays
+    def get_array(self, key):
+        # The array stored under key, memory-mapped read-only, or None
+        name = self._name(key, ".npy")
+        if not self._touch(name):
+            return None
+        try:
+            return np.load(os.path.join(self.path, name), mmap_mode="r", allow_pickle=False)
+        except (OSError, ValueError):
+            self._drop(name)
+            return None
+
+    def put_array(self, key, array):
+        def write(f):
+            np.lib.format.write_array(f, np.ascontiguousarray(array), allow_pickle=False)
+        self._write(self._name(key, ".npy"), write)
+
+    # Bookkeeping
+    def _touch(self, name):
+        with self.lock:
+            if name not in self.files:
+                self.misses += 1
+                return False
+            self.files.move_to_end(name)
+            self.hits += 1
+        try:
+            os.utime(os.path.join(self.path, name))
+        except OSError:
+            self._drop(name)
+            return False
+        return True
+
+    def _write(self, name, write):
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, os.path.join(self.path, name))
+        except OSError:
+            # A full or read-only disk only costs the cache entry
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        with self.lock:
+            self.size += size - self.files.pop(name, 0)
+            self.files[name] = size
+            evicted = []
+            while self.size > self.max_bytes and len(self.files) > 1:
+                old, old_size = self.files.popitem(last=False)
+                self.size -= old_size
+                evicted.append(old)
+        for old in evicted:
+            try:
+                os.remove(os.path.join(self.path, old))
+            except OSError:
+                pass  # still mapped somewhere (Windows); the next session finds it again
+
+    def _drop(self, name):
+        with self.lock:
+            self.size -= self.files.pop(name, 0)
+        try:
+            os.remove(os.path.join(self.path, name))
+        except OSError:
+            pass
+
+    def clear(self):
+        with self.lock:
+            names = list(self.files)
+            self.files.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+        for name in names:
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"files": len(self.files), "bytes": self.size, "max_bytes": self.max_bytes, "hits": self.hits,
+                "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
@@ -0,0 +1,458 @@
+import math
+import re
+
+from cache import LRUCache
+from expression import ARRAY_FUNCTIONS, CONSTANTS, ExpressionError, compile_expression, scalar_functions
+from precision import DEFAULT_DIGITS, MODES, ModeError, make_mode
+from units import load_registry
+
+# Headless calculation engine. Nothing in here touches tkinter, so the same
+# arithmetic can run in batch jobs, services and benchmarks.
+
+BASES = {"DEC": 10, "HEX": 16, "OCT": 8, "BIN": 2}
+WORD_SIZES = [8, 16, 32, 64, 128]
+
+# "01010101" for every byte value, so bit strings are built a byte at a time
+BYTE_BITS = [format(i, "08b") for i in range(256)]
+
+OPERATORS = ['+', '-', '*', '/', '**']
+PROG_OPERATORS = ['+', '-', '*', '/', '%', '&', 'AND', '|', '^', 'XOR', '<<', '>>', '~']
+
+UNARY_FUNCTIONS = {
+    "log": math.log10,
+    "ln": math.log,
+    "exp": math.exp,
+    "sqrt": math.sqrt,
+    "square": lambda x: x * x,
+    "reciprocal": lambda x: 1 / x if x != 0 else 0,
+}
+
+TRIG_FUNCTIONS = {"sin": math.sin, "cos": math.cos, "tan": math.tan}
+INVERSE_TRIG_FUNCTIONS = {"asin": math.asin, "acos": math.acos, "atan": math.atan}
+
+# Button names that map onto a differently named precision-mode function
+PRECISION_NAMES = {"log": "log10"}
+
+FUNCTION_CACHE_SIZE = 1024
+
+
+class CalculatorError(Exception):
+    pass
+
+
+class DivisionByZero(CalculatorError):
+    pass
+
+
+class InvalidInput(CalculatorError):
+    pass
+
+
+class UnitError(CalculatorError):
+    pass
+
+
+ASSIGNMENT = re.compile(r"^\s*([A-Za-z_]\w*)\s*=(?!=)(.*)$")
+
+
+def parse_line(line):
+    # Plain-text form of one evaluation:
+    #   "1 + 2", "sin 30", "HEX FF & 0F", "100 Meter to Foot"
+    # Anything else is treated as an expression: "2*(3+4)^2", "r = 5", "pi*r^2"
+    tokens = line.split()
+    if not tokens:
+        raise InvalidInput("Empty expression")
+    if tokens[0] in BASES:
+        if len(tokens) == 3 and tokens[1] == '~':
+            return {"base": tokens[0], "op": '~', "a": tokens[2]}
+        if len(tokens) != 4:
+            raise InvalidInput(f"Expected '<base> <a> <op> <b>': {line.strip()}")
+        return {"base": tokens[0], "a": tokens[1], "op": tokens[2], "b": tokens[3]}
+    if len(tokens) == 2 and (tokens[0] in UNARY_FUNCTIONS or tokens[0] in TRIG_FUNCTIONS
+                             or tokens[0] in INVERSE_TRIG_FUNCTIONS):
+        return {"op": tokens[0], "a": tokens[1]}
+    if len(tokens) == 4 and tokens[2] == "to":
+        return {"op": "convert", "value": tokens[0], "from": tokens[1], "to": tokens[3]}
+    if len(tokens) == 3 and (tokens[1] in OPERATORS or tokens[1] == '^'):
+        return {"a": tokens[0], "op": '**' if tokens[1] == '^' else tokens[1], "b": tokens[2]}
+    return {"expr": line.strip()}
+
+
+def _is_nan(value):
+    # Decimals are asked rather than compared: comparing a signalling NaN raises
+    is_nan = getattr(value, "is_nan", None)
+    return is_nan() if is_nan is not None else value != value
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise InvalidInput(f"Not a number: {value!r}") from None
+
+
+class CalculatorEngine:
+    def __init__(self, deg=True, registry=None, word_size=32, signed=True,
+                 precision="float", digits=DEFAULT_DIGITS, cache_size=FUNCTION_CACHE_SIZE):
+        self.deg = deg
+        self.variables = {"ans": 0.0}
+        self.registry = registry or load_registry()
+        # Results of apply_unary/apply_trig/apply_inverse_trig, keyed by
+        # (function, input, angle mode, precision mode, digits in decimal mode)
+        self.function_cache = LRUCache(cache_size)
+        self.set_word_size(word_size, signed)
+        self.set_precision(precision, digits)
+
+    def snapshot(self):
+        # Same settings and unit registry, but its own cache and variables, so a
+        # worker thread can use it while this engine stays on the Tk thread
+        return CalculatorEngine(self.deg, self.registry, self.word_size, self.signed, self.precision, self.digits)
+
+    # Precision
+    # "float" keeps the plain float64 code below; "decimal" and "fraction" route
+    # the scientific operations through a precision.py number model instead.
+    def set_precision(self, mode="float", digits=DEFAULT_DIGITS):
+        if mode not in MODES:
+            raise InvalidInput(f"Unknown precision mode: {mode}")
+        if not isinstance(digits, int) or digits < 1:
+            raise InvalidInput(f"Invalid number of digits: {digits}")
+        self.precision = mode
+        self.digits = digits
+        self.numeric = make_mode(mode, digits)
+        # Stored variables follow the new number model; complex numbers and
+        # matrices have no equivalent outside the complex mode and are dropped
+        convert = float if self.numeric is None else self.numeric.parse
+        variables = {}
+        for name, value in self.variables.items():
+            try:
+                variables[name] = convert(value)
+            except (TypeError, ValueError):
+                pass
+        variables.setdefault("ans", convert(0))
+        self.variables = variables
+
+    def number(self, value):
+        # Parse one operand in the current precision mode
+        if self.numeric is None:
+            return to_float(value)
+        try:
+            return self.numeric.parse(value)
+        except ValueError:
+            raise InvalidInput(f"Not a number: {value!r}") from None
+
+    def constant(self, name):
+        if self.numeric is None:
+            return CONSTANTS[name]
+        return self.numeric.functions()[name]
+
+    def format_value(self, value):
+        # Display text for a scientific result; complex numbers and matrices
+        # have their own compact form
+        if self.precision == "complex":
+            return self.numeric.format(value)
+        return str(value)
+
+    def _precise(self, func, *args):
+        try:
+            with self.numeric.local():
+                return func(*args)
+        except ZeroDivisionError:
+            raise DivisionByZero("Division by zero!") from None
+        except ModeError as e:
+            raise InvalidInput(str(e)) from None
+        except (ValueError, ArithmeticError):
+            raise InvalidInput("Invalid input") from None
+
+    def _precise_function(self, name, val):
+        if name == "square":
+            return self._precise(self.numeric.binary, '*', val, val)
+        if name == "reciprocal":
+            return self._precise(self.numeric.binary, '/', 1, val) if val != 0 else self.number(0)
+        if val <= 0 and name in ("log", "ln"):
+            raise InvalidInput("Log of non-positive number")
+        try:
+            func = self.numeric.functions(self.deg)[PRECISION_NAMES.get(name, name)]
+        except KeyError:
+            raise InvalidInput(f"Unknown function: {name}") from None
+        return self._precise(func, val)
+
+    # Scientific
+    def calculate(self, previous, operator, current):
+        if self.numeric is not None:
+            if operator not in OPERATORS:
+                raise InvalidInput(f"Unknown operator: {operator}")
+            return self._precise(self.numeric.binary, operator, self.number(previous), self.number(current))
+        prev = to_float(previous)
+        curr = to_float(current)
+        try:
+            if operator == '+':
+                result = prev + curr
+            elif operator == '-':
+                result = prev - curr
+            elif operator == '*':
+                result = prev * curr
+            elif operator == '/':
+                if curr == 0:
+                    raise DivisionByZero("Division by zero!")
+                result = prev / curr
+            elif operator == '**':
+                result = prev ** curr
+            else:
+                raise InvalidInput(f"Unknown operator: {operator}")
+        except OverflowError:
+            raise InvalidInput("Result out of range") from None
+        except ZeroDivisionError:
+            raise DivisionByZero("Division by zero!") from None
+        if isinstance(result, complex):
+            raise InvalidInput("Result is not a real number")
+        return result
+
+    # Function cache
+    def cache_stats(self):
+        return self.function_cache.stats()
+
+    def clear_cache(self):
+        self.function_cache.clear()
+
+    def set_cache_size(self, size):
+        if not isinstance(size, int) or size < 0:
+            raise InvalidInput(f"Invalid cache size: {size}")
+        self.function_cache.resize(size)
+
+    def _cached(self, name, value, compute):
+        # Errors are not cached; they are cheap to hit again
+        val = self.number(value)
+        if self.precision == "complex":
+            # Arrays cannot be keys, and one NumPy call is as cheap as a lookup
+            return self._precise(self.numeric.unary, name, val, self.deg)
+        # Only the decimal mode depends on digits; NaN never equals itself, so
+        # it could never be hit and is not stored
+        digits = self.digits if self.precision == "decimal" else None
+        key = (name, val, self.deg, self.precision, digits)
+        cacheable = not _is_nan(val)
+        result = self.function_cache.get(key) if cacheable else None
+        if result is None:
+            if self.numeric is not None:
+                if not cacheable:
+                    raise InvalidInput("Invalid input")
+                result = self._precise_function(name, val)
+            else:
+                result = compute(name, val)
+            if cacheable:
+                self.function_cache.put(key, result)
+        return result
+
+    def apply_unary(self, name, value):
+        return self._cached(name, value, self._unary)
+
+    def apply_trig(self, name, value):
+        return self._cached(name, value, self._trig)
+
+    def apply_inverse_trig(self, name, value):
+        return self._cached(name, value, self._inverse_trig)
+
+    def _unary(self, name, val):
+        if val <= 0 and name in ("log", "ln"):
+            raise InvalidInput("Log of non-positive number")
+        try:
+            return UNARY_FUNCTIONS[name](val)
+        except KeyError:
+            raise InvalidInput(f"Unknown function: {name}") from None
+        except ZeroDivisionError:
+            raise DivisionByZero("Division by zero!") from None
+        except (ValueError, OverflowError):
+            raise InvalidInput("Invalid input") from None
+
+    def _trig(self, name, val):
+        if self.deg:
+            val = math.radians(val)
+        try:
+            return TRIG_FUNCTIONS[name](val)
+        except KeyError:
+            raise InvalidInput(f"Unknown function: {name}") from None
+        except ValueError:
+            raise InvalidInput("Invalid input for trig function") from None
+
+    def _inverse_trig(self, name, val):
+        try:
+            res = INVERSE_TRIG_FUNCTIONS[name](val)
+        except KeyError:
+            raise InvalidInput(f"Unknown function: {name}") from None
+        except ValueError:
+            raise InvalidInput("Invalid input for inverse trig function") from None
+        if self.deg:
+            res = math.degrees(res)
+        return res
+
+    def evaluate_expression(self, text):
+        # Full expressions with precedence, parentheses, functions and variables.
+        # "name = expr" stores a variable; every result is also kept in "ans".
+        name = None
+        arrays = self.precision == "complex"
+        match = ASSIGNMENT.match(text)
+        if match:
+            name, text = match.group(1), match.group(2)
+            if (name in CONSTANTS or name in scalar_functions()
+                    or arrays and (name == "i" or name in ARRAY_FUNCTIONS)):
+                raise InvalidInput(f"Cannot assign to {name}")
+        try:
+            expression = compile_expression(text, None, arrays)
+            if self.numeric is None:
+                result = expression.evaluate(self.variables, scalar_functions(self.deg))
+            else:
+                with self.numeric.local():
+                    result = expression.evaluate(self.variables, self.numeric.functions(self.deg))
+        except ExpressionError as e:
+            raise InvalidInput(str(e)) from None
+        except ZeroDivisionError:
+            raise DivisionByZero("Division by zero!") from None
+        except ModeError as e:
+            raise InvalidInput(str(e)) from None
+        except OverflowError:
+            raise InvalidInput("Result out of range") from None
+        except (ValueError, ArithmeticError, TypeError):
+            raise InvalidInput("Invalid calculation") from None
+        if isinstance(result, complex) and not arrays:
+            raise InvalidInput("Result is not a real number")
+        if name:
+            self.variables[name] = result
+        self.variables["ans"] = result
+        return result
+
+    def evaluate(self, record):
+        # One evaluation described by a dict (see parse_line); used by batch mode
+        op = record.get("op", "")
+        if record.get("expr"):
+            return self.evaluate_expression(record["expr"])
+        if op == "convert":
+            unit = record.get("from")
+            category = record.get("category") or self.find_category(unit)
+            return self.convert_units(record.get("value"), category, unit, record.get("to"))
+        if record.get("base"):
+            base = record["base"].upper()
+            return self.format_int(self.prog_calculate(record.get("a"), op, record.get("b"), base), base)
+        if op in TRIG_FUNCTIONS:
+            return self.apply_trig(op, record.get("a"))
+        if op in INVERSE_TRIG_FUNCTIONS:
+            return self.apply_inverse_trig(op, record.get("a"))
+        if op in UNARY_FUNCTIONS:
+            return self.apply_unary(op, record.get("a"))
+        return self.calculate(record.get("a"), op, record.get("b"))
+
+    # Programmer
+    # Values are plain Python ints wrapped to the current word size; they are
+    # only turned into text (in any base) when displayed.
+    def set_word_size(self, bits, signed=True):
+        if bits not in WORD_SIZES:
+            raise InvalidInput(f"Unsupported word size: {bits}")
+        self.word_size = bits
+        self.signed = signed
+        self.mask = (1 << bits) - 1
+
+    def wrap(self, value):
+        value &= self.mask
+        if self.signed and value >> (self.word_size - 1):
+            value -= 1 << self.word_size
+        return value
+
+    def parse_int(self, text, base="DEC"):
+        try:
+            return self.wrap(int(text, BASES[base]))
+        except KeyError:
+            raise InvalidInput(f"Unknown base: {base}") from None
+        except (TypeError, ValueError):
+            raise InvalidInput("Invalid number for current base") from None
+
+    def format_int(self, value, base="DEC"):
+        # DEC shows the signed/unsigned value, the other bases show the raw bits
+        if base == "DEC":
+            return str(self.wrap(value))
+        elif base == "HEX":
+            return format(value & self.mask, "X")
+        elif base == "OCT":
+            return format(value & self.mask, "o")
+        elif base == "BIN":
+            return format(value & self.mask, "b")
+        raise InvalidInput(f"Unknown base: {base}")
+
+    def bit_bytes(self, value):
+        # Most significant byte first
+        bits = value & self.mask
+        return [BYTE_BITS[(bits >> shift) & 0xFF] for shift in range(self.word_size - 8, -8, -8)]
+
+    def prog_operand(self, value, base="DEC"):
+        if isinstance(value, str):
+            return self.parse_int(value, base)
+        if isinstance(value, int):
+            return self.wrap(value)
+        if value is None:
+            raise InvalidInput("Missing operand")
+        raise InvalidInput(f"Not an integer: {value!r}")
+
+    def prog_calculate(self, previous, operator, current, base="DEC"):
+        # Operands may be ints or strings in `base`; the result is an int
+        prev = self.prog_operand(previous, base)
+        if operator == '~':
+            return self.wrap(~prev)
+        curr = self.prog_operand(current, base)
+
+        if operator == '+':
+            result = prev + curr
+        elif operator == '-':
+            result = prev - curr
+        elif operator == '*':
+            result = prev * curr
+        elif operator == '/':
+            if curr == 0:
+                raise DivisionByZero("Division by zero!")
+            result = prev // curr  # Integer division
+        elif operator == '%':
+            if curr == 0:
+                raise DivisionByZero("Division by zero!")
+            result = prev % curr
+        elif operator == '&' or operator == 'AND':
+            result = prev & curr
+        elif operator == '|':
+            result = prev | curr
+        elif operator == '^' or operator == 'XOR':
+            result = prev ^ curr
+        elif operator == '<<' or operator == '>>':
+            if curr < 0:
+                raise InvalidInput("Negative shift count")
+            # Shifting past the word clears it (or fills it with the sign bit)
+            curr = min(curr, self.word_size)
+            result = prev << curr if operator == '<<' else prev >> curr
+        else:
+            raise InvalidInput(f"Unknown operator: {operator}")
+        return self.wrap(result)
+
+    # Converter
+    def categories(self):
+        return list(self.registry.categories)
+
+    def units(self, category):
+        try:
+            return self.registry.units(category)
+        except KeyError:
+            raise UnitError(f"Unknown category: {category}") from None
+
+    def find_category(self, unit):
+        try:
+            return self.registry.find_category(unit)
+        except KeyError:
+            raise UnitError(f"Unknown unit: {unit}") from None
+
+    def conversion(self, category, from_unit, to_unit):
+        # (scale, offset) such that result = value * scale + offset; lets callers
+        # convert whole arrays with one multiply-add
+        try:
+            return self.registry.conversion(category, from_unit, to_unit)
+        except KeyError:
+            raise UnitError("Invalid unit") from None
+
+    def convert_units(self, value, category, from_unit, to_unit):
+        scale, offset = self.conversion(category, from_unit, to_unit)
+        return to_float(value) * scale + offset
+
+    def convert_temperature(self, from_unit, to_unit, value):
+        return self.convert_units(value, "Temperature", from_unit, to_unit)
@@ -0,0 +1,279 @@
+import ast
+import copy
+import math
+import re
+from functools import lru_cache
+
+# Functions allowed in expressions and the NumPy ufunc each one maps to when
+# an expression is evaluated over an array (graphing)
+NUMPY_FUNCTIONS = {
+    "sin": "sin", "cos": "cos", "tan": "tan",
+    "asin": "arcsin", "acos": "arccos", "atan": "arctan",
+    "arcsin": "arcsin", "arccos": "arccos", "arctan": "arctan",
+    "sinh": "sinh", "cosh": "cosh", "tanh": "tanh",
+    "exp": "exp", "log": "log", "ln": "log", "log10": "log10", "log2": "log2",
+    "sqrt": "sqrt", "abs": "abs", "fabs": "fabs",
+    "floor": "floor", "ceil": "ceil", "radians": "radians", "degrees": "degrees",
+}
+FUNCTIONS = frozenset(NUMPY_FUNCTIONS)
+
+# The same functions for one value at a time (scientific tab, batch mode)
+SCALAR_FUNCTIONS = {
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "asin": math.asin, "acos": math.acos, "atan": math.atan,
+    "arcsin": math.asin, "arccos": math.acos, "arctan": math.atan,
+    "sinh": math.sinh, "cosh": math.cosh, "tanh": math.tanh,
+    "exp": math.exp, "log": math.log, "ln": math.log, "log10": math.log10, "log2": math.log2,
+    "sqrt": math.sqrt, "abs": abs, "fabs": math.fabs,
+    # math.floor/ceil return ints, and an int "**" grows without bound
+    "floor": lambda v: float(math.floor(v)), "ceil": lambda v: float(math.ceil(v)),
+    "radians": math.radians, "degrees": math.degrees,
+}
+
+CONSTANTS = {"pi": math.pi, "e": math.e}
+
+# "np.sin(x)" and "math.sin(x)" still work, but only for whitelisted names
+MODULE_PREFIXES = ("np", "numpy", "math")
+
+BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.FloorDiv)
+UNARY_OPERATORS = (ast.UAdd, ast.USub)
+
+# Extra syntax for the complex/matrix mode (arrays=True): complex literals
+# ("3+4i" or "3+4j"), matrix literals ("[1, 2; 3, 4]" or "[[1, 2], [3, 4]]"),
+# "@" for the matrix product and these functions, by number of arguments
+ARRAY_FUNCTIONS = {
+    "det": 1, "inv": 1, "solve": 2, "transpose": 1, "trace": 1, "norm": 1, "eig": 1, "rank": 1,
+    "dot": 2, "cross": 2, "conj": 1, "real": 1, "imag": 1, "arg": 1, "eye": 1,
+}
+IMAGINARY = re.compile(r"(?<![\w.])((?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)i\b")
+MATRIX_ROWS = re.compile(r"\[([^\[\]]*;[^\[\]]*)\]")
+
+# Everything that walks the tree (checking, compiling, derivatives) recurses,
+# so input is bounded before any of it runs
+MAX_LENGTH = 4096  # characters
+MAX_DEPTH = 100  # levels of nested operations and calls
+
+_vector_functions = None
+_degree_functions = None
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+def vector_functions():
+    # NumPy is only imported the first time something is evaluated over an array
+    global _vector_functions
+    if _vector_functions is None:
+        import numpy as np
+        _vector_functions = {name: getattr(np, ufunc) for name, ufunc in NUMPY_FUNCTIONS.items()}
+    return _vector_functions
+
+
+def scalar_functions(deg=False):
+    # In degree mode the trig functions take degrees and the inverse ones return degrees
+    global _degree_functions
+    if not deg:
+        return SCALAR_FUNCTIONS
+    if _degree_functions is None:
+        functions = dict(SCALAR_FUNCTIONS)
+        for name in ("sin", "cos", "tan"):
+            functions[name] = lambda v, f=SCALAR_FUNCTIONS[name]: f(math.radians(v))
+        for name in ("asin", "acos", "atan", "arcsin", "arccos", "arctan"):
+            functions[name] = lambda v, f=SCALAR_FUNCTIONS[name]: math.degrees(f(v))
+        _degree_functions = functions
+    return _degree_functions
+
+
+class CompiledExpression:
+    # Parsed and compiled once; evaluate() and __call__ only run the code object.
+    # The tree keeps integer literals as typed (derivatives, decimal/fraction
+    # literals); the code object works on floats, so "10**10**8" overflows at
+    # once instead of growing a bignum without end.
+    def __init__(self, text, tree, variables, source=None):
+        self.text = text
+        self.tree = tree
+        self.variables = variables
+        self.source = source or text
+        self._code = None
+        self._literal_code = None
+        self.namespaces = {}
+
+    @property
+    def code(self):
+        if self._code is None:
+            self._code = compile(_Floats().visit(copy.deepcopy(self.tree)), "<expression>", "eval")
+        return self._code
+
+    @property
+    def literal_code(self):
+        # For the decimal/fraction modes: every number goes through __num__ with
+        # the digits exactly as typed, and "**" through __power__
+        if self._literal_code is None:
+            tree = _Literals(self.source).visit(copy.deepcopy(self.tree))
+            self._literal_code = compile(ast.fix_missing_locations(tree), "<expression>", "eval")
+        return self._literal_code
+
+    def namespace(self, functions):
+        # A function table may override the constants (precision modes bring their own pi)
+        entry = self.namespaces.get(id(functions))
+        if entry is None or entry[0] is not functions:
+            namespace = {"__builtins__": {}}
+            namespace.update(CONSTANTS)
+            namespace.update(functions)
+            entry = self.namespaces[id(functions)] = (functions, namespace)
+        return entry[1]
+
+    def evaluate(self, variables=None, functions=SCALAR_FUNCTIONS):
+        namespace = dict(self.namespace(functions))
+        if variables:
+            namespace.update(variables)
+        code = self.literal_code if "__num__" in functions else self.code
+        try:
+            return eval(code, namespace)
+        except NameError as e:
+            raise ExpressionError(f"Unknown variable: {e.name}") from None
+
+    def __call__(self, x, **params):
+        # Extra variables (e.g. a=2.0 for a parameter sweep) are passed by name
+        import numpy as np
+        x = np.asarray(x, dtype=float)
+        namespace = dict(self.namespace(vector_functions()))
+        namespace.update(params)
+        namespace["x"] = x
+        with np.errstate(all="ignore"):
+            y = eval(self.code, namespace)
+        # Constant functions such as "2" come back as scalars
+        return np.broadcast_to(np.asarray(y, dtype=float), x.shape)
+
+
+class _Rewriter(ast.NodeTransformer):
+    # Checks every node against the whitelist and turns "np.sin" into "sin"
+
+    def __init__(self, variables, arrays=False):
+        # variables=None accepts any free name as a variable
+        self.variables = variables
+        self.arrays = arrays
+        self.functions = dict.fromkeys(FUNCTIONS, 1)
+        self.syntax = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Constant,
+                       ast.Attribute, ast.Load) + BINARY_OPERATORS + UNARY_OPERATORS
+        if arrays:
+            self.functions.update(ARRAY_FUNCTIONS)
+            self.syntax += (ast.List, ast.MatMult)
+        self.names = set()
+
+    def generic_visit(self, node):
+        if not isinstance(node, self.syntax):
+            raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+        return super().generic_visit(node)
+
+    def visit_Constant(self, node):
+        numbers = (int, float, complex) if self.arrays else (int, float)
+        if isinstance(node.value, bool) or not isinstance(node.value, numbers):
+            raise ExpressionError(f"Unsupported constant: {node.value!r}")
+        return node
+
+    def visit_List(self, node):
+        # A matrix literal becomes one __array__([...]) call; nested rows stay lists
+        if not self.arrays:
+            return self.generic_visit(node)
+        return ast.Call(func=ast.Name(id="__array__", ctx=ast.Load()), args=[self._rows(node)], keywords=[])
+
+    def _rows(self, node):
+        if not node.elts:
+            raise ExpressionError("Empty matrix")
+        node.elts = [self._rows(e) if isinstance(e, ast.List) else self.visit(e) for e in node.elts]
+        return node
+
+    def visit_Name(self, node):
+        if node.id in CONSTANTS:
+            return node
+        if node.id in self.functions or self.variables is not None and node.id not in self.variables:
+            raise ExpressionError(f"Unknown name: {node.id}")
+        self.names.add(node.id)
+        return node
+
+    def visit_Attribute(self, node, allowed=CONSTANTS):
+        if (not isinstance(node.value, ast.Name) or node.value.id not in MODULE_PREFIXES
+                or node.attr not in allowed):
+            raise ExpressionError(f"Unsupported name: {ast.unparse(node)}")
+        return ast.copy_location(ast.Name(id=node.attr, ctx=ast.Load()), node)
+
+    def visit_Call(self, node):
+        if node.keywords:
+            raise ExpressionError("Keyword arguments are not supported")
+        func = node.func
+        if isinstance(func, ast.Attribute):
+            func = self.visit_Attribute(func, FUNCTIONS)
+        if not isinstance(func, ast.Name) or func.id not in self.functions:
+            raise ExpressionError(f"Unknown function: {ast.unparse(node.func)}")
+        arity = self.functions[func.id]
+        if len(node.args) != arity:
+            count = "one argument" if arity == 1 else f"{arity} arguments"
+            raise ExpressionError(f"{func.id}() takes exactly {count}")
+        node.func = func
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+
+class _Literals(ast.NodeTransformer):
+    def __init__(self, source):
+        self.source = source
+
+    def visit_Constant(self, node):
+        text = ast.get_source_segment(self.source, node) or repr(node.value)
+        return ast.Call(func=ast.Name(id="__num__", ctx=ast.Load()), args=[ast.Constant(text)], keywords=[])
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Pow):
+            return ast.Call(func=ast.Name(id="__power__", ctx=ast.Load()),
+                            args=[node.left, node.right], keywords=[])
+        return node
+
+
+class _Floats(ast.NodeTransformer):
+    def visit_Constant(self, node):
+        if type(node.value) is int:
+            try:
+                node.value = float(node.value)
+            except OverflowError:
+                raise ExpressionError("Number out of range") from None
+        return node
+
+
+def _depth(tree):
+    # Nesting depth of an AST, measured without recursion
+    deepest = 0
+    stack = [(tree, 1)]
+    while stack:
+        node, depth = stack.pop()
+        deepest = max(deepest, depth)
+        stack.extend((child, depth + 1) for child in ast.iter_child_nodes(node))
+    return deepest
+
+
+@lru_cache(maxsize=256)
+def compile_expression(text, variables=("x",), arrays=False):
+    # Parse, check and compile once; the same text always returns the same object.
+    # arrays=True also accepts the complex/matrix syntax (see ARRAY_FUNCTIONS).
+    text = text.strip()
+    if not text:
+        raise ExpressionError("Enter a function")
+    if len(text) > MAX_LENGTH:
+        raise ExpressionError(f"Expression longer than {MAX_LENGTH} characters")
+    source = text.replace("^", "**")
+    if arrays:
+        source = IMAGINARY.sub(r"\1j", source)
+        source = MATRIX_ROWS.sub(lambda m: "[[" + m.group(1).replace(";", "], [") + "]]", source)
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression: {e.msg}") from None
+    except (RecursionError, MemoryError):
+        raise ExpressionError("Expression is nested too deeply") from None
+    if _depth(tree) > MAX_DEPTH:
+        raise ExpressionError("Expression is nested too deeply")
+    rewriter = _Rewriter(variables, arrays)
+    tree = ast.fix_missing_locations(rewriter.visit(tree))
+    return CompiledExpression(text, tree, tuple(sorted(rewriter.names)), source)
@@ -0,0 +1,185 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from paths import data_dir
+
+# Persistent calculation history in SQLite.
+#
+# record() only puts a tuple on a queue, so the calculator never waits for the
+# disk. A writer thread commits whatever has queued up in one transaction:
+# at most BATCH_SIZE entries, or whatever arrived within FLUSH_INTERVAL.
+# Searches use an FTS5 trigram index, so any substring of three or more
+# characters ("3.14", "sin", "FF &") is found without scanning the table.
+
+BATCH_SIZE = 256
+FLUSH_INTERVAL = 0.5  # seconds
+DEFAULT_LIMIT = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    mode TEXT NOT NULL,
+    a TEXT,
+    op TEXT,
+    b TEXT,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_mode ON entries (mode, id);
+"""
+
+# Text that is indexed and shown for an entry
+ENTRY_TEXT = ("CASE WHEN b IS NOT NULL THEN a || ' ' || op || ' ' || b "
+              "WHEN op IS NOT NULL THEN op || '(' || a || ')' ELSE a END || ' = ' || result")
+
+_CLOSE = object()
+
+
+def format_entry(entry):
+    if entry["b"] is not None:
+        return f"{entry['a']} {entry['op']} {entry['b']} = {entry['result']}"
+    if entry["op"] is not None:
+        return f"{entry['op']}({entry['a']}) = {entry['result']}"
+    return f"{entry['a']} = {entry['result']}"
+
+
+class HistoryStore:
+    def __init__(self, path=None, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path or os.path.join(data_dir(), "history.sqlite3")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.SimpleQueue()
+
+        # Writes go through the writer thread's own connection; this one is
+        # for reads, which may come from any thread but never two at once
+        try:
+            self.conn = self._connect(check_same_thread=False)
+            self.conn.executescript(SCHEMA)
+            self.fts = self._create_index(self.conn)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            raise OSError(f"Cannot open history {self.path}: {e}") from e
+        self.lock = threading.Lock()
+
+        self.writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def _connect(self, **kwargs):
+        conn = sqlite3.connect(self.path, timeout=10, **kwargs)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _create_index(conn):
+        # Trigram FTS needs SQLite 3.34+; without it search falls back to LIKE
+        try:
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts "
+                         "USING fts5(text, content='', tokenize='trigram')")
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    # Writing
+    def record(self, mode, a, op=None, b=None, result=""):
+        self.queue.put((time.time(), mode, _text(a), _text(op), _text(b), str(result)))
+
+    def flush(self, timeout=None):
+        # Wait until everything recorded so far is committed
+        if not self.writer.is_alive():
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        if self.writer.is_alive():
+            self.queue.put(_CLOSE)
+            self.writer.join()
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+        atexit.unregister(self.close)
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                batch, waiters, closing = [], [], False
+                item = self.queue.get()
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is _CLOSE:
+                        closing = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+                    if closing or waiters or len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if batch:
+                    self._write(conn, batch)
+                for waiter in waiters:
+                    waiter.set()
+                if closing:
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn, batch):
+        with conn:
+            last = conn.execute("SELECT coalesce(max(id), 0) FROM entries").fetchone()[0]
+            conn.executemany("INSERT INTO entries (ts, mode, a, op, b, result) VALUES (?, ?, ?, ?, ?, ?)", batch)
+            if self.fts:
+                conn.execute(f"INSERT INTO entries_fts (rowid, text) SELECT id, {ENTRY_TEXT} "
+                             "FROM entries WHERE id > ?", (last,))
+
+    # Reading
+    def search(self, text="", limit=DEFAULT_LIMIT, mode=None):
+        # Newest first. Empty text lists the most recent entries.
+        self.flush()
+        text = text.strip()
+        where, params = [], []
+        if text and self.fts and len(text) >= 3:
+            where.append("id IN (SELECT rowid FROM entries_fts WHERE entries_fts MATCH ?)")
+            params.append('"' + text.replace('"', '""') + '"')
+        elif text:
+            where.append(f"{ENTRY_TEXT} LIKE ? ESCAPE '\\'")
+            params.append("%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if mode:
+            where.append("mode = ?")
+            params.append(mode)
+        sql = "SELECT * FROM entries"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def count(self):
+        self.flush()
+        with self.lock:
+            return self.conn.execute("SELECT count(*) FROM entries").fetchone()[0]
+
+    def clear(self):
+        self.flush()
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM entries")
+            if self.fts:
+                self.conn.execute("INSERT INTO entries_fts (entries_fts) VALUES ('delete-all')")
+
+
+def _text(value):
+    return None if value is None else str(value)
@@ -0,0 +1,127 @@
+import json
+import math
+import threading
+import time
+
+# Optional latency instrumentation. A Profiler wraps chosen methods on an
+# instance with a timing shim; disabling it deletes the shims again so the
+# class methods are used directly and nothing is left on the hot path.
+#
+# Latencies go into log2 histograms: bucket k counts calls that took
+# [2^(k-1), 2^k) microseconds, which keeps memory fixed however many calls
+# are recorded.
+#
+# Timed methods may run on worker threads, so recording and reading the
+# histograms go through a lock.
+
+BUCKETS = 32
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, seconds):
+        micros = seconds * 1e6
+        bucket = min(BUCKETS - 1, max(0, math.frexp(micros)[1]))
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        # Upper edge of the bucket holding the q-th percentile, in seconds
+        if not self.count:
+            return 0.0
+        target = q / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self.max, 2.0 ** bucket / 1e6)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1e3,
+            "mean_ms": self.total / self.count * 1e3 if self.count else 0.0,
+            "min_ms": self.min * 1e3 if self.count else 0.0,
+            "p50_ms": self.percentile(50) * 1e3,
+            "p95_ms": self.percentile(95) * 1e3,
+            "max_ms": self.max * 1e3,
+            # {upper edge in microseconds: calls}
+            "buckets_us": {2 ** k: n for k, n in enumerate(self.counts) if n},
+        }
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.histograms = {}
+        self.wrapped = []  # (object, attribute) pairs to restore
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    def instrument(self, obj, names, prefix=""):
+        # Shadow each method with a timed wrapper stored on the instance
+        for name in names:
+            if (obj, name) in self.wrapped or name in vars(obj):
+                continue
+            setattr(obj, name, self._timed(prefix + name, getattr(obj, name)))
+            self.wrapped.append((obj, name))
+        self.enabled = True
+
+    def _timed(self, key, method):
+        record = self.record
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(key, perf_counter() - start)
+        return timed
+
+    def restore(self):
+        for obj, name in self.wrapped:
+            delattr(obj, name)
+        self.wrapped = []
+        self.enabled = False
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+
+    def summaries(self):
+        # {name: Histogram.to_dict()}, taken under the lock
+        with self.lock:
+            return {name: h.to_dict() for name, h in self.histograms.items()}
+
+    def to_dict(self):
+        return dict(sorted(self.summaries().items()))
+
+    def export(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write("\n")
+
+    def report(self):
+        # Plain-text table, slowest total first
+        lines = [f"{'operation':32s} {'count':>7s} {'mean ms':>9s} {'p50 ms':>9s} {'p95 ms':>9s} {'max ms':>9s}"]
+        for name, d in sorted(self.summaries().items(), key=lambda item: -item[1]["total_ms"]):
+            lines.append(f"{name:32s} {d['count']:7d} {d['mean_ms']:9.3f} {d['p50_ms']:9.3f} "
+                         f"{d['p95_ms']:9.3f} {d['max_ms']:9.3f}")
+        return "\n".join(lines)
@@ -0,0 +1,182 @@
+import sys
+from contextlib import contextmanager
+from decimal import Decimal
+from fractions import Fraction
+
+import numpy as np
+
+from expression import ExpressionError, compile_expression
+from precision import DEFAULT_DIGITS, INVERSE_TRIG, TRIG, ModeError
+
+# Complex/matrix number model for the scientific engine. Values are Python
+# floats and complex numbers or NumPy arrays, so
+#
+#   sqrt(-4)                   2i
+#   (1+2i) * (3-i)             5+5i
+#   A = [4, -2; 1, 1]          [[4, -2], [1, 1]]
+#   det(A), inv(A), eig(A)     6, [[0.16666666666666666, 0.3333333333333333], ...], [3, 2]
+#   solve(A, [2, 3])           [1.3333333333333333, 1.6666666666666667]
+#   A @ A, A * A, sin(A)       matrix product, element-wise product, element-wise sine
+#
+# Every operator and function is a single NumPy call on the whole array: "@"
+# is matmul and det/inv/solve/eig go to LAPACK, so large matrices never pass
+# through a Python loop. Element-wise functions that leave the reals (sqrt,
+# log, asin, ...) switch to complex results instead of failing.
+#
+# Results are shown as text that parses back to the same value, except that
+# arrays of more than DISPLAY_ITEMS elements are abbreviated with "..."; the
+# scientific tab chains on the value it keeps, not on the display text.
+
+DISPLAY_ITEMS = 100  # arrays with more elements are summarized with "..."
+EDGE_ITEMS = 3
+MAX_ELEMENTS = 10 ** 7  # largest matrix eye() builds (80 MB of float64)
+
+
+def _array(rows):
+    # Matrix literals; integer entries become floats so inv() and "/" behave
+    array = np.array(rows)
+    if array.dtype.kind in "iub":
+        array = array.astype(float)
+    return array
+
+
+def _eye(n):
+    n = int(n)
+    if n * n > MAX_ELEMENTS:
+        raise ValueError(f"Matrix too large: eye({n})")
+    return np.eye(n)
+
+
+def _number(x):
+    # Shortest text for a float: "5" rather than "5.0"
+    text = repr(float(x))
+    return text[:-2] if text.endswith(".0") else text
+
+
+def _complex(z):
+    # "3-4i", "2i", "1+i"
+    if z.imag == 0:
+        return _number(z.real)
+    imag = "" if abs(z.imag) == 1 else _number(abs(z.imag))
+    sign = "-" if z.imag < 0 else "+"
+    if z.real == 0:
+        return f"{'-' if sign == '-' else ''}{imag}i"
+    return f"{_number(z.real)}{sign}{imag}i"
+
+
+class ComplexMode:
+    name = "complex"
+
+    def __init__(self, digits=DEFAULT_DIGITS):
+        # Values are float64/complex128; digits is kept for the engine's sake
+        self.digits = digits
+        self.tables = {}
+
+    @contextmanager
+    def local(self):
+        # Division by zero inside an array gives inf as elsewhere in NumPy, and
+        # NumPy's own errors (singular matrix, shape mismatch) keep their message
+        with np.errstate(all="ignore"):
+            try:
+                yield
+            except ExpressionError:
+                raise
+            except ValueError as e:
+                raise ModeError(str(e).strip()) from None
+            except MemoryError:
+                raise ModeError("Not enough memory for the result") from None
+
+    def parse(self, value):
+        if isinstance(value, (np.ndarray, np.generic, complex, float, int)):
+            return value
+        if isinstance(value, (Decimal, Fraction)):
+            return float(value)
+        text = str(value).strip()
+        try:
+            return float(text)
+        except ValueError:
+            pass
+        try:
+            return complex(text.replace("i", "j").replace(" ", ""))
+        except ValueError:
+            pass
+        # Matrix literals, including anything format() produced
+        try:
+            with self.local():
+                return compile_expression(text, ("i",), True).evaluate(None, self.functions())
+        except (ValueError, ArithmeticError, TypeError):
+            raise ValueError(f"Not a number: {value!r}") from None
+
+    def binary(self, op, a, b):
+        if op == '+':
+            return a + b
+        elif op == '-':
+            return a - b
+        elif op == '*':
+            return a * b
+        elif op == '/':
+            if np.ndim(b) == 0 and b == 0:
+                raise ZeroDivisionError
+            return a / b
+        elif op == '**':
+            return self.power(a, b)
+        raise ValueError(f"Unknown operator: {op}")
+
+    def power(self, a, b):
+        # A negative base with a fractional exponent has a complex result
+        if np.isrealobj(a) and np.isrealobj(b) and np.any(np.asarray(a) < 0) and np.any(np.mod(b, 1) != 0):
+            a = np.asarray(a, dtype=complex)
+        return np.power(a, b) if isinstance(a, np.ndarray) or isinstance(b, np.ndarray) else a ** b
+
+    def unary(self, name, val, deg=False):
+        # The function buttons of the scientific tab, element-wise on arrays
+        if name == "square":
+            return self.binary('*', val, val)
+        if name == "reciprocal":
+            return self.binary('/', 1, val) if np.ndim(val) or val != 0 else 0.0
+        try:
+            func = self.functions(deg)["log10" if name == "log" else name]
+        except KeyError:
+            raise ValueError(f"Unknown function: {name}") from None
+        return func(val)
+
+    def functions(self, deg=False):
+        table = self.tables.get(deg)
+        if table is not None:
+            return table
+        emath = np.emath
+        table = {
+            "sin": np.sin, "cos": np.cos, "tan": np.tan,
+            "asin": emath.arcsin, "acos": emath.arccos, "atan": np.arctan,
+            "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+            "exp": np.exp, "log": emath.log, "ln": emath.log, "log10": emath.log10, "log2": emath.log2,
+            "sqrt": emath.sqrt, "abs": np.abs, "fabs": np.abs,
+            "floor": np.floor, "ceil": np.ceil, "radians": np.radians, "degrees": np.degrees,
+            # Linear algebra and complex parts
+            "det": np.linalg.det, "inv": np.linalg.inv, "solve": np.linalg.solve,
+            "transpose": np.transpose, "trace": np.trace, "norm": np.linalg.norm,
+            "eig": np.linalg.eigvals, "rank": np.linalg.matrix_rank, "dot": np.dot, "cross": np.cross,
+            "conj": np.conj, "real": np.real, "imag": np.imag, "arg": np.angle,
+            "eye": _eye,
+        }
+        table["arcsin"], table["arccos"], table["arctan"] = table["asin"], table["acos"], table["atan"]
+        if deg:
+            for name in TRIG:
+                table[name] = lambda x, f=table[name]: f(np.multiply(x, np.pi / 180))
+            for name in INVERSE_TRIG:
+                table[name] = lambda x, f=table[name]: np.multiply(f(x), 180 / np.pi)
+            table["arg"] = lambda z: np.degrees(np.angle(z))
+        table.update({"pi": np.pi, "e": np.e, "i": 1j, "__array__": _array})
+        self.tables[deg] = table
+        return table
+
+    def format(self, value):
+        # One line: "3-4i", "[[1, 2], [3, 4]]", "[0, 1, 2, ..., 997, 998, 999]"
+        if isinstance(value, np.ndarray) and value.ndim:
+            if np.iscomplexobj(value) and not value.imag.any():
+                value = value.real
+            text = np.array2string(value, separator=", ", threshold=DISPLAY_ITEMS, edgeitems=EDGE_ITEMS,
+                                   max_line_width=sys.maxsize,
+                                   formatter={"float_kind": _number, "complex_kind": _complex, "int_kind": str})
+            return " ".join(text.split())
+        return _complex(complex(value))
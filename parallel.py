@@ -0,0 +1,152 @@
+import math
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from expression import compile_expression
+
+# Multi-core evaluation of an expression over a large x array, or over an
+# x array for every value of a parameter (a family of curves f(x, a)).
+#
+# x and the result live in shared memory: workers attach to both, write their
+# block of the result in place and return only a count, so nothing large is
+# pickled. Jobs smaller than PARALLEL_THRESHOLD points are evaluated in this
+# process, where one vectorized NumPy call beats any pool round trip.
+
+PARALLEL_THRESHOLD = 500_000  # points
+MIN_BLOCK = 50_000  # points per task
+TASKS_PER_WORKER = 4
+
+_pool = None
+_pool_workers = 0
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def evaluate(text, x, workers=None, threshold=PARALLEL_THRESHOLD):
+    # y = f(x) for a 1-D x
+    x = np.ascontiguousarray(x, dtype=float)
+    return _run(text, ("x",), x, None, None, workers, threshold)
+
+
+def sweep(text, x, values, param="a", workers=None, threshold=PARALLEL_THRESHOLD):
+    # One row of f(x, param) per value: shape (len(values), len(x))
+    x = np.ascontiguousarray(x, dtype=float)
+    values = [float(v) for v in values]
+    return _run(text, ("x", param), x, param, values, workers, threshold)
+
+
+def parse_values(text):
+    # "1:5:9" is nine evenly spaced values from 1 to 5; "1, 2, 4" is a list
+    text = text.strip()
+    if not text:
+        return []
+    if ":" in text:
+        parts = text.split(":")
+        if len(parts) != 3:
+            raise ValueError("Expected start:stop:count")
+        start, stop, count = float(parts[0]), float(parts[1]), int(parts[2])
+        if count < 1:
+            raise ValueError("Count must be at least 1")
+        return list(np.linspace(start, stop, count))
+    return [float(v) for v in text.split(",") if v.strip()]
+
+
+def _run(text, variables, x, param, values, workers, threshold):
+    func = compile_expression(text, variables)  # raises ExpressionError before any work starts
+    rows = 1 if values is None else len(values)
+    workers = workers or default_workers()
+    if workers <= 1 or rows * x.size < threshold:
+        if values is None:
+            return np.array(func(x))
+        y = np.empty((rows, x.size))
+        for row, value in enumerate(values):
+            y[row] = func(x, **{param: value})
+        return y
+
+    shape = x.shape if values is None else (rows, x.size)
+    x_shared, x_shm = _shared_array(x.shape)
+    x_shared[:] = x
+    y, y_shm = _shared_array(shape)
+    try:
+        pool = _get_pool(workers)
+        futures = [pool.submit(_evaluate_block, text, variables, x_shm.name, x.size, y_shm.name, shape,
+                               param, block_rows, block_values, start, stop)
+                   for block_rows, block_values, start, stop in _blocks(x.size, values, workers)]
+        for future in futures:
+            future.result()
+    finally:
+        # The memory stays mapped for `y`; only the names are removed
+        x_shm.unlink()
+        y_shm.unlink()
+    return y
+
+
+def _blocks(n, values, workers):
+    # (row range, parameter values, x start, x stop) per task
+    rows = 1 if values is None else len(values)
+    target = max(MIN_BLOCK, math.ceil(rows * n / (workers * TASKS_PER_WORKER)))
+    if n >= target:
+        for row in range(rows):
+            for start in range(0, n, target):
+                yield (row, row + 1), None if values is None else values[row:row + 1], start, min(n, start + target)
+    else:
+        step = max(1, target // max(n, 1))
+        for row in range(0, rows, step):
+            yield (row, min(rows, row + step)), None if values is None else values[row:row + step], 0, n
+
+
+def _shared_array(shape):
+    size = int(np.prod(shape)) * 8
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    array = np.ndarray(shape, dtype=float, buffer=shm.buf)
+    # Closed once the array (and every view of it) is gone
+    weakref.finalize(array, _close, shm)
+    return array, shm
+
+
+def _close(shm):
+    try:
+        shm.close()
+    except BufferError:
+        pass
+
+
+def _evaluate_block(text, variables, x_name, n, y_name, shape, param, rows, values, start, stop):
+    # Pool workers share the parent's resource tracker, which unlinks the
+    # segments if the parent dies before it does
+    x_shm = shared_memory.SharedMemory(name=x_name)
+    y_shm = shared_memory.SharedMemory(name=y_name)
+    try:
+        x = np.ndarray((n,), dtype=float, buffer=x_shm.buf)
+        y = np.ndarray(shape, dtype=float, buffer=y_shm.buf)
+        func = compile_expression(text, variables)
+        if values is None:
+            y[start:stop] = func(x[start:stop])
+        else:
+            for row, value in zip(range(*rows), values):
+                y[row, start:stop] = func(x[start:stop], **{param: value})
+        del x, y
+    finally:
+        x_shm.close()
+        y_shm.close()
+    return stop - start
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        # Never fork: the GUI calls this from a worker thread, and forking a
+        # threaded process can deadlock the child
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+        _pool_workers = workers
+    return _pool
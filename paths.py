@@ -0,0 +1,38 @@
+import os
+import sys
+
+# Per-user locations for files the calculator writes (history, caches).
+# MPK_CALC_HOME overrides everything, which also keeps tests and benchmarks
+# away from the real user directories.
+
+APP_NAME = "mpk-calculator"
+
+
+def _base(kind):
+    override = os.environ.get("MPK_CALC_HOME")
+    if override:
+        return os.path.join(override, kind)
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        root = os.environ.get("LOCALAPPDATA") or os.path.join(home, "AppData", "Local")
+        return os.path.join(root, APP_NAME, "Cache" if kind == "cache" else "Data")
+    if sys.platform == "darwin":
+        folder = "Caches" if kind == "cache" else "Application Support"
+        return os.path.join(home, "Library", folder, APP_NAME)
+    if kind == "cache":
+        root = os.environ.get("XDG_CACHE_HOME") or os.path.join(home, ".cache")
+    else:
+        root = os.environ.get("XDG_DATA_HOME") or os.path.join(home, ".local", "share")
+    return os.path.join(root, APP_NAME)
+
+
+def data_dir():
+    path = _base("data")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def cache_dir():
+    path = _base("cache")
+    os.makedirs(path, exist_ok=True)
+    return path
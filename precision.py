@@ -0,0 +1,313 @@
+import decimal
+import math
+from contextlib import nullcontext
+from decimal import Decimal
+from fractions import Fraction
+
+# Number models for the scientific engine beyond float64:
+#
+#   DecimalMode(digits)   decimal.Decimal rounded to `digits` significant digits
+#   FractionMode(digits)  exact fractions.Fraction arithmetic; functions with
+#                         irrational results are computed to `digits` digits
+#   ComplexMode()         complex numbers, vectors and matrices on NumPy (matrix.py)
+#
+# The float path never comes through here, so it costs nothing extra.
+# Transcendental functions are evaluated with a few guard digits and then
+# rounded once.
+
+GUARD = 10
+DEFAULT_DIGITS = 50
+# Exact powers larger than this (in bits of numerator or denominator) are out
+# of range: they take unbounded time and could not be shown anyway, since
+# Python refuses to print integers of more than 4300 digits
+MAX_EXACT_BITS = 14000
+MODES = ["float", "decimal", "fraction", "complex"]
+
+TRIG = ("sin", "cos", "tan")
+INVERSE_TRIG = ("asin", "acos", "atan", "arcsin", "arccos", "arctan")
+
+
+class ModeError(ValueError):
+    # Raised by a number model when its message says more than "Invalid input"
+    pass
+
+
+def _context(digits):
+    return decimal.Context(prec=digits, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN)
+
+
+def _pi(ctx):
+    # Series from the decimal module documentation
+    with decimal.localcontext(ctx) as c:
+        c.prec += 2
+        three = Decimal(3)
+        lasts, t, s, n, na, d, da = 0, three, 3, 1, 0, 0, 24
+        while s != lasts:
+            lasts = s
+            n, na = n + na, na + 8
+            d, da = d + da, da + 32
+            t = (t * n) / d
+            s += t
+    return ctx.plus(s)
+
+
+def _sin_cos(x, ctx, pi, cosine):
+    with decimal.localcontext(ctx) as c:
+        c.prec += 2
+        x = x.remainder_near(2 * pi)
+        if cosine:
+            s = term = Decimal(1)
+            i = 0
+        else:
+            s = term = x
+            i = 1
+        lasts = None
+        x2 = x * x
+        while s != lasts:
+            lasts = s
+            term = -term * x2 / ((i + 1) * (i + 2))
+            i += 2
+            s += term
+    return ctx.plus(s)
+
+
+def _atan(x, ctx):
+    with decimal.localcontext(ctx) as c:
+        c.prec += 2
+        # atan(x) = 2 atan(x / (1 + sqrt(1 + x^2))) until the series converges fast
+        halvings = 0
+        while abs(x) > Decimal("0.1"):
+            x = x / (1 + (1 + x * x).sqrt())
+            halvings += 1
+        s = term = x
+        lasts = None
+        x2 = x * x
+        n = 1
+        while s != lasts:
+            lasts = s
+            term = -term * x2
+            n += 2
+            s += term / n
+        s *= 2 ** halvings
+    return ctx.plus(s)
+
+
+class DecimalMode:
+    name = "decimal"
+
+    def __init__(self, digits=DEFAULT_DIGITS):
+        self.digits = digits
+        self.context = _context(digits)
+        self.work = _context(digits + GUARD)
+        self.work_pi = _pi(self.work)
+        self.pi = self.context.plus(self.work_pi)
+        self.e = self.context.exp(Decimal(1))
+        self.tables = {}
+
+    def local(self):
+        # Python operators on Decimals use the thread's current context
+        return decimal.localcontext(self.context)
+
+    def parse(self, value):
+        if isinstance(value, Fraction):
+            return self.context.divide(Decimal(value.numerator), Decimal(value.denominator))
+        try:
+            return self.context.create_decimal(str(value).strip())
+        except decimal.InvalidOperation:
+            raise ValueError(f"Not a number: {value!r}") from None
+
+    def binary(self, op, a, b):
+        ctx = self.context
+        if op == '+':
+            return ctx.add(a, b)
+        elif op == '-':
+            return ctx.subtract(a, b)
+        elif op == '*':
+            return ctx.multiply(a, b)
+        elif op == '/':
+            if b == 0:
+                raise ZeroDivisionError
+            return ctx.divide(a, b)
+        elif op == '**':
+            return self.power(a, b)
+        raise ValueError(f"Unknown operator: {op}")
+
+    def power(self, a, b):
+        return self.context.power(a, b)
+
+    def _round(self, func):
+        # Work at the guard precision, round once to the display precision
+        def rounded(x):
+            with decimal.localcontext(self.work):
+                result = func(x)
+            return self.context.plus(result)
+        return rounded
+
+    def functions(self, deg=False):
+        table = self.tables.get(deg)
+        if table is not None:
+            return table
+        work, pi = self.work, self.work_pi
+        ln2 = work.ln(Decimal(2))
+        half_pi = work.divide(pi, 2)
+
+        def sin(x):
+            return _sin_cos(x, work, pi, False)
+
+        def cos(x):
+            return _sin_cos(x, work, pi, True)
+
+        def tan(x):
+            return work.divide(sin(x), cos(x))
+
+        def atan(x):
+            return _atan(x, work)
+
+        def asin(x):
+            if abs(x) > 1:
+                raise ValueError("math domain error")
+            if abs(x) == 1:
+                return half_pi.copy_sign(x)
+            return atan(work.divide(x, work.sqrt(1 - work.multiply(x, x))))
+
+        def acos(x):
+            return work.subtract(half_pi, asin(x))
+
+        def sinh(x):
+            ex = work.exp(x)
+            return (ex - 1 / ex) / 2
+
+        def cosh(x):
+            ex = work.exp(x)
+            return (ex + 1 / ex) / 2
+
+        def tanh(x):
+            return work.divide(sinh(x), cosh(x))
+
+        def log2(x):
+            return work.divide(work.ln(x), ln2)
+
+        raw = {
+            "sin": sin, "cos": cos, "tan": tan,
+            "asin": asin, "acos": acos, "atan": atan,
+            "sinh": sinh, "cosh": cosh, "tanh": tanh,
+            "exp": work.exp, "log": work.ln, "ln": work.ln, "log10": work.log10, "log2": log2,
+            "sqrt": work.sqrt, "abs": abs, "fabs": abs,
+            "floor": lambda x: Decimal(math.floor(x)), "ceil": lambda x: Decimal(math.ceil(x)),
+            "radians": lambda x: x * pi / 180, "degrees": lambda x: x * 180 / pi,
+        }
+        raw["arcsin"], raw["arccos"], raw["arctan"] = asin, acos, atan
+        if deg:
+            for name in TRIG:
+                raw[name] = lambda x, f=raw[name]: f(x * pi / 180)
+            for name in INVERSE_TRIG:
+                raw[name] = lambda x, f=raw[name]: f(x) * 180 / pi
+
+        table = {name: self._round(func) for name, func in raw.items()}
+        table.update({"pi": self.pi, "e": self.e, "__num__": self.parse, "__power__": self.power})
+        self.tables[deg] = table
+        return table
+
+
+class FractionMode:
+    name = "fraction"
+
+    def __init__(self, digits=DEFAULT_DIGITS):
+        self.digits = digits
+        # Irrational results (sqrt(2), sin(1), ...) are computed as Decimals first
+        self.approx = DecimalMode(digits)
+        self.pi = Fraction(self.approx.pi)
+        self.e = Fraction(self.approx.e)
+        self.tables = {}
+
+    def local(self):
+        return nullcontext()
+
+    def parse(self, value):
+        if isinstance(value, (Fraction, int, Decimal)):
+            return Fraction(value)
+        try:
+            return Fraction(str(value).strip())
+        except (ValueError, ZeroDivisionError):
+            raise ValueError(f"Not a number: {value!r}") from None
+
+    def binary(self, op, a, b):
+        if op == '+':
+            return a + b
+        elif op == '-':
+            return a - b
+        elif op == '*':
+            return a * b
+        elif op == '/':
+            if b == 0:
+                raise ZeroDivisionError
+            return a / b
+        elif op == '**':
+            return self.power(a, b)
+        raise ValueError(f"Unknown operator: {op}")
+
+    def power(self, a, b):
+        a, b = Fraction(a), Fraction(b)
+        if b.denominator == 1:
+            return self._exact_power(a, b.numerator)
+        root = self._exact_root(a, b.denominator)
+        if root is not None:
+            return self._exact_power(root, b.numerator)
+        return Fraction(self.approx.power(self.approx.parse(a), self.approx.parse(b)))
+
+    @staticmethod
+    def _exact_power(a, n):
+        bits = max(a.numerator.bit_length(), a.denominator.bit_length())
+        if bits > 1 and abs(n) * (bits - 1) > MAX_EXACT_BITS:
+            raise OverflowError("Result out of range")
+        return a ** n
+
+    def _exact_root(self, a, n):
+        if a < 0:
+            return None
+        num = round(a.numerator ** (1 / n)) if a.numerator < 1 << 1000 else None
+        den = round(a.denominator ** (1 / n)) if a.denominator < 1 << 1000 else None
+        if num is None or den is None or num ** n != a.numerator or den ** n != a.denominator:
+            return None
+        return Fraction(num, den)
+
+    def _approximate(self, func):
+        # Exact result where one exists, otherwise the Decimal value as a Fraction
+        return lambda x: Fraction(func(self.approx.parse(x)))
+
+    def functions(self, deg=False):
+        table = self.tables.get(deg)
+        if table is not None:
+            return table
+
+        def sqrt(x):
+            if x < 0:
+                raise ValueError("math domain error")
+            root = self._exact_root(x, 2)
+            return root if root is not None else Fraction(approx["sqrt"](self.approx.parse(x)))
+
+        approx = self.approx.functions(deg)
+        table = {name: self._approximate(func) for name, func in approx.items()
+                 if callable(func) and not name.startswith("__")}
+        table.update({
+            "sqrt": sqrt, "abs": abs, "fabs": abs,
+            "floor": lambda x: Fraction(math.floor(x)), "ceil": lambda x: Fraction(math.ceil(x)),
+            "pi": self.pi, "e": self.e, "__num__": self.parse, "__power__": self.power,
+        })
+        self.tables[deg] = table
+        return table
+
+
+def make_mode(name, digits=DEFAULT_DIGITS):
+    # None means plain float64
+    if name == "float":
+        return None
+    if name == "decimal":
+        return DecimalMode(digits)
+    if name == "fraction":
+        return FractionMode(digits)
+    if name == "complex":
+        # NumPy is only imported when this mode is picked
+        from matrix import ComplexMode
+        return ComplexMode(digits)
+    raise ValueError(f"Unknown precision mode: {name}")
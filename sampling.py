@@ -0,0 +1,139 @@
+import math
+import time
+import numpy as np
+
+from cache import LRUCache
+
+# Adaptive sampling for the graphing tab. Start from a coarse grid and only
+# refine intervals whose midpoint is far from the straight line through their
+# endpoints, so flat regions stay cheap while steep or curved regions get
+# more points. Poles are detected and the line is broken there with a nan.
+
+INITIAL_POINTS = 65
+MAX_POINTS = 2000
+TIME_BUDGET = 0.05  # seconds
+TOLERANCE = 1e-3  # fraction of the visible y-range
+JUMP = 0.5  # jumps larger than this fraction of the y-range are checked for poles
+
+
+def adaptive_sample(func, xmin, xmax, initial=INITIAL_POINTS, max_points=MAX_POINTS,
+                    time_budget=TIME_BUDGET, tolerance=TOLERANCE):
+    deadline = time.perf_counter() + time_budget
+    x = np.linspace(xmin, xmax, max(3, min(initial, max_points)))
+    y = func(x)
+    active = np.ones(len(x) - 1, dtype=bool)
+    min_width = (xmax - xmin) / (max_points * 64)
+
+    while time.perf_counter() < deadline:
+        budget = max_points - len(x)
+        widths = np.diff(x)
+        idx = np.flatnonzero(active & (widths > min_width))
+        if budget <= 0 or idx.size == 0:
+            break
+        if idx.size > budget:
+            # Spend what is left on the steepest intervals first
+            steep = np.nan_to_num(np.abs(y[idx + 1] - y[idx]), nan=np.inf)
+            idx = np.sort(idx[np.argsort(-steep, kind="stable")[:budget]])
+
+        xm = (x[idx] + x[idx + 1]) / 2
+        ym = func(xm)
+        y0, y1 = y[idx], y[idx + 1]
+        finite = np.isfinite(y0) & np.isfinite(y1) & np.isfinite(ym)
+        edge = ~finite & (np.isfinite(y0) | np.isfinite(y1) | np.isfinite(ym))
+        with np.errstate(invalid="ignore", over="ignore"):
+            bent = finite & (np.abs(ym - (y0 + y1) / 2) > tolerance * _scale(y))
+
+        status = active.copy()
+        status[idx] = bent | edge
+        children = np.ones(len(active), dtype=np.intp)
+        children[idx] = 2
+        active = np.repeat(status, children)
+        x = np.insert(x, idx + 1, xm)
+        y = np.insert(y, idx + 1, ym)
+
+    return _break_poles(func, x, y)
+
+
+
+class TileSampler:
+    # Samples each expression on fixed-width tiles whose width is a power of
+    # two picked from the view span. Panning re-uses the tiles already in the
+    # cache and only evaluates the newly exposed ones; zooming moves to another
+    # level, and old tiles are evicted least-recently-used first. With a
+    # diskcache.DiskCache, tiles are also saved there and read back
+    # memory-mapped in later sessions.
+
+    def __init__(self, cache_size=512, tiles_per_view=8, disk=None):
+        self.cache = LRUCache(cache_size)
+        self.tiles_per_view = tiles_per_view
+        self.disk = disk
+
+    def sample(self, key, func, xmin, xmax):
+        level = math.floor(math.log2((xmax - xmin) / self.tiles_per_view))
+        width = 2.0 ** level
+        first = math.floor(xmin / width)
+        last = math.ceil(xmax / width)
+        xs, ys = [], []
+        for k in range(first, last):
+            tile = self.cache.get((key, level, k))
+            if tile is None:
+                tile = self._sample_tile(key, func, k * width, (k + 1) * width)
+                self.cache.put((key, level, k), tile)
+            # Neighbouring tiles share their boundary point
+            start = 1 if xs else 0
+            xs.append(tile[0][start:])
+            ys.append(tile[1][start:])
+        x = np.concatenate(xs)
+        y = np.concatenate(ys)
+        return _break_poles(func, x, y)
+
+    def _sample_tile(self, key, func, xmin, xmax):
+        max_points = MAX_POINTS // self.tiles_per_view
+        disk_key = ("samples", key, xmin, xmax, max_points)
+        if self.disk is not None:
+            stored = self.disk.get_array(disk_key)
+            if stored is not None:
+                return stored[0], stored[1]
+        x, y = adaptive_sample(func, xmin, xmax, max_points=max_points,
+                               time_budget=TIME_BUDGET / self.tiles_per_view)
+        if self.disk is not None:
+            self.disk.put_array(disk_key, np.vstack((x, y)))
+        return x, y
+
+
+def _scale(y):
+    finite = y[np.isfinite(y)]
+    if finite.size == 0:
+        return 1.0
+    lo, hi = np.percentile(finite, [5, 95])
+    return (hi - lo) or (np.abs(finite).max() or 1.0)
+
+
+def _break_poles(func, x, y):
+    # A pole leaves a big jump whose midpoint is not between its endpoints
+    with np.errstate(invalid="ignore", over="ignore"):
+        idx = np.flatnonzero(np.abs(np.diff(y)) > JUMP * _scale(y))
+    if idx.size == 0:
+        return x, y
+    xm = (x[idx] + x[idx + 1]) / 2
+    ym = func(xm)
+    lo = np.minimum(y[idx], y[idx + 1])
+    hi = np.maximum(y[idx], y[idx + 1])
+    with np.errstate(invalid="ignore"):
+        pole = ~np.isfinite(ym) | (ym < lo) | (ym > hi)
+    idx = idx[pole]
+    return np.insert(x, idx + 1, xm[pole]), np.insert(y, idx + 1, np.nan)
+
+
+def y_limits(y, margin=0.05):
+    # Plain min/max when every value is finite; otherwise robust percentiles so
+    # the huge values near a pole do not flatten the rest of the curve
+    finite = y[np.isfinite(y)]
+    if finite.size == 0:
+        return -1.0, 1.0
+    if finite.size == y.size:
+        lo, hi = finite.min(), finite.max()
+    else:
+        lo, hi = np.percentile(finite, [2, 98])
+    pad = (hi - lo) * margin or 1.0
+    return lo - pad, hi + pad
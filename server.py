@@ -0,0 +1,276 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from batch import error_message, evaluate_record, load_record
+from engine import WORD_SIZES, CalculatorEngine, CalculatorError
+from precision import DEFAULT_DIGITS, MODES
+
+# Local HTTP/JSON service with the same semantics as batch mode. No tkinter,
+# no matplotlib.
+#
+#   POST /evaluate   one record:  {"a": "1", "op": "+", "b": "2"} or {"line": "HEX FF & 0F"}
+#   POST /batch      a JSON array of records, answered with an array in the same order
+#   GET  /health     {"status": "ok", "pid": ..., "requests": ...}
+#
+# Records are the ones batch.py reads from JSONL; the reply is the record with
+# "result" or "error" added. Connections are kept alive and requests may be
+# pipelined: each is answered in order as soon as it is read. Every connection
+# gets its own engine, so "ans" and variables set with "r = 5" are private to
+# it, while compiled expressions and unit tables are shared by the process.
+#
+# Requests are evaluated on a thread pool, never on the event loop, so a slow
+# one does not hold up other connections. One that runs past EVAL_TIMEOUT is
+# answered with 503 and its connection closed; fields longer than MAX_FIELD
+# are refused before they are parsed. Any other failure is answered with 500,
+# and in /batch a record that fails only gets its own "error".
+#
+# A thread cannot be stopped, so a timed-out evaluation keeps its thread until
+# it finishes, and EVAL_THREADS of them at once would leave every later request
+# waiting. The timeout is a last resort: what keeps evaluation short is that
+# the engine bounds its inputs (expression length and nesting, exponents,
+# matrix sizes) and fails fast outside them.
+#
+# With --workers N the listening socket is opened once and N forked processes
+# accept on it, each running its own event loop.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_HEADER = 16 * 1024  # bytes
+MAX_BODY = 8 * 1024 * 1024  # bytes
+MAX_BATCH = 10000  # records per /batch request
+MAX_FIELD = 4096  # characters in one field of a record
+EVAL_TIMEOUT = 10.0  # seconds per request
+EVAL_THREADS = 8
+BACKLOG = 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           411: "Length Required", 413: "Payload Too Large", 422: "Unprocessable Entity",
+           431: "Request Header Fields Too Large", 500: "Internal Server Error", 501: "Not Implemented",
+           503: "Service Unavailable"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class CalculatorServer:
+    def __init__(self, deg=True, word_size=32, signed=True, precision="float", digits=DEFAULT_DIGITS):
+        self.options = {"deg": deg, "word_size": word_size, "signed": signed,
+                        "precision": precision, "digits": digits}
+        CalculatorEngine(**self.options)  # reject bad options before listening
+        self.requests = 0
+        self.executor = None
+        self.routes = {
+            ("POST", "/evaluate"): self.evaluate,
+            ("POST", "/batch"): self.batch,
+            ("GET", "/health"): self.health,
+        }
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, sock=None):
+        # Created here rather than in __init__ so forked workers get their own
+        self.executor = ThreadPoolExecutor(EVAL_THREADS, thread_name_prefix="evaluate")
+        if sock is not None:
+            return await asyncio.start_server(self.handle, sock=sock, limit=MAX_HEADER)
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER, backlog=BACKLOG)
+
+    async def handle(self, reader, writer):
+        engine = CalculatorEngine(**self.options)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break  # client closed the connection
+                except asyncio.LimitOverrunError:
+                    writer.write(response(431, {"error": "Request header too large"}, close=True))
+                    break
+                try:
+                    method, path, headers, keep_alive = parse_head(head)
+                    body = await read_body(reader, method, headers)
+                except HttpError as e:
+                    # The rest of the stream cannot be trusted after a bad request
+                    writer.write(response(e.status, {"error": str(e)}, close=True))
+                    break
+                try:
+                    status, payload = await asyncio.wait_for(
+                        loop.run_in_executor(self.executor, self.dispatch, engine, method, path, body),
+                        EVAL_TIMEOUT)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except asyncio.TimeoutError:
+                    # The thread cannot be stopped and still owns the engine,
+                    # so this connection is done
+                    writer.write(response(503, {"error": f"Evaluation took longer than {EVAL_TIMEOUT:g}s"},
+                                          close=True))
+                    break
+                except Exception as e:
+                    # A bug, but the client still gets an answer and the connection stays usable
+                    status, payload = 500, {"error": error_message(e)}
+                writer.write(response(status, payload, close=not keep_alive))
+                # Returns at once unless the client has stopped reading
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def dispatch(self, engine, method, path, body):
+        self.requests += 1
+        path = path.split("?", 1)[0]
+        route = self.routes.get((method, path))
+        if route is None:
+            if any(p == path for _, p in self.routes):
+                raise HttpError(405, f"{method} not allowed on {path}")
+            raise HttpError(404, f"Unknown path: {path}")
+        return route(engine, body)
+
+    def evaluate(self, engine, body):
+        record = evaluate_limited(engine, load_json(body))
+        return (422 if "error" in record else 200), record
+
+    def batch(self, engine, body):
+        records = load_json(body)
+        if isinstance(records, dict):
+            records = records.get("records")
+        if not isinstance(records, list):
+            raise HttpError(400, "Expected a JSON array of records")
+        if len(records) > MAX_BATCH:
+            raise HttpError(413, f"At most {MAX_BATCH} records per batch")
+        return 200, [evaluate_limited(engine, record) for record in records]
+
+    def health(self, engine, body):
+        return 200, {"status": "ok", "pid": os.getpid(), "requests": self.requests}
+
+
+def evaluate_limited(engine, record):
+    if isinstance(record, dict):
+        for name, value in record.items():
+            if isinstance(value, str) and len(value) > MAX_FIELD:
+                record[name] = value[:32] + "..."
+                record["error"] = f"Field {name!r} is longer than {MAX_FIELD} characters"
+                return record
+    return evaluate_record(engine, record)
+
+
+def parse_head(head):
+    try:
+        lines = head.decode("latin-1").split("\r\n")
+        method, path, version = lines[0].split(" ")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+    except ValueError:
+        raise HttpError(400, "Malformed request") from None
+    connection = headers.get("connection", "").lower()
+    # HTTP/1.1 keeps the connection open unless told otherwise, 1.0 the reverse
+    keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+    return method, path, headers, keep_alive
+
+
+async def read_body(reader, method, headers):
+    if "transfer-encoding" in headers:
+        raise HttpError(501, "Chunked requests are not supported; send Content-Length")
+    length = headers.get("content-length")
+    if length is None:
+        if method == "POST":
+            raise HttpError(411, "Content-Length required")
+        return b""
+    try:
+        length = int(length)
+    except ValueError:
+        raise HttpError(400, "Invalid Content-Length") from None
+    if length < 0 or length > MAX_BODY:
+        raise HttpError(413, f"Body larger than {MAX_BODY} bytes")
+    return await reader.readexactly(length)
+
+
+def load_json(body):
+    try:
+        return load_record(body)
+    except ValueError as e:
+        raise HttpError(400, f"Invalid JSON: {e}") from None
+
+
+def response(status, payload, close=False):
+    body = json.dumps(payload, allow_nan=False).encode()
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n")
+    if close:
+        head += "Connection: close\r\n"
+    return head.encode() + b"\r\n" + body
+
+
+def serve(server, sock):
+    # One event loop accepting on an already listening socket
+    async def run():
+        listener = await server.start(sock=sock)
+        async with listener:
+            await listener.serve_forever()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve calculator evaluations over HTTP/JSON.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to bind (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to bind (default: {DEFAULT_PORT})")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="worker processes (default: 1)")
+    parser.add_argument("--rad", action="store_true", help="use radians for trig functions")
+    parser.add_argument("--bits", type=int, choices=WORD_SIZES, default=32, help="programmer word size (default: 32)")
+    parser.add_argument("--unsigned", action="store_true", help="unsigned programmer arithmetic")
+    parser.add_argument("--precision", choices=MODES, default="float", help="number model (default: float)")
+    parser.add_argument("--digits", type=int, default=DEFAULT_DIGITS,
+                        help=f"significant digits for --precision decimal (default: {DEFAULT_DIGITS})")
+    args = parser.parse_args(argv)
+
+    try:
+        server = CalculatorServer(deg=not args.rad, word_size=args.bits, signed=not args.unsigned,
+                                  precision=args.precision, digits=args.digits)
+    except CalculatorError as e:
+        parser.error(str(e))
+    if args.workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        parser.error("--workers needs a platform with fork()")
+
+    sock = socket.create_server((args.host, args.port), backlog=BACKLOG)
+    print(f"Serving on http://{args.host}:{sock.getsockname()[1]} with {args.workers} worker(s)", file=sys.stderr)
+    if args.workers <= 1:
+        serve(server, sock)
+        return 0
+
+    # The children inherit the listening socket; the kernel spreads accepts between them
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=serve, args=(server, sock), daemon=True) for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    sock.close()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            if worker.pid is not None:
+                os.kill(worker.pid, signal.SIGINT)
+        for worker in workers:
+            worker.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
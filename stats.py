@@ -0,0 +1,356 @@
+import argparse
+import io
+import sys
+import time
+
+import numpy as np
+
+# Streaming statistics over columns of numbers of any length: from a file,
+# stdin or pasted text, read a chunk at a time, so memory use does not grow
+# with the input.
+#
+# Count, mean and variance are kept as Welford's running moments and each
+# chunk is folded in with Chan et al.'s pairwise update, which stays accurate
+# where sum-of-squares formulas cancel (values around 1e9 that differ by 1e-3).
+# Quantiles and histograms come from a merging t-digest: the distribution as a
+# few hundred weighted centroids, small in the tails and larger in the middle,
+# so p99.9 is as trustworthy as the median. A chunk is merged into it with one
+# sort and two bincounts; nothing runs a Python loop per value.
+
+COMPRESSION = 1000  # t-digest size; at most COMPRESSION / 2 centroids are kept
+CHUNK_VALUES = 1 << 20  # values per update for binary input
+TEXT_CHUNK = 1 << 22  # bytes per read for text input
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+HISTOGRAM_BINS = 50
+# Commas, semicolons and tabs separate values like spaces do
+DELIMITERS = bytes.maketrans(b",;\t\r", b"    ")
+
+
+class TDigest:
+    def __init__(self, compression=COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.total = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def __len__(self):
+        return len(self.means)
+
+    def update(self, values):
+        # values: a 1-D float array of finite numbers
+        if not len(values):
+            return
+        self.total += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._compress(np.concatenate((self.means, values)),
+                       np.concatenate((self.weights, np.ones(len(values)))))
+
+    def merge(self, other):
+        if not other.total:
+            return
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(np.concatenate((self.means, other.means)), np.concatenate((self.weights, other.weights)))
+
+    def _compress(self, means, weights):
+        # Sorted by value, every point or centroid goes to the cluster its
+        # quantile falls in on the k1 scale, k = d/(2 pi) asin(2q - 1): one unit
+        # of k is a sliver of q near 0 and 1 and a wide band around the median
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        q = (cumulative - weights / 2) / cumulative[-1]
+        k = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * q - 1))
+        groups = (k - k[0]).astype(np.intp)
+        total = np.bincount(groups, weights)
+        # Offsets from the middle value keep the sums small: the spread of data
+        # around 1e9 would otherwise drown in the rounding of 1e9 * weight
+        middle = means[len(means) // 2]
+        sums = np.bincount(groups, weights * (means - middle))
+        keep = total > 0
+        self.weights = total[keep]
+        self.means = middle + sums[keep] / self.weights
+
+    def _knots(self):
+        # Piecewise-linear CDF through (min, 0), each centroid at the middle of
+        # its weight, and (max, total)
+        positions = np.cumsum(self.weights) - self.weights / 2
+        return (np.concatenate(([self.min], self.means, [self.max])),
+                np.concatenate(([0.0], positions, [self.total])))
+
+    def quantile(self, q):
+        if not self.total:
+            raise ValueError("No data")
+        values, positions = self._knots()
+        # Centroid i of weight 1 sits at i + 1/2, so while the tails are still
+        # single values this is NumPy's (and spreadsheets') linear quantile
+        return np.interp(np.asarray(q, dtype=float) * (self.total - 1) + 0.5, positions, values)
+
+    def cdf(self, x):
+        # Fraction of values <= x
+        if not self.total:
+            raise ValueError("No data")
+        values, positions = self._knots()
+        # Centroids that share a value (repeated or integer data) make a step:
+        # only the first and last knot of each run are kept
+        change = values[1:] != values[:-1]
+        keep = np.append(True, change) | np.append(change, True)
+        return np.interp(x, values[keep], positions[keep]) / self.total
+
+
+class Statistics:
+    def __init__(self, compression=COMPRESSION):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations from the mean
+        self.skipped = 0  # NaN and infinite values
+        self.digest = TDigest(compression)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        finite = np.isfinite(values)
+        if not finite.all():
+            self.skipped += len(values) - int(finite.sum())
+            values = values[finite]
+        if not len(values):
+            return
+        # Two passes over the chunk, which is in memory anyway, then one merge
+        mean = float(values.mean())
+        self._combine(len(values), mean, float(np.square(values - mean).sum()))
+        self.digest.update(values)
+
+    def merge(self, other):
+        # Statistics of a second stream, as if its values had been added here
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+        self.skipped += other.skipped
+        self.digest.merge(other.digest)
+
+    def _combine(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self):
+        # Sample variance (n - 1)
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+    @property
+    def minimum(self):
+        return self.digest.min
+
+    @property
+    def maximum(self):
+        return self.digest.max
+
+    def quantile(self, q):
+        return self.digest.quantile(q)
+
+    def histogram(self, bins=HISTOGRAM_BINS):
+        # (counts, edges) over [min, max], like np.histogram; counts are
+        # estimated from the digest, so they need not be whole numbers
+        low, high = self.minimum, self.maximum
+        if not self.count:
+            raise ValueError("No data")
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+        edges = np.linspace(low, high, bins + 1)
+        # Bins are [a, b) and the last one [a, b], so what lies on an edge
+        # belongs to the bin on its right
+        below = self.digest.cdf(np.nextafter(edges, -np.inf))
+        below[0], below[-1] = 0.0, 1.0
+        return np.diff(below) * self.count, edges
+
+    def summary(self, quantiles=QUANTILES):
+        # Name -> value, in display order
+        result = {"count": self.count, "mean": self.mean, "std": self.std, "variance": self.variance,
+                  "min": self.minimum, "max": self.maximum}
+        if self.count:
+            for q, value in zip(quantiles, self.quantile(quantiles)):
+                result[f"p{q * 100:g}"] = float(value)
+        if self.skipped:
+            result["skipped"] = self.skipped
+        return result
+
+
+def format_summary(summary):
+    # One "name  value" line per entry
+    lines = []
+    for name, value in summary.items():
+        text = f"{value:,}" if isinstance(value, int) else f"{value:.10g}"
+        lines.append(f"{name:<9s}{text:>20s}")
+    return "\n".join(lines)
+
+
+# Input
+def _floats(tokens):
+    try:
+        return np.array(tokens, dtype=float)
+    except ValueError:
+        pass
+    for token in tokens:
+        try:
+            float(token)
+        except ValueError:
+            raise ValueError(f"Not a number: {token.decode(errors='replace')}") from None
+    raise ValueError("Not a number")
+
+
+def _column(column, names=None):
+    # 0-based index for a column given as a 1-based number or a header name
+    if column is None:
+        return None
+    column = str(column).strip()
+    if column.isdigit() and int(column) > 0:
+        return int(column) - 1
+    if names is not None and column in names:
+        return names.index(column)
+    raise ValueError(f"No column {column!r}" + ("" if names else " (columns without a header are numbered)"))
+
+
+def _header(line):
+    # Field names if the first line is a header (no field is a number)
+    fields = line.translate(DELIMITERS).split()
+    for field in fields:
+        try:
+            float(field)
+            return None
+        except ValueError:
+            pass
+    return [field.decode(errors="replace") for field in fields]
+
+
+def _parse(data, index):
+    text = data.translate(DELIMITERS)
+    if index is None:
+        return _floats(text.split())
+    rows = [fields for fields in map(bytes.split, text.split(b"\n")) if fields]
+    try:
+        return _floats([fields[index] for fields in rows])
+    except IndexError:
+        raise ValueError(f"Some rows have no column {index + 1}") from None
+
+
+def read_text(f, column=None, chunk_bytes=TEXT_CHUNK):
+    # Chunks of floats from a binary text stream: numbers separated by spaces,
+    # newlines, commas, semicolons or tabs. A header line is skipped and names
+    # the columns; `column` (number or name) picks one, otherwise every number
+    # is used.
+    rest = b""
+    index = None
+    first = True
+    while True:
+        block = f.read(chunk_bytes)
+        data = rest + block
+        if block:
+            # Cut after the last complete line (or value, once past a possible
+            # header) so nothing is split
+            cut = data.rfind(b"\n")
+            if cut < 0 and column is None and (not first or len(data) > chunk_bytes):
+                cut = max(data.rfind(sep) for sep in (b" ", b",", b";", b"\t"))
+            if cut < 0:
+                rest = data
+                continue
+            data, rest = data[:cut + 1], data[cut + 1:]
+        if first:
+            data = data.lstrip()
+            line, _, body = data.partition(b"\n")
+            names = _header(line) if line else None
+            if names is not None:
+                data = body
+            if column is not None:
+                index = _column(column, names)
+            first = False
+        if data.strip():
+            yield _parse(data, index)
+        if not block:
+            return
+
+
+def read_npy(path, column=None):
+    data = np.load(path, mmap_mode="r", allow_pickle=False)
+    if column is not None:
+        if data.ndim != 2:
+            raise ValueError("Columns can only be picked from a 2-D array")
+        index = _column(column)
+        if index >= data.shape[1]:
+            raise ValueError(f"No column {index + 1}")
+        data = data[:, index]
+    else:
+        data = data.reshape(-1)
+    for start in range(0, len(data), CHUNK_VALUES):
+        yield np.asarray(data[start:start + CHUNK_VALUES], dtype=float)
+
+
+def load_values(path, column=None):
+    # Chunks of floats from a .npy or text file, or stdin for "-"
+    if path == "-":
+        yield from read_text(sys.stdin.buffer, column)
+    elif path.lower().endswith(".npy"):
+        yield from read_npy(path, column)
+    else:
+        with open(path, "rb") as f:
+            yield from read_text(f, column)
+
+
+def text_values(text, column=None):
+    # Chunks of floats from text already in memory (the clipboard)
+    return read_text(io.BytesIO(text.encode()), column)
+
+
+def collect(chunks, progress=None):
+    # Statistics of every chunk; progress(values_read) is called after each one
+    stats = Statistics()
+    read = 0
+    for values in chunks:
+        stats.update(values)
+        read += len(values)
+        if progress:
+            progress(read)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summary statistics of a column of numbers.")
+    parser.add_argument("input", nargs="?", default="-", help="text or .npy file (default: stdin)")
+    parser.add_argument("-c", "--column", help="column number (from 1) or header name (default: every number)")
+    parser.add_argument("--bins", type=int, default=0, help="also print a histogram with this many bins")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print throughput")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        stats = collect(load_values(args.input, args.column))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    if not stats.count:
+        print("Error: no numbers in the input", file=sys.stderr)
+        return 1
+    print(format_summary(stats.summary()))
+    if args.bins > 0:
+        counts, edges = stats.histogram(args.bins)
+        print()
+        for low, high, count in zip(edges[:-1], edges[1:], counts):
+            print(f"{low:>14.6g} {high:>14.6g} {count:>14.0f}")
+
+    if not args.quiet:
+        rate = stats.count / elapsed if elapsed > 0 else 0.0
+        print(f"{stats.count} values in {elapsed:.3f}s - {rate:,.0f} values/s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+import csv
+import math
+
+import numpy as np
+
+import parallel
+from cache import LRUCache
+from expression import compile_expression
+
+# Table mode: f(x) over a range, or f(x, y) over a grid, as rows of
+# (x, [y,] f). Nothing is evaluated up front. The viewer asks for the rows it
+# shows, which are computed a block at a time and kept in a small LRU cache;
+# exports walk the table in large chunks and write each one straight to the
+# file, so a grid of tens of millions of points never exists in memory at
+# once, let alone as Python objects.
+#
+# Rows run through x first: row r is x[r % nx], y[r // nx].
+
+BLOCK_ROWS = 4096  # rows per cached block for the viewer
+BLOCK_CACHE = 64  # blocks kept
+EXPORT_CHUNK = 1_000_000  # points per export chunk
+EXPORT_FORMATS = {".csv": "csv", ".npy": "npy", ".parquet": "parquet"}
+
+
+class Axis:
+    def __init__(self, start, stop, step):
+        start, stop, step = float(start), float(stop), float(step)
+        if not all(map(math.isfinite, (start, stop, step))):
+            raise ValueError("Range values must be finite")
+        if step == 0 or (stop - start) / step < 0:
+            raise ValueError("Step must move from start towards stop")
+        self.start = start
+        self.step = step
+        # The small tolerance keeps "0 to 1 step 0.1" at 11 values
+        self.count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        # Decimal ranges are computed as integer / 10^d, which rounds each value
+        # once: "-1 to 1 step 0.1" gives -0.3, not -0.30000000000000004
+        self.scale = None
+        for digits in range(16):
+            scale = 10.0 ** digits
+            first, stride = round(start * scale), round(step * scale)
+            if first / scale == start and stride / scale == step:
+                if abs(first) + self.count * abs(stride) < 2 ** 53:
+                    self.scale, self.first, self.stride = scale, first, stride
+                break
+
+    def __len__(self):
+        return self.count
+
+    def at(self, indices):
+        if self.scale is not None:
+            return (self.first + indices * self.stride) / self.scale
+        return self.start + indices * self.step
+
+    def values(self, start=0, stop=None):
+        stop = self.count if stop is None else stop
+        return self.at(np.arange(start, stop, dtype=float))
+
+
+class Table:
+    def __init__(self, text, xaxis, yaxis=None):
+        self.text = text
+        self.xaxis = xaxis
+        self.yaxis = yaxis
+        self.columns = ["x", "f"] if yaxis is None else ["x", "y", "f"]
+        self.func = compile_expression(text, ("x",) if yaxis is None else ("x", "y"))
+        self.nx = len(xaxis)
+        self.ny = 1 if yaxis is None else len(yaxis)
+        self.blocks = LRUCache(BLOCK_CACHE)
+
+    def __len__(self):
+        return self.nx * self.ny
+
+    def rows(self, start, stop):
+        # Columns for rows [start, stop) as one (n, len(columns)) array
+        stop = min(stop, len(self))
+        if start >= stop:
+            return np.empty((0, len(self.columns)))
+        first, last = start // BLOCK_ROWS, (stop - 1) // BLOCK_ROWS
+        parts = [self._block(b) for b in range(first, last + 1)]
+        data = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        offset = first * BLOCK_ROWS
+        return data[start - offset:stop - offset]
+
+    def _block(self, index):
+        data = self.blocks.get(index)
+        if data is None:
+            start = index * BLOCK_ROWS
+            data = self._evaluate(start, min(len(self), start + BLOCK_ROWS))
+            self.blocks.put(index, data)
+        return data
+
+    def _evaluate(self, start, stop):
+        # Any row range; small, so evaluated here with broadcasting
+        rows = np.arange(start, stop)
+        x = self.xaxis.at(rows % self.nx)
+        if self.yaxis is None:
+            return np.column_stack((x, self.func(x)))
+        y = self.yaxis.at(rows // self.nx)
+        return np.column_stack((x, y, self.func(x, y=y)))
+
+    def chunks(self, size=EXPORT_CHUNK):
+        # Whole table in order, as (n, len(columns)) arrays of about `size` rows.
+        # Chunks cover whole x rows where they fit, so each is one parallel
+        # evaluate or sweep call.
+        if self.yaxis is None:
+            for start in range(0, self.nx, size):
+                x = self.xaxis.values(start, min(self.nx, start + size))
+                yield np.column_stack((x, parallel.evaluate(self.text, x)))
+        elif self.nx >= size:
+            for iy in range(self.ny):
+                y = self.yaxis.values(iy, iy + 1)
+                for start in range(0, self.nx, size):
+                    x = self.xaxis.values(start, min(self.nx, start + size))
+                    f = parallel.sweep(self.text, x, y, "y")[0]
+                    yield np.column_stack((x, np.full(x.shape, y[0]), f))
+        else:
+            x = self.xaxis.values()
+            per_chunk = max(1, size // self.nx)
+            for iy in range(0, self.ny, per_chunk):
+                y = self.yaxis.values(iy, min(self.ny, iy + per_chunk))
+                f = parallel.sweep(self.text, x, y, "y")
+                yield np.column_stack((np.tile(x, len(y)), np.repeat(y, self.nx), f.ravel()))
+
+    def export(self, path, fmt=None, progress=None):
+        # Streams the table to `path`; progress(rows_done) is called after each chunk
+        fmt = fmt or export_format(path)
+        writer = {"csv": self._write_csv, "npy": self._write_npy, "parquet": self._write_parquet}[fmt]
+        return writer(path, progress)
+
+    def _write_csv(self, path, progress):
+        # Shortest text that reads back as the same float; one string per chunk
+        row = ",".join(["%r"] * len(self.columns)).__mod__
+        done = 0
+        with open(path, "w", newline="") as f:
+            csv.writer(f).writerow(self.columns)
+            for chunk in self.chunks():
+                f.write("\n".join(map(row, map(tuple, chunk.tolist()))))
+                f.write("\n")
+                done += len(chunk)
+                if progress:
+                    progress(done)
+        return done
+
+    def _write_npy(self, path, progress):
+        # One float64 (rows, columns) array, filled through a memory map
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=float, shape=(len(self), len(self.columns)))
+        done = 0
+        try:
+            for chunk in self.chunks():
+                out[done:done + len(chunk)] = chunk
+                done += len(chunk)
+                if progress:
+                    progress(done)
+            out.flush()
+        finally:
+            del out
+        return done
+
+    def _write_parquet(self, path, progress):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet export needs pyarrow (pip install pyarrow)") from None
+        schema = pa.schema([(name, pa.float64()) for name in self.columns])
+        done = 0
+        # One row group per chunk
+        with pq.ParquetWriter(path, schema) as writer:
+            for chunk in self.chunks():
+                writer.write_table(pa.Table.from_arrays([pa.array(chunk[:, i]) for i in range(chunk.shape[1])],
+                                                        schema=schema))
+                done += len(chunk)
+                if progress:
+                    progress(done)
+        return done
+
+
+def export_format(path):
+    for suffix, fmt in EXPORT_FORMATS.items():
+        if path.lower().endswith(suffix):
+            return fmt
+    raise ValueError("Export to .csv, .npy or .parquet")
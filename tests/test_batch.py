@@ -0,0 +1,62 @@
+import io
+import json
+
+import pytest
+
+from batch import evaluate_record, run_csv, run_jsonl, run_text
+from engine import CalculatorEngine, InvalidInput
+
+
+def run(runner, text):
+    stats = {"count": 0, "errors": 0}
+    out = io.StringIO()
+    runner(CalculatorEngine(), io.StringIO(text), out, stats)
+    return out.getvalue(), stats
+
+
+def test_programmer_record_missing_operand():
+    record = evaluate_record(CalculatorEngine(), {"base": "DEC", "a": 5})
+    assert record["error"] == "Missing operand"
+    with pytest.raises(InvalidInput):
+        CalculatorEngine().prog_calculate(5, "+", None)
+
+
+def test_csv_row_missing_b_does_not_end_the_run():
+    out, stats = run(run_csv, "base,a,op,b\nDEC,5\nDEC,5,+,1\n")
+    lines = out.splitlines()
+    assert lines[1].endswith("Missing operand")
+    assert lines[2] == "DEC,5,+,1,6,"
+    assert stats == {"count": 2, "errors": 1}
+
+
+def test_csv_row_with_extra_fields():
+    out, stats = run(run_csv, "a,op,b\n1,+,2,9\n3,*,4\n")
+    assert out.splitlines()[1:] == ["1,+,2,3.0,", "3,*,4,12.0,"]
+    assert stats["errors"] == 0
+
+
+def test_jsonl_accepts_line_records_and_keeps_going():
+    text = '{"base": "DEC", "a": 5}\n{"line": "1 + 2"}\n{"line": "HEX FF & 0F"}\nnot json\n{"expr": "2^10"}\n'
+    out, stats = run(run_jsonl, text)
+    records = [json.loads(line) for line in out.splitlines()]
+    assert records[0]["error"] == "Missing operand"
+    assert records[1]["result"] == 3.0
+    assert records[2]["result"] == "F"
+    assert "error" in records[3]
+    assert records[4]["result"] == 1024.0
+    assert stats == {"count": 5, "errors": 2}
+
+
+def test_jsonl_output_is_strict_json():
+    out, _ = run(run_jsonl, '{"expr": "1e308*10"}\n{"a": NaN, "op": "+", "b": 1}\n')
+    first, second = (json.loads(line, parse_constant=lambda name: pytest.fail(name)) for line in out.splitlines())
+    assert first["result"] == "inf"
+    assert "error" in second
+
+
+def test_text_errors_are_reported_inline():
+    out, stats = run(run_text, "DEC 5 + x\n" + "1+" * 3000 + "1\n1 + 2\n")
+    lines = out.splitlines()
+    assert lines[0].startswith("Error:") and lines[1].startswith("Error:")
+    assert lines[2] == "3.0"
+    assert stats == {"count": 3, "errors": 2}
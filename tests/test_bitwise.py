@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from bitwise import apply, process_file
+from engine import CalculatorEngine
+
+OPERATORS = ['+', '-', '*', '/', '%', '&', '|', '^', '<<', '>>', '~']
+
+
+@pytest.mark.parametrize("bits", [8, 16, 32, 64])
+@pytest.mark.parametrize("signed", [False, True])
+@pytest.mark.parametrize("op", OPERATORS)
+def test_apply_matches_prog_calculate(op, bits, signed):
+    engine = CalculatorEngine(word_size=bits, signed=signed)
+    rng = np.random.default_rng(bits)
+    mask = (1 << bits) - 1
+    a = rng.integers(0, 1 << 63, 200, dtype=np.uint64) & np.uint64(mask)
+    b = rng.integers(0, 1 << 63, 200, dtype=np.uint64) & np.uint64(mask)
+    if op in ('<<', '>>'):
+        b = b % np.uint64(bits + 4)
+    if op in ('/', '%'):
+        b[b == 0] = 1
+    got = apply(op, a, b, bits, signed)
+    for x, y, z in zip(a.tolist(), b.tolist(), got.tolist()):
+        assert z == engine.prog_calculate(x, op, y) & mask, (x, op, y)
+
+
+def test_process_file_counts_input_bits_and_strips_padding(tmp_path):
+    src, dst = tmp_path / "in.txt", tmp_path / "out.txt"
+    src.write_text("1F 0x3 ff 0 7\n")
+    assert process_file(str(src), str(dst), "popcount", None, "HEX", 8) == (5, 18)
+    assert dst.read_bytes() == b"5\n2\n8\n0\n3\n"
+    assert process_file(str(src), str(dst), "-", "1", "DEC", 8, True) == (5, 18)
+    assert dst.read_bytes() == b"30\n2\n-2\n-1\n6\n"
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from engine import CalculatorEngine, InvalidInput
+from expression import MAX_DEPTH, ExpressionError, compile_expression
+
+MODES = ("float", "decimal", "fraction", "complex")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_isolated(code, timeout=20):
+    # A regression here would hang in C with the GIL held, so it runs in a
+    # child process that can be killed
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=timeout,
+                          cwd=ROOT)
+
+
+@pytest.mark.parametrize("text", ["10**10**8", "9^9^9", "floor(9)**floor(9)**floor(9)",
+                                  "ceil(9.5)**ceil(9)**ceil(9)"])
+def test_huge_powers_fail_fast(text):
+    code = f"""
+from engine import CalculatorEngine, CalculatorError
+for mode in {MODES!r}:
+    try:
+        CalculatorEngine(precision=mode).evaluate_expression({text!r})
+    except CalculatorError:
+        pass
+"""
+    result = run_isolated(code)
+    assert result.returncode == 0, result.stderr
+
+
+def test_floor_and_ceil_return_floats():
+    engine = CalculatorEngine()
+    assert engine.evaluate_expression("floor(2.5)") == 2.0
+    assert type(engine.evaluate_expression("ceil(2.5)")) is float
+
+
+@pytest.mark.parametrize("text", ["1+" * 5000 + "1", "-" * 10000 + "1", "1+" * 1500 + "1",
+                                  "x*" * MAX_DEPTH + "x"])
+def test_deep_or_long_input_is_rejected(text):
+    with pytest.raises(ExpressionError):
+        compile_expression(text, None)
+    with pytest.raises(InvalidInput):
+        CalculatorEngine().evaluate_expression(text.replace("x", "2"))
+
+
+def test_moderate_nesting_still_works():
+    assert CalculatorEngine().evaluate_expression("+".join(["1"] * 60)) == 60
+
+
+@pytest.mark.parametrize("text", ["__import__('os')", "(1).__class__", "lambda: 1", "[x for x in y]",
+                                  "open('f')", "x if x else 1"])
+def test_whitelist_rejects_anything_else(text):
+    with pytest.raises(ExpressionError):
+        compile_expression(text, None)
@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+
+import server
+from server import CalculatorServer
+
+
+async def request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                 + body)
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    head, _, body = data.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def exchange(calls, app=None):
+    # Starts a server on a free port, makes the requests in order, returns the replies
+    app = app or CalculatorServer()
+
+    async def main():
+        listener = await app.start("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            return [await request(port, *call) for call in calls]
+        finally:
+            listener.close()
+            await listener.wait_closed()
+            app.executor.shutdown(wait=False)
+    return asyncio.run(main())
+
+
+def test_batch_with_one_bad_record():
+    records = [{"line": "1 + 2"}, {"base": "DEC", "a": 5}, {"expr": "floor(9)**floor(9)**floor(9)"},
+               {"expr": "1+" * 1500 + "1"}, "not an object", {"a": "2", "op": "*", "b": "4"}]
+    [(status, replies)] = exchange([("POST", "/batch", records)])
+    assert status == 200
+    assert [reply.get("result") for reply in replies] == [3.0, None, None, None, None, 8.0]
+    assert replies[1]["error"] == "Missing operand"
+    assert replies[2]["error"] == "Result out of range"
+    assert all("error" in reply for reply in replies[1:5])
+
+
+def test_evaluate_errors_and_non_finite_results():
+    replies = exchange([("POST", "/evaluate", {"base": "DEC", "a": 5}),
+                        ("POST", "/evaluate", {"line": "1e308*10"}),
+                        ("POST", "/evaluate", {"expr": "x" * (server.MAX_FIELD + 1)})])
+    assert replies[0] == (422, {"base": "DEC", "a": 5, "error": "Missing operand"})
+    assert replies[1][0] == 200 and replies[1][1]["result"] == "inf"
+    assert replies[2][0] == 422
+
+
+def test_unexpected_exception_is_a_500(monkeypatch):
+    def broken(self, engine, body):
+        raise TypeError("boom")
+    monkeypatch.setattr(CalculatorServer, "health", broken)
+    [(status, payload)] = exchange([("GET", "/health")])
+    assert status == 500
+    assert payload == {"error": "TypeError: boom"}
+
+
+@pytest.mark.parametrize("path, status", [("/nowhere", 404), ("/health", 405)])
+def test_routing_errors(path, status):
+    [(got, payload)] = exchange([("POST", path, {})])
+    assert got == status and "error" in payload
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from stats import Statistics, text_values, collect
+
+
+def test_merge_matches_one_stream():
+    rng = np.random.default_rng(1)
+    a, b = rng.normal(1e9, 1e-3, 50000), rng.exponential(5.0, 30000) + 1e9
+    one = Statistics()
+    one.update(np.concatenate((a, b)))
+    left, right = Statistics(), Statistics()
+    left.update(a)
+    right.update(b)
+    left.merge(right)
+    assert left.count == one.count == 80000
+    assert left.mean == pytest.approx(one.mean, rel=1e-15)
+    assert left.variance == pytest.approx(one.variance, rel=1e-9)
+    assert left.minimum == one.minimum and left.maximum == one.maximum
+
+
+def test_moments_and_quantiles_match_numpy():
+    values = np.random.default_rng(2).normal(size=100000)
+    stats = Statistics()
+    for chunk in np.array_split(values, 7):
+        stats.update(chunk)
+    assert stats.mean == pytest.approx(values.mean(), abs=1e-12)
+    assert stats.variance == pytest.approx(values.var(ddof=1), rel=1e-12)
+    for q in (0.01, 0.5, 0.99):
+        assert stats.quantile(q) == pytest.approx(np.quantile(values, q), abs=0.01)
+
+
+def test_non_finite_values_are_skipped():
+    stats = collect(text_values("1, 2, nan\n3 inf 4"))
+    assert (stats.count, stats.skipped, stats.mean) == (4, 2, 2.5)
@@ -0,0 +1,38 @@
+import pytest
+
+from engine import CalculatorEngine, UnitError
+from units import UnitRegistry
+
+
+@pytest.mark.parametrize("value, category, from_unit, to_unit, expected", [
+    (100, "Temperature", "Celsius", "Fahrenheit", 212.0),
+    (-40, "Temperature", "Fahrenheit", "Celsius", -40.0),
+    (0, "Temperature", "Celsius", "Kelvin", 273.15),
+    (1, "Length", "Kilometer", "Meter", 1000.0),
+])
+def test_conversions(value, category, from_unit, to_unit, expected):
+    assert CalculatorEngine().convert_units(value, category, from_unit, to_unit) == pytest.approx(expected)
+
+
+def test_unknown_unit():
+    with pytest.raises(UnitError):
+        CalculatorEngine().convert_units(1, "Length", "Meter", "Parsec-ish")
+
+
+def test_affine_pairs_are_exact_and_symmetric():
+    registry = UnitRegistry({"T": {"units": [["base", "b", 1], ["half", "h", "1/2", "3"], ["third", "t", "1/3", "-7"]]}})
+    for a in ("base", "h", "third"):
+        for b in ("b", "half", "t"):
+            there = registry.convert(10.0, "T", a, b)
+            assert registry.convert(there, "T", b, a) == pytest.approx(10.0, rel=1e-15)
+    # 6 half = 6 * 1/2 + 3 = 6 base = (6 + 7) * 3 third
+    assert registry.convert(6, "T", "h", "t") == 39.0
+
+
+def test_many_affine_units_load_quickly():
+    import time
+    data = {"C": {"units": [[f"u{i}", f"s{i}", str(i + 1), str(i)] for i in range(2000)]}}
+    start = time.perf_counter()
+    registry = UnitRegistry(data)
+    assert time.perf_counter() - start < 2.0
+    assert registry.convert(1, "C", "u0", "s1") == 0.0
@@ -0,0 +1,165 @@
+import json
+import os
+import re
+from fractions import Fraction
+from functools import lru_cache
+
+# Unit registry loaded from units.json.
+#
+# Every category lists its units as [name, symbol, factor] or
+# [name, symbol, factor, offset], where value_in_base = value * factor + offset.
+# A factor is a number, a fraction such as "5/9", or a product/quotient of
+# other units' symbols such as "km/h" or "kW*h" (symbols may carry a power:
+# "m^3"). The category's "si" entry says what its base unit is worth in SI
+# units, so derived units can mix categories.
+#
+# At load time each unit keeps its exact factor and offset relative to its
+# category's base unit, so loading is linear in the number of units. A pair of
+# units is combined (exactly, then rounded once) the first time it is asked for
+# and remembered, so any later conversion is a dict lookup and one multiply-add.
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "units.json")
+
+_TERM = re.compile(r"\s*([*/])?\s*([^*/\s]+)")
+
+
+class UnitRegistryError(ValueError):
+    pass
+
+
+class UnitTable:
+    def __init__(self, name, units, symbols, factors, offsets):
+        self.name = name
+        self.units = units
+        self.symbols = symbols
+        self.index = {}
+        for i, (unit, symbol) in enumerate(zip(units, symbols)):
+            self.index[unit] = i
+            self.index.setdefault(symbol, i)
+
+        # Fractions: value_in_base = value * factors[i] + offsets[i]
+        self.factors = factors
+        self.offsets = offsets
+        # (from index, to index) -> (scale, offset) as floats
+        self.pairs = {}
+
+    def conversion(self, from_unit, to_unit):
+        i = self.index[from_unit]
+        j = self.index[to_unit]
+        pair = self.pairs.get((i, j))
+        if pair is None:
+            fi, oi = self.factors[i], self.offsets[i]
+            fj, oj = self.factors[j], self.offsets[j]
+            pair = self.pairs[i, j] = (float(fi / fj), float((oi - oj) / fj))
+        return pair
+
+
+class UnitRegistry:
+    def __init__(self, data):
+        self.categories = {}
+        self.unit_category = {}
+
+        definitions = {}
+        for category, spec in data.items():
+            base_si = _number(spec.get("si", 1))
+            for entry in spec["units"]:
+                if len(entry) not in (3, 4):
+                    raise UnitRegistryError(f"Bad unit entry in {category}: {entry}")
+                name, symbol = entry[0], entry[1]
+                definitions[symbol] = (category, base_si, entry)
+                definitions.setdefault(name, definitions[symbol])
+
+        si_values = {}
+        for category, spec in data.items():
+            units, symbols, factors, offsets = [], [], [], []
+            for entry in spec["units"]:
+                name, symbol = entry[0], entry[1]
+                si = _si_value(symbol, definitions, si_values, ())
+                units.append(name)
+                symbols.append(symbol)
+                factors.append(si / _number(spec.get("si", 1)))
+                offsets.append(_number(entry[3]) if len(entry) == 4 else Fraction(0))
+                self.unit_category.setdefault(name, category)
+                self.unit_category.setdefault(symbol, category)
+            self.categories[category] = UnitTable(category, units, symbols, factors, offsets)
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def units(self, category):
+        return list(self.categories[category].units)
+
+    def find_category(self, unit):
+        return self.unit_category[unit]
+
+    def conversion(self, category, from_unit, to_unit):
+        return self.categories[category].conversion(from_unit, to_unit)
+
+    def convert(self, value, category, from_unit, to_unit):
+        scale, offset = self.categories[category].conversion(from_unit, to_unit)
+        return value * scale + offset
+
+
+@lru_cache(maxsize=None)
+def load_registry(path=DEFAULT_PATH):
+    return UnitRegistry.load(path)
+
+
+def _number(text):
+    try:
+        return Fraction(str(text))
+    except (ValueError, ZeroDivisionError):
+        raise UnitRegistryError(f"Not a number: {text!r}") from None
+
+
+def _si_value(symbol, definitions, si_values, seen):
+    # SI value of one unit of `symbol`, resolving derived factors recursively
+    if symbol in si_values:
+        return si_values[symbol]
+    if symbol in seen:
+        raise UnitRegistryError(f"Circular unit definition: {symbol}")
+    try:
+        category, base_si, entry = definitions[symbol]
+    except KeyError:
+        raise UnitRegistryError(f"Unknown unit: {symbol}") from None
+    factor = entry[2]
+    if isinstance(factor, str) and not _is_number(factor):
+        value = _expression_si(factor, definitions, si_values, seen + (symbol,)) / base_si
+    else:
+        value = _number(factor)
+    si_values[symbol] = value * base_si
+    return si_values[symbol]
+
+
+def _expression_si(expr, definitions, si_values, seen):
+    value = Fraction(1)
+    pos = 0
+    while pos < len(expr):
+        match = _TERM.match(expr, pos)
+        if not match or match.end() == pos or (pos and not match.group(1)):
+            raise UnitRegistryError(f"Bad unit expression: {expr}")
+        op, term = match.groups()
+        pos = match.end()
+        if _is_number(term):
+            term_value = _number(term)
+        elif "^" in term:
+            base, _, power = term.partition("^")
+            try:
+                power = int(power)
+            except ValueError:
+                raise UnitRegistryError(f"Bad unit expression: {expr}") from None
+            term_value = _si_value(base, definitions, si_values, seen) ** power
+        else:
+            term_value = _si_value(term, definitions, si_values, seen)
+        value = value / term_value if op == "/" else value * term_value
+    return value
+
+
+def _is_number(text):
+    try:
+        Fraction(str(text))
+        return True
+    except (ValueError, ZeroDivisionError):
+        return False
@@ -0,0 +1,135 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+# Runs slow work (sampling, conversions, bulk files) off the Tk thread.
+#
+# Every job has a key such as "graph" or "convert". Jobs with the same key run
+# one after another on that key's own worker thread, and submitting a new job
+# makes every older one with the same key stale: if it has not started it is
+# cancelled, otherwise its result is dropped. An optional delay debounces
+# bursts such as keystrokes. Results come back to the Tk thread through a
+# queue polled with root.after, so callbacks may touch widgets.
+#
+# The worker threads are daemons: a long job still running when the window is
+# closed does not keep the process alive.
+
+POLL_MS = 15
+
+
+class _Lane:
+    # One key's worker thread, running its jobs in submission order
+    def __init__(self, name):
+        self.jobs = queue.Queue()
+        threading.Thread(target=self._run, name=name, daemon=True).start()
+
+    def submit(self, func, *args):
+        future = Future()
+        self.jobs.put((future, func, args))
+        return future
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            future, func, args = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = func(*args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def shutdown(self):
+        # Cancels what has not started; the running job is left to finish or die with the process
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job[0].cancel()
+        self.jobs.put(None)
+
+
+class BackgroundRunner:
+    def __init__(self, root, poll_ms=POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.lanes = {}
+        self.results = queue.Queue()
+        self.generation = {}
+        self.timers = {}
+        self.futures = {}
+        self.pending = 0
+        self.polling = None
+
+    def submit(self, key, func, *args, on_done=None, on_error=None, delay=0):
+        generation = self.cancel(key)
+        if delay:
+            self.timers[key] = self.root.after(delay, self._start, key, generation, func, args, on_done, on_error)
+        else:
+            self._start(key, generation, func, args, on_done, on_error)
+
+    def cancel(self, key):
+        # Makes everything submitted so far under `key` stale
+        generation = self.generation.get(key, 0) + 1
+        self.generation[key] = generation
+        timer = self.timers.pop(key, None)
+        if timer is not None:
+            self.root.after_cancel(timer)
+        future = self.futures.pop(key, None)
+        if future is not None:
+            future.cancel()
+        return generation
+
+    def busy(self, key):
+        return key in self.timers or key in self.futures
+
+    def _start(self, key, generation, func, args, on_done, on_error):
+        if generation != self.generation.get(key):
+            return
+        self.timers.pop(key, None)
+        lane = self.lanes.get(key)
+        if lane is None:
+            lane = self.lanes[key] = _Lane(f"calc-{key}")
+        future = lane.submit(func, *args)
+        self.futures[key] = future
+        self.pending += 1
+        # Called on the worker thread (or here if already cancelled); Queue is thread-safe
+        future.add_done_callback(lambda f: self.results.put((key, generation, f, on_done, on_error)))
+        if self.polling is None:
+            self.polling = self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self.polling = None
+        try:
+            while True:
+                try:
+                    key, generation, future, on_done, on_error = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                self.pending -= 1
+                if self.futures.get(key) is future:
+                    del self.futures[key]
+                if future.cancelled() or generation != self.generation.get(key):
+                    continue
+                error = future.exception()
+                if error is None:
+                    if on_done is not None:
+                        on_done(future.result())
+                elif on_error is not None:
+                    on_error(error)
+        finally:
+            if self.pending:
+                self.polling = self.root.after(self.poll_ms, self._poll)
+
+    def shutdown(self):
+        for key in list(self.timers):
+            self.cancel(key)
+        for lane in self.lanes.values():
+            lane.shutdown()
+        self.lanes = {}